@@ -1,5 +1,5 @@
 import streamlit as st
-from numpy import pi
+from numpy import pi, isnan
 import passive_auto_design.devices.balun as bln
 from passive_auto_design.units.unit import SI, Impedance
 from passive_auto_design.components.inductor import Inductor
@@ -39,7 +39,9 @@ col[1].subheader("Second Solution")
 for i in (0, 1):
     col[i].write(r"$L_{in}$=" + SI(result[0][i]) + "H")
     col[i].write(r"$L_{out}$=" + SI(result[1][i]) + "H")
-    if force_sym:
+    if force_sym and isnan(x_add[i]):
+        col[i].write("This solution cannot be made symmetrical.")
+    elif force_sym:
         if x_add[i] > 0:
             message = "an inductor of " + SI(x_add[i] / (2 * 3.14 * f_c)) + "H"
         else:
@@ -3,7 +3,6 @@ import streamlit as st
 import matplotlib.pyplot as plt
 import passive_auto_design.devices.coupler as cpl
 from passive_auto_design.units.unit import SI
-from passive_auto_design.special import gamma
 from passive_auto_design.components.inductor import Inductor
 from passive_auto_design.components.transformer import Transformer
 
@@ -26,11 +25,18 @@ col1.write(r"$L_{eq}$=" + SI(coupler.l) + "H")
 f_log = np.round(np.log10(f_c), 1)
 freq = np.logspace(f_log - 2, f_log + 2)
 
-z_eff = coupler.l * (2 * np.pi * freq * np.sqrt(1 - k**2))
+response = coupler.response(freq)
 
 fig, ax = plt.subplots()
-ax.semilogx(freq, gamma(z_eff, z_c).dB().value, label="Return Loss")
-ax.semilogx(freq, (1 - gamma(z_eff, z_c) ** 2).dB().value, label="Transmission")
+for key, label in (
+    ("s11", "Return Loss"),
+    ("s21", "Transmission"),
+    ("s31", "Coupling"),
+    ("s41", "Isolation"),
+):
+    ax.semilogx(freq, response[key], label=label)
+ax.set_ylim(-40, 0)
+ax.legend()
 ax.grid(True)
 col2.pyplot(fig, dpi=300)
 
@@ -48,27 +54,24 @@ with col1.form(key="Transformer Parameters"):
     dist_g = st.number_input(label="Distance to the ground plane (µm)", value=3.0)
     st.form_submit_button(label="Compute")
 
-width = width_min
-l1 = Inductor(n_turn=n_turn, width=width, gap=gap)
+l1 = Inductor(n_turn=n_turn, width=width_min, gap=gap)
 transfo = Transformer(
-    l1, l1, rho=0, eps_r=eps_r, h_mut=dist * 1e-6, h_gnd=dist_g * 1e-6
+    l1, rho=0, eps_r=eps_r, h_mut=dist * 1e-6, h_gnd=dist_g * 1e-6, sym=True
+)
+# the ratio cm/cg only depends on the distances, size d_i and width jointly
+ratio = transfo.model["cm"] / transfo.model["cg"]
+transfo.set_model_with_dim(
+    {
+        "lp": coupler.l,
+        "cm": ratio * coupler.c / (1 + ratio),
+        "cg": coupler.c / (1 + ratio),
+    },
+    ["lp.d_i", "lp.width"],
+    bounds={"lp.width": (width_min, None)},
+)
+l1 = Inductor(
+    n_turn=n_turn, width=transfo.dim["lp.width"], gap=gap, d_i=transfo.dim["lp.d_i"]
 )
-for i in range(4):
-    transfo.set_model_with_dim({"lp": coupler.l}, "lp.d_i")
-    d_i = transfo.dim["lp.d_i"]
-    ratio = transfo.model["cm"] / transfo.model["cg"]
-    width = transfo.dim["lp.width"]
-    transfo.set_model_with_dim(
-        {"cm": ratio * coupler.c / (1 + ratio), "cg": coupler.c / (1 + ratio)},
-        "lp.width",
-    )
-    delta = np.abs(width - transfo.dim["lp.width"]) / width
-    l1 = Inductor(n_turn=n_turn, width=transfo.dim["lp.width"], gap=gap, d_i=d_i)
-    transfo = Transformer(
-        l1, l1, rho=0, eps_r=eps_r, h_mut=dist * 1e-6, h_gnd=dist_g * 1e-6
-    )
-    if delta < 0.001:
-        break
 col2.header("Geometrical Sizing")
 col2.write(r"$l_{find}$ = " + str(l1))
 col2.write(r"$c_{mut}$ = " + SI(transfo.model["cm"]) + "F")
@@ -3,7 +3,6 @@ import numpy as np
 import matplotlib.pyplot as plt
 import passive_auto_design.devices.taper as tap
 from passive_auto_design.special import reflexion_coef
-from passive_auto_design.units.physical_dimension import PhysicalDimension
 
 
 N_STEP = st.number_input("Step Number", min_value=3, step=1, value=61)
@@ -20,17 +19,9 @@ Z_KLOPF = tap.klopfenstein_taper(Z_START, Z_STOP, N_STEP)  # Ohm
 DELAY = np.sqrt(E) * TOT_LENGTH / (C_0 * N_STEP)  # s
 
 F_SWEEP = np.arange(0, 50e9, 0.1e9)
-GAMMA_LINEAR = PhysicalDimension(
-    value=np.zeros(F_SWEEP.shape, dtype=complex), scale="lin", unit=""
-)
-GAMMA_KLOPF = PhysicalDimension(
-    value=np.zeros(F_SWEEP.shape, dtype=complex), scale="lin", unit=""
-)
-
-for i in range(F_SWEEP.size):
-    Phase = -DELAY * 2 * np.pi * F_SWEEP[i]
-    GAMMA_LINEAR[i] = reflexion_coef(Z_LINEAR.value, Phase).value
-    GAMMA_KLOPF[i] = reflexion_coef(Z_KLOPF.value, Phase).value
+PHASE = -DELAY * 2 * np.pi * F_SWEEP
+GAMMA_LINEAR = reflexion_coef(Z_LINEAR, PHASE)
+GAMMA_KLOPF = reflexion_coef(Z_KLOPF, PHASE)
 
 tap_prof = plt.figure()
 plt.grid(True)
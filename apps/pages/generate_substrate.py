@@ -7,14 +7,13 @@ This Script is given as an example.
 It describes how to define a substrate (or Back End Of Line)
 and dump it in a .yml file
 """
-import yaml
 import streamlit as st
 import passive_auto_design.substrate as sub
 
 
 @st.cache
 def export(substrate):
-    return yaml.dump(substrate.sub)
+    return substrate.dumps()
 
 
 # Definition of the substrate different layers
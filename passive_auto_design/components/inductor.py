@@ -1,6 +1,7 @@
+import numpy as np
 from pydantic import FilePath
 from matplotlib.ticker import EngFormatter
-import klayout.db as db
+from .layout import LayoutLibrary
 from .lumped_element import LumpedElement
 from ..units.constants import u0
 
@@ -21,35 +22,57 @@ class Inductor(LumpedElement):
         return Ind(self.model["ind"])
 
     def get_model(self):
-        n = self.dim["n_turn"]
-        outer_diam = (
-            self.dim["d_i"] + 2 * n * self.dim["width"] + 2 * (n - 1) * self.dim["gap"]
+        self.dim["d_o"] = outer_diameter(
+            self.dim["d_i"], self.dim["n_turn"], self.dim["width"], self.dim["gap"]
+        )
+        ind = inductor_model(
+            self.dim["d_i"],
+            self.dim["n_turn"],
+            self.dim["width"],
+            self.dim["gap"],
+            self.const["k_1"],
+            self.const["k_2"],
         )
-        self.dim["d_o"] = outer_diam
-        rho = (self.dim["d_i"] + outer_diam) / 2
-        density = (outer_diam - self.dim["d_i"]) / (outer_diam + self.dim["d_i"])
-        ind = self.const["k_1"] * u0 * n**2 * rho / (1 + self.const["k_2"] * density)
         return {"ind": ind}
 
-    def draw(self, file: FilePath):
-        ly = db.Layout()
+    def draw(self, file: FilePath, sides=8):
+        """
+        write the layout of the inductor (octagonal spiral, or square for sides=4)
+        in a GDS or OASIS file. See layout.LayoutLibrary to draw many inductors
+        in a single file.
+        """
+        library = LayoutLibrary()
+        library.add_inductor(self, "inductor", sides)
+        library.write(file)
 
-        # sets the database unit to 1 nm
-        ly.dbu = 0.001
 
-        # adds a single top cell
-        top_cell = ly.create_cell("inductor")
+def outer_diameter(d_i, n_turn, width, gap):
+    """
+    return the outer diameter of a spiral inductor.
+    """
+    return d_i + 2 * n_turn * width + 2 * (n_turn - 1) * gap
 
-        # creates a new layer (layer number 1, datatype 0)
-        layer1 = ly.layer(1, 0)
-        d_i = 5.0
-        pts = [
-            db.DPoint(0, -d_i / 2),
-            db.DPoint(d_i / 2, -d_i / 2),
-            db.DPoint(d_i / 2, d_i / 2),
-            db.DPoint(0, d_i / 2),
-        ]
-        rect = db.DPath(pts, 2.0)
-        top_cell.shapes(layer1).insert(rect)
 
-        ly.write(file)
+def inner_diameter(ind, n_turn, width, gap, k_1=2.25, k_2=3.55):
+    """
+    return the inner diameter of the spiral inductor of inductance ind
+    (inverse of inductor_model, NaN if no inner diameter is large enough).
+    Parameters broadcast as numpy arrays.
+    """
+    spread = outer_diameter(0, n_turn, width, gap)
+    k_ind = k_1 * u0 * np.square(n_turn)
+    # ind * (1 + k_2 * spread / (2 * d_avg)) = k_ind * d_avg, solved for d_avg
+    d_avg = (ind + np.sqrt(ind**2 + 2 * k_ind * k_2 * ind * spread)) / (2 * k_ind)
+    d_i = d_avg - spread / 2
+    return np.where(d_i > 0, d_i, np.nan)
+
+
+def inductor_model(d_i, n_turn, width, gap, k_1=2.25, k_2=3.55):
+    """
+    return the inductance of a spiral inductor using the modified wheeler formula.
+    Parameters broadcast as numpy arrays.
+    """
+    d_o = outer_diameter(d_i, n_turn, width, gap)
+    rho = (d_i + d_o) / 2
+    density = (d_o - d_i) / (d_o + d_i)
+    return k_1 * u0 * n_turn**2 * rho / (1 + k_2 * density)
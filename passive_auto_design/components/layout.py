@@ -0,0 +1,264 @@
+"""
+Layout generation of the spiral inductors and transformers (GDS or OASIS),
+many variants being drawn in a single library sharing its sub-cells.
+"""
+import numpy as np
+import klayout.db as db
+
+# metal layers from the top, and via layers between two consecutive metals
+METALS = ((1, 0), (2, 0), (3, 0), (4, 0))
+VIAS = ((51, 0), (52, 0), (53, 0))
+STYLES = ("stacked", "interleaved")
+
+
+def spiral(d_i, n_turn, width, gap, sides=8, pitch=None):
+    """
+    return the centerline of a spiral (array of points, in the unit of the dimensions).
+
+    The sides keep the orientations of a regular polygon (8: octagonal, 4: square),
+    the j-th side facing the angle 2 pi j / sides. The spiral turns counterclockwise
+    from the middle of the first side (facing +x) to the middle of its last side,
+    each side being pitch / sides farther from the center than the previous one:
+    two consecutive turns are parallel and separated by the gap.
+    n_turn is rounded to a whole number of sides.
+
+    Parameters
+    ----------
+    d_i : float
+        inner diameter (between the inner edges of two opposite sides).
+    n_turn : float
+        number of turns.
+    width, gap : float
+        width of the track and gap between two turns.
+    sides : int
+        number of sides of each turn.
+    pitch : float, optional
+        distance between two turns (default: width + gap).
+
+    """
+    pitch = width + gap if pitch is None else pitch
+    n_side = max(int(round(n_turn * sides)), 1)
+    angle = 2 * np.pi * np.arange(n_side + 1) / sides
+    normal = np.stack((np.cos(angle), np.sin(angle)), axis=-1)
+    apothem = d_i / 2 + width / 2 + np.arange(n_side + 1) * pitch / sides
+    # each corner is on the lines of two consecutive sides: normal . p = apothem
+    corner = np.linalg.solve(
+        np.stack((normal[:-1], normal[1:]), axis=1),
+        np.stack((apothem[:-1], apothem[1:]), axis=1)[..., None],
+    )[..., 0]
+    return np.concatenate(
+        (apothem[:1, None] * normal[:1], corner, apothem[-1:, None] * normal[-1:])
+    )
+
+
+class LayoutLibrary:
+    """
+    Library of layouts, written at once in a GDS or OASIS file.
+
+    Each drawn component is a top cell of the library. The spirals (with their
+    leads, underpass and vias) and the via arrays are sub-cells, created once per
+    geometry and instantiated by all the components using them: sweeps of
+    thousands of variants share most of their geometry, e.g. the spirals of
+    the primaries of a transformer sweep on the secondary, and the vias are
+    regular arrays of a single via cell.
+
+    Parameters
+    ----------
+    metals, vias : tuple
+        (layer, datatype) of the metals from the top and of the vias between them.
+    dbu : float
+        database unit, in micrometer.
+    via_size, via_gap : float
+        size of the square vias and gap between them, in meter.
+    lead : float
+        length of the leads beyond the outer diameter, in meter.
+
+    """
+
+    def __init__(
+        self,
+        metals=METALS,
+        vias=VIAS,
+        dbu=0.001,
+        via_size=0.5e-6,
+        via_gap=0.5e-6,
+        lead=10e-6,
+    ):
+        self.layout = db.Layout()
+        self.layout.dbu = dbu
+        self.metals = [self.layout.layer(*layer) for layer in metals]
+        self.vias = [self.layout.layer(*layer) for layer in vias]
+        self.via_size, self.via_gap, self.lead = via_size, via_gap, lead
+        self.__cells = {}
+        self.__names = set()
+
+    def __len__(self):
+        return len(self.__names)
+
+    def __key(self, *values):
+        # geometries equal at the database unit share their cells
+        return tuple(round(v * 1e6 / self.layout.dbu) for v in values)
+
+    def __cell(self, key, name, build):
+        """
+        return the index of the cell of the key, built by build(cell) on its first use
+        """
+        index = self.__cells.get(key)
+        if index is None:
+            cell = self.layout.create_cell(name)
+            build(cell)
+            index = self.__cells[key] = cell.cell_index()
+        return index
+
+    def via_array(self, level, width):
+        """
+        return the index of the cell of a square array of vias between the metals
+        level and level + 1, filling a square of the given width centered on the origin
+        """
+        size, gap = self.via_size * 1e6, self.via_gap * 1e6
+        via = self.__cell(
+            ("via", level),
+            f"via_{level}",
+            lambda cell: cell.shapes(self.vias[level]).insert(
+                db.DBox(-size / 2, -size / 2, size / 2, size / 2)
+            ),
+        )
+        n_via = max(int((width * 1e6 - gap) // (size + gap)), 1)
+
+        def build(cell):
+            step = (size + gap) / self.layout.dbu
+            start = -(n_via - 1) * (size + gap) / 2
+            cell.insert(
+                db.CellInstArray(
+                    via,
+                    db.Trans(db.DVector(start, start).to_itype(self.layout.dbu)),
+                    db.Vector(round(step), 0),
+                    db.Vector(0, round(step)),
+                    n_via,
+                    n_via,
+                )
+            )
+
+        key = ("via_array", level) + self.__key(width)
+        return self.__cell(key, f"via_array_{level}_{key[-1]}", build)
+
+    def via_stack(self, cell, point, metal_1, metal_2, width):
+        """
+        add to cell the vias between metal_1 and metal_2 at point (in micrometer),
+        with square pads of the given width on the metals in between
+        """
+        low, high = min(metal_1, metal_2), max(metal_1, metal_2)
+        half = width * 1e6 / 2
+        for level in range(low, high):
+            if level != low:
+                cell.shapes(self.metals[level]).insert(
+                    db.DBox(*(point - half), *(point + half))
+                )
+            cell.insert(
+                db.DCellInstArray(
+                    self.via_array(level, width), db.DTrans(db.DVector(*point))
+                )
+            )
+
+    def spiral(
+        self, d_i, n_turn, width, gap, metal=0, underpass=1, sides=8, pitch=None
+    ):
+        """
+        return the index of the cell of a spiral on the metal metal (see spiral),
+        with its outer lead and its inner lead on the metal underpass (along +y).
+        pitch is the distance between two turns (default: width + gap), e.g. twice
+        width + gap for the windings of an interleaved transformer.
+        """
+        pitch = width + gap if pitch is None else pitch
+        n_side = max(int(round(n_turn * sides)), 1)
+        key = ("spiral", metal, underpass, sides, n_side) + self.__key(
+            d_i, width, pitch
+        )
+
+        def build(cell):
+            points = spiral(d_i, n_turn, width, gap, sides, pitch) * 1e6
+            w_um = width * 1e6
+            outer = np.max(np.abs(points)) + w_um / 2 + self.lead * 1e6
+            # the outer lead follows the normal of the last side
+            last = points[-1]
+            lead = last * (outer / np.linalg.norm(last))
+            self.__path(cell, metal, np.concatenate((points, [lead])), w_um)
+            first = points[0]
+            self.via_stack(cell, first, metal, underpass, width)
+            self.__path(cell, underpass, [first, (first[0], outer)], w_um)
+
+        return self.__cell(key, f"spiral_{len(self.__cells)}", build)
+
+    def __path(self, cell, metal, points, width):
+        cell.shapes(self.metals[metal]).insert(
+            db.DPath([db.DPoint(*p) for p in points], width)
+        )
+
+    def __top_cell(self, name, default):
+        if name is None:
+            name = f"{default}_{len(self.__names)}"
+        if name in self.__names:
+            raise ValueError(f"cell {name} already in the library")
+        self.__names.add(name)
+        return self.layout.create_cell(name)
+
+    def add_inductor(self, inductor, name=None, sides=8, metal=0, underpass=1):
+        """
+        draw an Inductor as a new top cell (named name) and return this cell
+        """
+        dim = {k: float(v) for k, v in inductor.dim.items()}
+        top = self.__top_cell(name, "inductor")
+        spiral_cell = self.spiral(
+            dim["d_i"], dim["n_turn"], dim["width"], dim["gap"], metal, underpass, sides
+        )
+        top.insert(db.DCellInstArray(spiral_cell, db.DTrans()))
+        return top
+
+    def add_transformer(self, transformer, name=None, style="stacked", sides=8):
+        """
+        draw a Transformer as a new top cell (named name) and return this cell.
+
+        "stacked": the primary is drawn on the first metal (underpass on the second),
+        the secondary on the third metal (underpass on the fourth).
+        "interleaved": both windings are drawn on the first metal (underpasses on the
+        second metal) with the dimensions of the primary and twice its pitch.
+        The secondary is rotated by 180°, its leads being opposite to the primary ones:
+        for the interleaved windings, its turns lie between those of the primary.
+        """
+        if style not in STYLES:
+            raise ValueError(f"unknown style: {style}, expected one of {STYLES}")
+        dim = {k: float(v) for k, v in transformer.dim.items()}
+        top = self.__top_cell(name, "transformer")
+        if style == "stacked":
+            cells = [
+                self.spiral(
+                    dim[f"{w}.d_i"],
+                    dim[f"{w}.n_turn"],
+                    dim[f"{w}.width"],
+                    dim[f"{w}.gap"],
+                    metal,
+                    metal + 1,
+                    sides,
+                )
+                for w, metal in (("lp", 0), ("ls", 2))
+            ]
+        else:
+            width, gap = dim["lp.width"], dim["lp.gap"]
+            cell = self.spiral(
+                dim["lp.d_i"],
+                dim["lp.n_turn"],
+                width,
+                gap,
+                sides=sides,
+                pitch=2 * (width + gap),
+            )
+            cells = [cell, cell]
+        top.insert(db.DCellInstArray(cells[0], db.DTrans()))
+        top.insert(db.DCellInstArray(cells[1], db.DTrans(db.DTrans.R180)))
+        return top
+
+    def write(self, path):
+        """
+        write the library, as GDS or OASIS according to the extension of path
+        """
+        self.layout.write(str(path))
@@ -1,41 +1,221 @@
+import math
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict, namedtuple
 from pydantic import BaseModel
-from typing import Dict
-from scipy.optimize import minimize_scalar
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Union
+from typing_extensions import Annotated
+from pydantic.functional_validators import BeforeValidator
+import numpy as np
+from scipy.optimize import minimize, minimize_scalar
 from matplotlib.ticker import EngFormatter
 from ..units.constants import eps0
 
 
+def validate(v: Any) -> Union[float, np.ndarray]:
+    if isinstance(v, np.ndarray):
+        return v
+    return float(v)
+
+
+Value = Annotated[Any, BeforeValidator(validate)]
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+# model cache of each class: (LRU dict of the models, [hits, misses], lock)
+_MODEL_CACHE = {}
+_set_attr = object.__setattr__
+
+
+def _class_cache(cls):
+    # the cache of cls, created on first use (setdefault is atomic)
+    cache = _MODEL_CACHE.get(cls)
+    if cache is None:
+        cache = _MODEL_CACHE.setdefault(cls, (OrderedDict(), [0, 0], threading.Lock()))
+    return cache
+
+
 class LumpedElement(BaseModel, ABC):
     """
-    class of standard lumped element, to be inherited by all lumped elements
+    class of standard lumped element, to be inherited by all lumped elements.
+    dim and const values are either floats or numpy arrays,
+    in which case the model is evaluated over the broadcast arrays.
     """
 
-    dim: Dict[str, float]
-    const: Dict[str, float]
-    model: Dict[str, float] = {}
+    dim: Dict[str, Value]
+    const: Dict[str, Value]
+    model: Dict[str, Value] = {}
+    # size of the model cache of the class (0 to disable it)
+    cache_size: ClassVar[int] = 1024
+    # significant digits of the dim and const values in the cache keys (None: exact)
+    cache_digits: ClassVar[Optional[int]] = 12
 
     def __init__(self, dim, const, **data):
         BaseModel.__init__(self, dim=dim, const=const, **data)
-        self.model = self.get_model()
+        self.model = self.evaluate()
+
+    @classmethod
+    def trusted(cls, dim, const, **data):
+        """
+        return an element built without pydantic validation nor model cache,
+        for the hot code paths evaluating many different elements.
+        dim and const are used as given (floats or numpy arrays, no copy nor coercion),
+        data gives the other fields of the class (e.g. sym for a Transformer).
+        """
+        out = cls.__new__(cls)
+        _set_attr(out, "__dict__", {"dim": dim, "const": const, "model": {}, **data})
+        _set_attr(out, "__pydantic_fields_set__", {"dim", "const", *data})
+        _set_attr(out, "__pydantic_extra__", None)
+        _set_attr(out, "__pydantic_private__", None)
+        out.__dict__["model"] = out.get_model()
+        return out
+
+    def evaluate(self) -> Dict[str, float]:
+        """
+        return the model of the element, through the model cache of its class.
+        The cache is keyed by the quantized dim and const values (and the other fields),
+        so that assigning a dim or const entry never leads to a stale model.
+        Elements with array values are not cached.
+        The cache is shared by the threads, behind a lock of the class.
+        """
+        return self.__cached_model(self.dim, self.const, self)
+
+    def __cached_model(self, dim, const, element=None):
+        # element computes the model on a miss, by default a copy of self with dim, const
+        cls = type(self)
+        key = self.__cache_key(dim, const) if cls.cache_size > 0 else None
+        if key is not None:
+            cache, stats, lock = _class_cache(cls)
+            with lock:
+                entry = cache.get(key)
+                if entry is not None:
+                    stats[0] += 1
+                    cache.move_to_end(key)
+                else:
+                    stats[1] += 1
+            if entry is not None:
+                # restore the dimensions computed by get_model (e.g. d_o of Inductor)
+                dim.update(entry[1])
+                return dict(entry[0])
+        # computed outside of the lock: concurrent misses of a key compute it twice
+        if element is None:
+            element = self.model_copy(update={"dim": dim, "const": const, "model": {}})
+        model = element.get_model()
+        if key is not None:
+            with lock:
+                cache[key] = (dict(model), dict(element.dim))
+                while len(cache) > cls.cache_size:
+                    cache.popitem(last=False)
+        return model
+
+    def __cache_key(self, dim, const):
+        cls = type(self)
+        values = (*dim.values(), *const.values())
+        if cls.cache_digits is None:
+            if any(isinstance(value, np.ndarray) for value in values):
+                return None
+        else:
+            # binary rounding of the mantissas, much faster than decimal formatting
+            scale = 2.0 ** math.ceil(cls.cache_digits * math.log2(10))
+            quantized = []
+            try:
+                for value in values:
+                    if value.__class__ is not float and isinstance(value, np.ndarray):
+                        return None
+                    mantissa, exponent = math.frexp(value)
+                    quantized.append(round(mantissa * scale))
+                    quantized.append(exponent)
+            except (OverflowError, ValueError):
+                # infinite or NaN values
+                return None
+            values = tuple(quantized)
+        others = tuple(
+            getattr(self, name)
+            for name in cls.model_fields
+            if name not in ("dim", "const", "model")
+        )
+        return (cls, tuple(dim), tuple(const), values, others)
+
+    @classmethod
+    def cache_info(cls) -> CacheInfo:
+        """
+        return the hits, misses, maximum and current size of the model cache of the class
+        """
+        cache, stats, _ = _MODEL_CACHE.get(cls, ((), [0, 0], None))
+        return CacheInfo(stats[0], stats[1], cls.cache_size, len(cache))
 
-    # TODO enable multiple x_keys
-    def set_model_with_dim(self, target_model: Dict[str, float], dim_key: str) -> float:
+    @classmethod
+    def cache_clear(cls):
         """
-        set the value of the dim_key to achieve the target model
+        clear the model cache of the class and its statistics
         """
-        res = minimize_scalar(self.__cost, args=(dim_key, target_model))
-        self.model = self.get_model()
-        return res.x
+        _MODEL_CACHE.pop(cls, None)
+
+    def set_model_with_dim(
+        self,
+        target_model: Dict[str, float],
+        dim_key: Union[str, List[str]],
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+    ) -> Union[float, Dict[str, float]]:
+        """
+        set the value of the dim_key to achieve the target model.
+        dim_key can be a key of dim or const, or a list of keys solved jointly.
+        bounds give the (min, max) of some keys (e.g. from the layer design rules),
+        None meaning unbounded.
+        The instance is only updated once the solution is found.
+        return the value found (a dict of values if a list of keys is given).
+        """
+        keys = [dim_key] if isinstance(dim_key, str) else list(dim_key)
+        bounds = {} if bounds is None else bounds
+        if isinstance(dim_key, str) and dim_key not in bounds:
+            res = minimize_scalar(self.__cost, args=(keys, target_model))
+            x_values = [res.x]
+        else:
+            # solve on values normalized by the starting point
+            x_0 = np.array([self.__get(key) for key in keys], dtype=float)
+            scale = np.where(x_0 != 0, np.abs(x_0), 1)
+            x_bounds = []
+            for key, x_s in zip(keys, scale):
+                low, high = bounds.get(key, (None, None))
+                x_bounds.append(
+                    (
+                        None if low is None else low / x_s,
+                        None if high is None else high / x_s,
+                    )
+                )
+            res = minimize(
+                lambda x: self.__cost(x * scale, keys, target_model),
+                np.clip(
+                    x_0 / scale,
+                    [-np.inf if b[0] is None else b[0] for b in x_bounds],
+                    [np.inf if b[1] is None else b[1] for b in x_bounds],
+                ),
+                method="L-BFGS-B",
+                bounds=x_bounds,
+            )
+            x_values = res.x * scale
+        self.__set(self.dim, self.const, keys, x_values)
+        self.model = self.evaluate()
+        if isinstance(dim_key, str):
+            return float(x_values[0])
+        return {key: float(x_value) for key, x_value in zip(keys, x_values)}
+
+    def __get(self, key):
+        return self.dim[key] if key in self.dim else self.const[key]
+
+    @staticmethod
+    def __set(dim, const, keys, x_values):
+        for key, x_value in zip(keys, x_values):
+            if key in dim:
+                dim[key] = float(x_value)
+            if key in const:
+                const[key] = float(x_value)
 
     def __cost(
-        self, x_value: float, x_key: str, target_model: Dict[str, float]
+        self, x_value, x_keys: List[str], target_model: Dict[str, float]
     ) -> float:
-        if x_key in self.dim:
-            self.dim[x_key] = x_value
-        if x_key in self.const:
-            self.const[x_key] = x_value
-        tmp_model = self.get_model()
+        # evaluate the model on copies of dim and const, the instance is left untouched
+        dim, const = dict(self.dim), dict(self.const)
+        self.__set(dim, const, x_keys, np.atleast_1d(x_value))
+        tmp_model = self.__cached_model(dim, const)
         cost = 0
         for key in target_model.keys():
             cost += (target_model[key] - tmp_model[key]) ** 2 / (
@@ -71,8 +251,8 @@ class Resistor(LumpedElement):
 
     def get_model(self):
         return {
-            "res": max(
-                [self.const["rho"] * self.dim["length"] / self.dim["section"], 0.0]
+            "res": resistor_model(
+                self.dim["section"], self.dim["length"], self.const["rho"]
             )
         }
 
@@ -101,4 +281,24 @@ class Capacitor(LumpedElement):
         return Cap(self.model["cap"])
 
     def get_model(self):
-        return {"cap": eps0 * self.const["eps_r"] * self.dim["area"] / self.dim["dist"]}
+        return {
+            "cap": capacitor_model(
+                self.dim["area"], self.dim["dist"], self.const["eps_r"]
+            )
+        }
+
+
+def resistor_model(section, length, rho):
+    """
+    return the resistance of a conductor of given section and length.
+    Parameters broadcast as numpy arrays.
+    """
+    return np.maximum(rho * np.divide(length, section), 0.0)
+
+
+def capacitor_model(area, dist, eps_r):
+    """
+    return the capacitance of a plate capacitor.
+    Parameters broadcast as numpy arrays.
+    """
+    return eps0 * eps_r * np.divide(area, dist)
@@ -3,7 +3,12 @@
 """
 import numpy as np
 import passive_auto_design.components.lumped_element as lmp
-from passive_auto_design.components.inductor import Inductor
+from passive_auto_design.components.lumped_element import (
+    capacitor_model,
+    resistor_model,
+)
+from passive_auto_design.components.inductor import Inductor, inductor_model
+from passive_auto_design.components.layout import LayoutLibrary
 
 
 class Transformer(lmp.LumpedElement):
@@ -38,24 +43,53 @@ class Transformer(lmp.LumpedElement):
             dim["ls." + key] = primary.dim[key] if sym else secondary.dim[key]
         lmp.LumpedElement.__init__(self, dim=dim, const=const, sym=sym)
 
+    @classmethod
+    def from_stack(cls, primary, stack, layers, secondary=None, freq=None, sym=False):
+        """
+        return the transformer drawn in the layers (primary, secondary, ground)
+        of a StackUp (see Substrate.analyze): h_mut and eps_r are the separation and
+        permittivity between the windings, h_gnd the separation between the ground
+        and the closest winding, rho the sheet resistance of the primary
+        (at freq if given, else at DC).
+        """
+        layer_p, layer_s, ground = layers
+        h_mut, eps_r = stack.pair(layer_p, layer_s)
+        h_gnd = np.minimum(
+            stack.pair(layer_p, ground)[0], stack.pair(layer_s, ground)[0]
+        )
+        return cls(
+            primary,
+            secondary,
+            rho=stack.sheet_resistance(layer_p, freq),
+            eps_r=eps_r,
+            h_mut=h_mut,
+            h_gnd=h_gnd,
+            sym=sym,
+        )
+
+    def draw(self, file, style="stacked", sides=8):
+        """
+        write the layout of the transformer ("stacked" or "interleaved" windings,
+        see layout.LayoutLibrary.add_transformer) in a GDS or OASIS file
+        """
+        library = LayoutLibrary()
+        library.add_transformer(self, "transformer", style, sides)
+        library.write(file)
+
     def get_model(self):
-        primary = Inductor(
-            self.dim["lp.d_i"],
-            self.dim["lp.n_turn"],
-            self.dim["lp.width"],
-            self.dim["lp.gap"],
+        if self.sym:
+            for key in ("d_i", "n_turn", "width", "gap"):
+                self.dim["ls." + key] = self.dim["lp." + key]
+        dim = self.dim
+        self.model["lp"] = inductor_model(
+            dim["lp.d_i"], dim["lp.n_turn"], dim["lp.width"], dim["lp.gap"]
         )
-        self.model["lp"] = primary.model["ind"]
         if self.sym:
-            self.model["ls"] = primary.model["ind"]
+            self.model["ls"] = self.model["lp"]
         else:
-            secondary = Inductor(
-                self.dim["ls.d_i"],
-                self.dim["ls.n_turn"],
-                self.dim["ls.width"],
-                self.dim["ls.gap"],
+            self.model["ls"] = inductor_model(
+                dim["ls.d_i"], dim["ls.n_turn"], dim["ls.width"], dim["ls.gap"]
             )
-            self.model["ls"] = secondary.model["ind"]
         self.model["rp"] = self.r_geo(True)
         self.model["rs"] = self.r_geo(False)
         self.model["cm"] = self.cc_geo(True)
@@ -71,34 +105,27 @@ class Transformer(lmp.LumpedElement):
         """
         dim = self.dim
         if _mutual:
-            dist = float(self.dim["h_mut"])
-            d_i = np.max([dim["lp.d_i"], dim["ls.d_i"]])
-            d_o = np.min(
-                [
-                    d_i + dim["lp.n_turn"] * dim["lp.width"],
-                    d_i + dim["ls.n_turn"] * dim["ls.width"],
-                ]
+            dist = self.dim["h_mut"]
+            d_i = np.maximum(dim["lp.d_i"], dim["ls.d_i"])
+            d_o = np.minimum(
+                d_i + dim["lp.n_turn"] * dim["lp.width"],
+                d_i + dim["ls.n_turn"] * dim["ls.width"],
             )
         else:
-            dist = float(self.dim["h_gnd"])
-            d_i = np.min([dim["ls.d_i"], dim["lp.d_i"]])
-            d_o = np.max(
-                [
-                    d_i + dim["lp.n_turn"] * dim["lp.width"],
-                    d_i + dim["ls.n_turn"] * dim["ls.width"],
-                ]
+            dist = self.dim["h_gnd"]
+            d_i = np.minimum(dim["ls.d_i"], dim["lp.d_i"])
+            d_o = np.maximum(
+                d_i + dim["lp.n_turn"] * dim["lp.width"],
+                d_i + dim["ls.n_turn"] * dim["ls.width"],
             )
-        eps_r = float(self.const["eps_r"])
         area = 4 * (d_o**2 - d_i**2) * (1 + 2 * np.sqrt(2))
-        cap = lmp.Capacitor(area, dist, eps_r)
-        return np.abs(cap.model["cap"])
+        return np.abs(capacitor_model(area, dist, self.const["eps_r"]))
 
     def r_geo(self, _of_primary=True):
         """
         return the value of the resistance of the described transformer
         """
-        geo = "lp." if _of_primary else "lp."
-        rho = self.const["rho"]
+        geo = "lp." if _of_primary else "ls."
         n_t = self.dim[geo + "n_turn"]
         l_tot = (
             8
@@ -110,8 +137,7 @@ class Transformer(lmp.LumpedElement):
                 + (n_t - 1) * (self.dim[geo + "width"] + self.dim[geo + "gap"])
             )
         )
-        r_dc = lmp.Resistor(self.dim[geo + "width"], l_tot, rho)
-        return r_dc.model["res"]
+        return resistor_model(self.dim[geo + "width"], l_tot, self.const["rho"])
 
     def k_geo(self):
         """
@@ -125,6 +151,6 @@ class Transformer(lmp.LumpedElement):
         d2 = dim["ls.d_i"]
         return (
             0.99
-            * (np.max([d1, d2]) - np.min([c1 + d1, c2 + d2]))
-            / (np.max([c1 + d1, c2 + d2]) - np.min([d1, d2]))
+            * (np.maximum(d1, d2) - np.minimum(c1 + d1, c2 + d2))
+            / (np.maximum(c1 + d1, c2 + d2) - np.minimum(d1, d2))
         )
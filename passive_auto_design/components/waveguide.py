@@ -1,14 +1,17 @@
 """
 
 """
+import functools
 import numpy as np
-from scipy.optimize import minimize_scalar
 from ..units.constants import u0, eps0, c0, Nm_to_dBcm, eta0
 
 
 class Waveguide:
     """
-    Create an SIW object with a given geometry
+    Create an SIW object with a given geometry.
+    Height, width, cut-off frequency and the substrate properties may be numpy arrays:
+    all the calc_* methods then broadcast them against the frequency argument
+    (e.g. use freq[:, None] to get a (n_freq x n_geometry) result).
     """
 
     def __init__(self, _metal, _diel, _height):
@@ -17,13 +20,19 @@ class Waveguide:
         self.width = 0.0
         self.first_cut_off = 0.0
         self.height = _height
-        self.eta = np.sqrt(u0 / (self.diel.epsilon * eps0))
+
+    @property
+    def eta(self):
+        return np.sqrt(u0 / (self.diel.epsilon * eps0))
 
     @property
     def width(self) -> float:
-        if self.f_c <= 0.0:
+        f_c = np.asarray(self.f_c)
+        if np.all(f_c <= 0.0):
             return self._w
-        self._w = c0 / (self.f_c * 2 * np.sqrt(self.diel.epsilon))
+        with np.errstate(divide="ignore"):
+            w = c0 / (f_c * 2 * np.sqrt(self.diel.epsilon))
+        self._w = np.where(f_c > 0.0, w, self._w)[()]
         return self._w
 
     @width.setter
@@ -107,7 +116,7 @@ class Waveguide:
         rho = self.metal.rho
         skin_d = 1 / np.sqrt(rho * np.pi * _freq * u0)
         rough = self.diel.roughness
-        if rough <= 0:
+        if np.any(np.asarray(rough) <= 0):
             raise ValueError(
                 "Roughness must be above zero. \
 Value can be set through /self.diel.roughness/"
@@ -120,7 +129,7 @@ Value can be set through /self.diel.roughness/"
         at the _freq frequency (in GHz) and for a maximum electric field _e_0 (in V/m)
         """
         width = self.width
-        if width <= 0.0:
+        if np.any(np.asarray(width) <= 0.0):
             raise ValueError(
                 "Width must be above zero. \
 Value can be set using set_width() or set_f_c()"
@@ -182,11 +191,14 @@ class AF_SIW(Waveguide):
 
     @property
     def width(self) -> float:
-        if self.f_c > 0:
+        f_c = np.asarray(self.f_c)
+        if np.any(f_c > 0):
             slb = self.slab
             sqr_eps = np.sqrt(self.diel.epsilon)
-            tan = np.tan(2 * slb * np.pi * self.f_c / c0) * sqr_eps
-            self._w = 2 * slb + np.arctan(1 / tan) * c0 / (sqr_eps * np.pi * self.f_c)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                tan = np.tan(2 * slb * np.pi * f_c / c0) * sqr_eps
+                w = 2 * slb + np.arctan(1 / tan) * c0 / (sqr_eps * np.pi * f_c)
+            self._w = np.where(f_c > 0, w, self._w)[()]
         return self._w
 
     @width.setter
@@ -202,13 +214,13 @@ class AF_SIW(Waveguide):
 
     @slab.setter
     def slab(self, _s: float):
-        if _s <= 0:
+        if np.any(np.asarray(_s) <= 0):
             raise ValueError("Slab must be above zero. Please use Waveguide class")
         self._slab = _s
 
     @property
     def first_cut_off(self) -> float:
-        if self.width > 0:
+        if np.all(np.asarray(self.width) > 0):
             self.f_c = self.f_cut_off(1, 0)
         return self.f_c
 
@@ -225,34 +237,12 @@ class AF_SIW(Waveguide):
         """
         if _n > 0:
             raise ValueError("Value of _n greater than 0 are not supported")
-        if _m % 2 == 1:
-            res = minimize_scalar(self.__odd_fc)
+        slb, wth, eps = self._slab, self._w, self.diel.epsilon
+        if np.ndim(slb) == 0 and np.ndim(wth) == 0 and np.ndim(eps) == 0:
+            f_c, _ = _cached_cut_off(float(slb), float(wth), float(eps), _m)
         else:
-            f_c = self.f_c
-            res = minimize_scalar(
-                self.__even_fc, bounds=(1.5 * f_c, 5 * f_c), method="bounded"
-            )
-        return res.x
-
-    def __odd_fc(self, _fc):
-        if _fc <= 0:  # frequency must be strictly positive
-            return 1e12
-        slb = self._slab
-        wth = self._w
-        sqr_eps = np.sqrt(self.diel.epsilon)
-        return np.abs(
-            sqr_eps * np.tan(2 * np.pi * _fc * slb / c0)
-            - 1 / np.tan(sqr_eps * np.pi * _fc * (wth - 2 * slb) / c0)
-        )
-
-    def __even_fc(self, _fc):
-        slb = self._slab
-        wth = self._w
-        sqr_eps = np.sqrt(self.diel.epsilon)
-        return np.abs(
-            sqr_eps * np.tan(2 * np.pi * _fc * slb / c0)
-            + np.tan(sqr_eps * np.pi * _fc * (wth - 2 * slb) / c0)
-        )
+            f_c, _ = af_siw_cut_off(slb, wth, eps, _m)
+        return f_c
 
     def calc_a_d(self, _freq):
         return 0
@@ -269,3 +259,66 @@ class AF_SIW(Waveguide):
         """
         fc_20 = self.f_cut_off(2, 0)
         return f"Width: {self.width * 1e3:.2f} mm\tfc20: {fc_20 * 1e-9:.2f} GHz"
+
+
+def af_siw_cut_off(_slab, _width, _epsilon, _m=1, _xtol=1e-12, _maxiter=100):
+    """
+    return the cut-off frequency of the TE_m0 mode of AF-SIWs, and whether it converged.
+
+    The slab thickness, width and permittivity can be arrays, all the combinations
+    are solved at once. The transverse resonance residual is strictly increasing
+    between two of its poles, so each mode is bracketed analytically by two
+    consecutive poles and solved by bisection on the signed residual.
+    Odd modes are the roots of sqrt(eps).tan(2.pi.f.s/c0) = cot(sqrt(eps).pi.f.(w-2s)/c0),
+    even modes of sqrt(eps).tan(2.pi.f.s/c0) = -tan(sqrt(eps).pi.f.(w-2s)/c0).
+    """
+    slb, wth, sqr_eps = np.broadcast_arrays(
+        np.asarray(_slab, dtype=float),
+        np.asarray(_width, dtype=float),
+        np.sqrt(np.asarray(_epsilon, dtype=float)),
+    )
+    odd = _m % 2 == 1
+    # rank of the bracketing interval (the first even one holds the trivial root 0)
+    rank = (_m - 1) // 2 if odd else _m // 2
+    center = (wth - 2 * slb)[..., None]
+    j = np.arange(rank + 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_slab = c0 * (1 + 2 * j) / (4 * slb[..., None])
+        if odd:
+            p_center = c0 * (1 + j) / (sqr_eps[..., None] * center)
+        else:
+            p_center = c0 * (1 + 2 * j) / (2 * sqr_eps[..., None] * center)
+        poles = np.sort(np.concatenate((p_slab, p_center), axis=-1), axis=-1)
+        # coincident poles of the two terms make a single pole
+        dup = np.diff(poles, axis=-1) <= 1e-12 * poles[..., 1:]
+        poles[..., 1:][dup] = np.inf
+        poles = np.sort(poles, axis=-1)
+    low = poles[..., rank - 1] if rank > 0 else np.zeros(slb.shape)
+    high = poles[..., rank]
+    center = center[..., 0]
+
+    def residual(f):
+        tan_s = sqr_eps * np.tan(2 * np.pi * f * slb / c0)
+        tan_c = np.tan(sqr_eps * np.pi * f * center / c0)
+        return tan_s - 1 / tan_c if odd else tan_s + tan_c
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(_maxiter):
+            mid = (low + high) / 2
+            done = high - low <= _xtol * high
+            if np.all(done | ~np.isfinite(mid)):
+                break
+            pos = residual(mid) > 0
+            high = np.where(pos, mid, high)
+            low = np.where(pos, low, mid)
+        converged = (high - low <= _xtol * high) & (center > 0) & np.isfinite(mid)
+    f_c = np.where(converged, (low + high) / 2, np.nan)
+    return f_c[()], converged[()]
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_cut_off(_slab, _width, _epsilon, _m):
+    """
+    memoized af_siw_cut_off for scalar geometries.
+    """
+    return af_siw_cut_off(_slab, _width, _epsilon, _m)
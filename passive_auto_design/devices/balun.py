@@ -2,7 +2,6 @@
     Class to calculate the inductors values of an impedance transformer.
 """
 import numpy as np
-from scipy.optimize import minimize
 from ..special import quality_f
 from ..units.unit import Frequency, Impedance
 
@@ -26,23 +25,25 @@ class Balun:
         """
         design an impedance transformer
         with the targeted specifications (f_targ, zl_targ, zs_targ, k)
-        return the two ideal transformers solution
+        return the two ideal transformers solution.
+        The targets may be arrays (broadcast together), the inductances then have
+        the shape (2, *targets_shape), the first axis being the solution.
+        XL_add and XS_add are the reactances added to the load and source
+        for each solution (first axis of length 2).
         """
-        k = self.k
+        ndim = len(self.shape)
+        k = np.asarray(self.k)
         alpha = (1 - k**2) / k**2
-        q_s = -quality_f(self.z_src + 1j * np.array(XS_add))
-        q_l = -quality_f(self.z_ld + 1j * np.array(XL_add))
+        q_s = -quality_f(self.z_src + 1j * _per_solution(XS_add, ndim))
+        q_l = -quality_f(self.z_ld + 1j * _per_solution(XL_add, ndim))
         # assuming perfect inductor for first calculation
         r_l1, r_l2 = r_serie
         q_s_prime = q_s * np.real(self.z_src) / (np.real(self.z_src) + r_l1)
         q_l_prime = q_l * np.real(self.z_ld) / (np.real(self.z_ld) + r_l2)
         b_coeff = 2 * alpha * q_s_prime + q_s_prime + q_l_prime
         discr = b_coeff**2 - 4 * alpha * (alpha + 1) * (1 + q_s_prime**2)
-        z_sol = np.array(
-            (
-                (b_coeff[0] + np.sqrt(discr[0])) / (2 * (alpha + 1)),
-                (b_coeff[1] - np.sqrt(discr[1])) / (2 * (alpha + 1)),
-            )
+        z_sol = (b_coeff + _per_solution((1, -1), ndim) * np.sqrt(discr)) / (
+            2 * (alpha + 1)
         )
         qxl1 = z_sol / (1 - k**2)
         qxl2 = z_sol * (1 + q_l_prime**2) / (alpha * (1 + (q_s_prime - z_sol) ** 2))
@@ -50,41 +51,102 @@ class Balun:
         l_sol2 = qxl2 * np.real(self.z_ld) / (2 * np.pi * self.f_c)
         return l_sol1, l_sol2
 
-    def __enforce_symmetrical(self, _X_val, _of_load=True, sol=0):
+    @property
+    def shape(self):
         """
-        return the 'distance' to a symmetrical balun (ie. primary = secondary)
-        if _of_load, altering the load reactance
-        else altering the source reactance
+        return the shape of the targets
         """
-        X_add = ((1 - sol) * _X_val, sol * _X_val)
-        if _of_load:
-            l1, l2 = self.design(XL_add=X_add)
-        else:
-            l1, l2 = self.design(XS_add=X_add)
-        return float(np.abs(l1[sol] - l2[sol])[0])
+        return np.broadcast_shapes(
+            *(np.shape(v) for v in (self.f_c, self.z_src, self.z_ld, self.k))
+        )
 
     def enforce_symmetrical(self, side="load", _verbose=False):
         """
         return the reactance to be added to the load (if side="load") or the source impedance
         in order to realize a symmetrical balun (ie. primary = secondary)
         the two solution match the two solutions of the design
+        (NaN if the solution cannot be made symmetrical).
+        When several reactances are possible, the smallest one is returned.
         """
-        if side == "load":
-            old_z = self.z_ld
-            _through_load = True
-        else:
-            old_z = self.z_src
-            _through_load = False
-        # TODO : Detect when minimize did not converge
-        res = list((0, 1))
-        for i in (0, 1):
-            t = minimize(
-                self.__enforce_symmetrical,
-                quality_f(old_z),
-                args=(_through_load, i),
-                method="Nelder-Mead",
-            )
-            res[i] = t.x[0]
+        shape = self.shape
+        k, z_src, z_ld = (
+            np.broadcast_to(v, shape).ravel() for v in (self.k, self.z_src, self.z_ld)
+        )
+        alpha = (1 - k**2) / k**2
+        q_s = -quality_f(z_src)
+        q_l = -quality_f(z_ld)
+        # l1 = l2 <=> 1 + (q_s - z)**2 = c * (1 + q_l**2)
+        c_sym = k**2 * np.real(z_ld) / np.real(z_src)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if side == "load":
+                z_sol, q_l = _symmetrical_load(alpha, q_s, c_sym)
+                q_s = q_s[:, None]
+                x_add = -q_l * np.real(z_ld)[:, None] - np.imag(z_ld)[:, None]
+            else:
+                z_sol, q_s = _symmetrical_source(alpha, q_l, c_sym)
+                q_l = q_l[:, None]
+                x_add = -q_s * np.real(z_src)[:, None] - np.imag(z_src)[:, None]
+            # first solution for the positive root of the design equation
+            alpha = alpha[:, None]
+            first = 2 * (alpha + 1) * z_sol >= (2 * alpha + 1) * q_s + q_l
+        valid = np.isfinite(x_add) & (z_sol > 0)
+        res = np.empty((2, len(k)))
+        for sol, branch in enumerate((first, ~first)):
+            dist = np.where(valid & branch, np.abs(x_add), np.inf)
+            best = np.argmin(dist, axis=1)
+            res[sol] = np.take_along_axis(x_add, best[:, None], axis=1)[:, 0]
+            res[sol, np.isinf(np.min(dist, axis=1))] = np.nan
+        res = res.reshape((2,) + shape)
         if _verbose:
-            print(f"X_{side} must be change by {res[0]:5.2f} or {res[1]:5.2f}")
+            print(
+                f"X_{side} must be change by {np.round(res[0], 2)} or {np.round(res[1], 2)}"
+            )
         return res
+
+
+def _per_solution(_x, _ndim):
+    """
+    return _x with its first axis (the solutions) in front of _ndim target axes
+    """
+    x = np.asarray(_x)
+    return x.reshape(x.shape[:1] + (1,) * (_ndim - x.ndim + 1) + x.shape[1:])
+
+
+def _symmetrical_load(alpha, q_s, c_sym):
+    """
+    return the design variables z and the load quality factors making symmetrical baluns.
+    Eliminating q_l from the design equation, z is a root of a polynomial of degree 4,
+    solved for all the targets at once as eigenvalues of companion matrices.
+    """
+    # design equation: q_l = p(z) / z
+    p_2, p_1, p_0 = alpha + 1, -(2 * alpha + 1) * q_s, alpha * (1 + q_s**2)
+    coeff = np.stack(
+        (
+            1 - c_sym * p_2**2,
+            -2 * q_s - 2 * c_sym * p_2 * p_1,
+            q_s**2 + 1 - c_sym * (1 + p_1**2 + 2 * p_2 * p_0),
+            -2 * c_sym * p_1 * p_0,
+            -c_sym * p_0**2,
+        ),
+        axis=-1,
+    )
+    companion = np.zeros(coeff.shape[:1] + (4, 4))
+    companion[:, 0, :] = -coeff[:, 1:] / coeff[:, :1]
+    companion[:, np.arange(1, 4), np.arange(3)] = 1
+    z_sol = np.linalg.eigvals(np.nan_to_num(companion, posinf=0, neginf=0))
+    real = np.abs(np.imag(z_sol)) <= 1e-9 * (1 + np.abs(z_sol))
+    z_sol = np.where(real, np.real(z_sol), np.nan)
+    q_l = (p_2[:, None] * z_sol**2 + p_1[:, None] * z_sol + p_0[:, None]) / z_sol
+    return z_sol, q_l
+
+
+def _symmetrical_source(alpha, q_l, c_sym):
+    """
+    return the design variables z and the source quality factors making symmetrical baluns.
+    With q_s = z + t, the symmetry gives t = +/-sqrt(c * (1 + q_l**2) - 1)
+    and the design equation becomes linear in z.
+    """
+    c_tot = c_sym * (1 + q_l**2)
+    t_sol = np.sqrt(c_tot - 1)[:, None] * np.array((1, -1))
+    z_sol = (alpha * c_tot)[:, None] / (t_sol + q_l[:, None])
+    return z_sol, z_sol + t_sol
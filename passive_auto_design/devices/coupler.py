@@ -1,13 +1,22 @@
 """
 
 """
+import numpy as np
 from numpy import pi, sqrt
+from ..special import ihsr
 from ..units.unit import SI
 
+# S-parameters of the symmetrical 4-port from those of port 1 (S11, S21, S31, S41)
+_SYMMETRY = np.array([[0, 1, 2, 3], [1, 0, 3, 2], [2, 3, 0, 1], [3, 2, 1, 0]])
+
 
 class Coupler:
     """
-    Create a coupler object
+    Create a coupler object: lumped quadrature coupler made of two inductors l of
+    coupling k, capacitors cm between the facing ends of the inductors and cg from
+    each end to the ground.
+    Ports: 1 input, 2 through (other end of the same inductor), 3 coupled (facing 1)
+    and 4 isolated. _fc, _zc and _k may be arrays (broadcast together).
     """
 
     def __init__(self, _fc=1e9, _zc=50, _k=0.707):
@@ -16,6 +25,9 @@ class Coupler:
         self.k = _k
         self.l = self.z_c / (2 * pi * self.f_c * sqrt(1 - self.k**2))
         self.c = self.l / self.z_c**2
+        # the even and odd modes have the same phase when cm / cg = k / (1 - k)
+        self.c_m = self.k * self.c
+        self.c_g = (1 - self.k) * self.c
 
     def __str__(self):
         """
@@ -23,3 +35,51 @@ class Coupler:
         """
         message = f"L: {SI(self.l)}H\tC: {SI(self.c)}F"
         return message
+
+    @property
+    def shape(self):
+        """
+        return the shape of the targets
+        """
+        return np.broadcast_shapes(*(np.shape(v) for v in (self.f_c, self.z_c, self.k)))
+
+    def s_param(self, freq, z_ref=None):
+        """
+        return the S-parameters of the couplers at the frequencies freq,
+        of shape (*shape, len(freq), 4, 4), the ports being referenced to z_ref
+        (default: the characteristic impedance z_c).
+        """
+        return np.stack(self.__port_1(freq, z_ref), -1)[..., _SYMMETRY]
+
+    def __port_1(self, freq, z_ref):
+        """
+        return S11, S21, S31 and S41, from the even and odd modes of the coupler
+        """
+        z_ref = np.asarray(self.z_c if z_ref is None else z_ref)[..., None]
+        omega = 2 * pi * np.asarray(freq, dtype=float)
+        l_w, k = np.asarray(self.l)[..., None] * omega, np.asarray(self.k)[..., None]
+        c_g, c_m = (np.asarray(c)[..., None] * omega for c in (self.c_g, self.c_m))
+        modes = []
+        # the even (odd) mode is a pi network of series l (1 + k) (l (1 - k)),
+        # shunt cg (cg + 2 cm) at each end
+        for x_s, b_p in ((l_w * (1 + k), c_g), (l_w * (1 - k), c_g + 2 * c_m)):
+            a_m = 1 - x_s * b_p
+            b_z, c_z = x_s / z_ref, b_p * (2 - x_s * b_p) * z_ref
+            den = 2 * a_m + 1j * (b_z + c_z)
+            modes.append((1j * (b_z - c_z) / den, 2 / den))
+        (g_e, t_e), (g_o, t_o) = modes
+        return (g_e + g_o) / 2, (t_e + t_o) / 2, (g_e - g_o) / 2, (t_e - t_o) / 2
+
+    def response(self, freq, z_ref=None):
+        """
+        return the response of the couplers at the frequencies freq, as a dict of
+        arrays of shape (*shape, len(freq)): the magnitudes in dB of the reflection
+        "s11", transmission "s21", coupling "s31" and isolation "s41",
+        and the IHSR in dB (see special.ihsr).
+        """
+        s_1 = dict(zip(("s11", "s21", "s31", "s41"), self.__port_1(freq, z_ref)))
+        # perfect match and isolation give infinite values in dB
+        with np.errstate(divide="ignore"):
+            res = {k: 20 * np.log10(np.abs(v)) for k, v in s_1.items()}
+        res["ihsr"] = ihsr(s_1["s31"], s_1["s21"])
+        return res
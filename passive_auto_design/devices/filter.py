@@ -1,13 +1,30 @@
 """
-specify a filter mask from a given mask
+specify a filter mask from a given mask, and synthesize the lumped-element
+ladder (low-pass or band-pass) meeting it
 """
+import numpy as np
 from numpy import sqrt
-from math import ceil
+from ..special import abcd_ladder
 from ..units.time import Frequency
 from ..units.physical_dimension import PhysicalDimension
+from ..components.inductor import Inductor, inner_diameter
+from ..components.lumped_element import Capacitor
+from ..units.constants import eps0
+
+KINDS = ("butterworth", "chebyshev")
 
 
 class Filter:
+    """
+    Filter meeting a mask, or a bank of filters meeting arrays of masks.
+
+    The filters are ladders of lumped elements starting with a shunt element.
+    Low-pass by default, band-pass if f_center is given, f_pass and f_stop being then
+    the pass-band and stop-band widths (geometrically symmetric around f_center).
+    Masks of a bank are given as arrays (broadcast together), the filters of
+    different orders being padded with null elements.
+    """
+
     Order: int
 
     def __init__(
@@ -16,17 +33,169 @@ class Filter:
         f_stop: Frequency,
         ripple: PhysicalDimension,
         atten: PhysicalDimension,
+        kind: str = "butterworth",
+        f_center: Frequency = None,
     ):
         """
-        f_pass: pass-band edge frequency
-        f_stop: stop-band edge frequency
+        f_pass: pass-band edge frequency (band-pass: pass-band width)
+        f_stop: stop-band edge frequency (band-pass: stop-band width)
         ripple: maximum ripple in the pass band in dB
         atten: minimum attenuation in the stop band in dB
+        kind: approximation, "butterworth" (maximally flat) or "chebyshev" (equiripple)
+        f_center: center frequency of a band-pass filter
+        """
+        if kind not in KINDS:
+            raise ValueError(f"unknown kind: {kind}, expected one of {KINDS}")
+        self.kind = kind
+        # the masks of the bank, broadcast together
+        masks = [f_pass.lin(), f_stop.lin(), ripple.lin(), ripple.dB(), atten.lin()]
+        if f_center is not None:
+            masks.append(f_center.lin())
+        masks = np.broadcast_arrays(*(mask.value for mask in masks))
+        self.f_pass, f_stop, ripple_lin, ripple_db, a_2 = masks[:5]
+        self.f_center = None if f_center is None else masks[5]
+        epsilon = sqrt(ripple_lin - 1)
+        k1 = epsilon / sqrt(a_2 - 1)
+        k = self.f_pass / f_stop
+        if kind == "butterworth":
+            order = np.log(k1) / np.log(k)
+        else:
+            order = np.arccosh(1 / k1) / np.arccosh(1 / k)
+        order = np.ceil(order).astype(int)
+        self.Order = int(order[0]) if order.size == 1 else order
+        self.order = order
+        self.g, self.g_load = prototype(order, kind, ripple_db)
+        # Butterworth prototypes are normalized at 3 dB, moved to the ripple level
+        self.scale = epsilon ** (1 / order) if kind == "butterworth" else 1.0
+
+    @property
+    def shape(self):
+        """
+        return the shape of the bank
+        """
+        return self.order.shape
+
+    def omega(self, freq):
+        """
+        return the normalized frequencies of the low-pass prototype of each filter
+        (last axis: freq), 1 being the edge of the pass band
+        """
+        w = 2 * np.pi * np.asarray(freq, dtype=float)
+        w_p = 2 * np.pi * self.f_pass[..., None]
+        if self.f_center is None:
+            return w / w_p
+        w_0 = 2 * np.pi * self.f_center[..., None]
+        return (w**2 - w_0**2) / (w * w_p)
+
+    def elements(self, z0=50.0):
+        """
+        return the element values of the filters, in a dict of arrays of shape
+        (*shape, max order), null beyond the order of each filter:
+        - low-pass: "C" the shunt capacitors (even index), "L" the series inductors
+          (odd index);
+        - band-pass: "L" and "C" of the resonators, parallel for the shunt ones
+          (even index), series for the series ones (odd index).
         """
+        g = self.g * np.asarray(self.scale)[..., None]
+        shunt = np.arange(g.shape[-1]) % 2 == 0
+        z_g = np.where(shunt, 1 / z0, z0) * g
+        w_p = 2 * np.pi * self.f_pass[..., None]
+        if self.f_center is None:
+            return {
+                "C": np.where(shunt, z_g / w_p, 0),
+                "L": np.where(shunt, 0, z_g / w_p),
+            }
+        w_0 = 2 * np.pi * self.f_center[..., None]
+        with np.errstate(divide="ignore"):
+            resonant = np.where(g > 0, 1 / (w_0**2 * z_g / w_p), 0)
+        return {
+            "C": np.where(shunt, z_g / w_p, resonant),
+            "L": np.where(shunt, resonant, z_g / w_p),
+        }
+
+    def z_load(self, z0=50.0):
+        """
+        return the load resistance of the filters
+        """
+        # g_load is a resistance after a shunt element, a conductance after a series one
+        return np.where(self.order % 2 == 1, z0 * self.g_load, z0 / self.g_load)
+
+    def response(self, freq, z0=50.0):
+        """
+        return the transmission and reflection coefficients (s21, s11) of the filters
+        between z0 and their load, as complex arrays of shape (*shape, len(freq)).
+        """
+        g = self.g * np.asarray(self.scale)[..., None]
+        if g.shape[-1] % 2:
+            g = np.concatenate((g, np.zeros(g.shape[:-1] + (1,))), axis=-1)
+        omega = self.omega(freq)
+        n_freq = omega.shape[-1]
+        g, omega = g.reshape(-1, g.shape[-1]), omega.reshape(-1, n_freq)
+        r_2 = self.z_load(z0).reshape(-1, 1)
+        s21 = np.empty(omega.shape, dtype=complex)
+        s11 = np.empty(omega.shape, dtype=complex)
+        # by blocks of filters, for the ladders to be computed in cache
+        step = max(2**14 // n_freq, 1)
+        for start in range(0, len(omega), step):
+            rows = slice(start, start + step)
+            abcd = abcd_ladder(g[rows, 0::2] / z0, g[rows, 1::2] * z0, omega[rows])
+            a, b, c, d = (abcd[..., i, j] for i in (0, 1) for j in (0, 1))
+            r_1, r_l = z0, r_2[rows]
+            den = a * r_l + b + c * r_1 * r_l + d * r_1
+            s21[rows] = 2 * np.sqrt(r_1 * r_l) / den
+            s11[rows] = (a * r_l + b - c * r_1 * r_l - d * r_1) / den
+        shape = self.shape + (n_freq,)
+        return s21.reshape(shape), s11.reshape(shape)
+
+    def components(
+        self, z0=50.0, n_turn=2, width=10e-6, gap=3e-6, dist=1e-6, eps_r=4.0
+    ):
+        """
+        return the Inductor and Capacitor models of the elements (see elements),
+        as elements of arrays: the inductors are spirals of n_turn turns of the given
+        width and gap (NaN inner diameter when the inductance is too small),
+        the capacitors plates at dist in a dielectric of permittivity eps_r.
+        """
+        values = self.elements(z0)
+        ind = Inductor.trusted(
+            dim={
+                "d_i": inner_diameter(values["L"], n_turn, width, gap),
+                "n_turn": n_turn,
+                "width": width,
+                "gap": gap,
+            },
+            const={"k_1": 2.25, "k_2": 3.55},
+        )
+        cap = Capacitor.trusted(
+            dim={"area": values["C"] * dist / (eps0 * eps_r), "dist": dist},
+            const={"eps_r": eps_r},
+        )
+        return {"L": ind, "C": cap}
+
 
-        # tchebychev
-        epsilon = sqrt(ripple.lin() - 1)
-        a_2 = atten.lin()
-        k1 = PhysicalDimension(value=epsilon / sqrt(a_2 - 1))
-        k = f_pass.lin() / f_stop.lin()
-        self.Order = ceil(k1.dB() / k.dB())
+def prototype(order, kind="butterworth", ripple=1.0):
+    """
+    return the g-values of the low-pass prototypes of the given orders (array), as
+    an array of shape (*order.shape, max order) null beyond each order, and the
+    normalized loads g_(n+1).
+    ripple is the pass-band ripple of the Chebyshev prototypes, in dB.
+    """
+    order = np.asarray(order)
+    ripple = np.broadcast_to(ripple, order.shape)
+    n = order[..., None].astype(float)
+    k = np.arange(1, np.max(order) + 1)
+    a_k = np.sin((2 * k - 1) * np.pi / (2 * n))
+    valid = k <= n
+    if kind == "butterworth":
+        return np.where(valid, 2 * a_k, 0), np.ones(order.shape)
+    beta = np.log(1 / np.tanh(ripple / (40 / np.log(10))))[..., None]
+    gamma = np.sinh(beta / (2 * n))
+    b_k = gamma**2 + np.sin(k * np.pi / n) ** 2
+    g = np.empty(a_k.shape)
+    g[..., 0] = 2 * a_k[..., 0] / gamma[..., 0]
+    for i in range(1, len(k)):
+        g[..., i] = (
+            4 * a_k[..., i - 1] * a_k[..., i] / (b_k[..., i - 1] * g[..., i - 1])
+        )
+    g_load = np.where(order % 2 == 1, 1.0, 1 / np.tanh(beta[..., 0] / 4) ** 2)
+    return np.where(valid, g, 0), g_load
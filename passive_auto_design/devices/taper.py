@@ -2,8 +2,6 @@
 This module give function to ease the design of RF-tapper
 """
 import numpy as np
-from scipy.special import i1
-from scipy.integrate import quad
 from passive_auto_design.special import gamma
 from passive_auto_design.units.physical_dimension import PhysicalDimension
 
@@ -30,24 +28,36 @@ def klopfenstein_taper(_z_start, _z_stop, _n_step, _rhomax=0.01):
     n_mid = int(np.floor(_n_step / 2))
     a_coeff = np.arccosh(rho0.value / _rhomax)
     ln_z = np.zeros((_n_step,))
-    for i in range(1, n_mid + 1):
-        ln_z[i + n_mid] = z_mid + _rhomax * (
-            1 + a_coeff**2 * __phi(a_coeff, i / n_mid)
-        )
-        ln_z[n_mid - i] = z_mid + _rhomax * (
-            1 - a_coeff**2 * __phi(a_coeff, i / n_mid)
-        )
+    phi = __phi(a_coeff, np.arange(1, n_mid + 1) / n_mid)
+    ln_z[n_mid + 1 :] = z_mid + _rhomax * (1 + a_coeff**2 * phi)
+    ln_z[n_mid - 1 :: -1] = z_mid + _rhomax * (1 - a_coeff**2 * phi)
     ln_z[n_mid] = z_mid + _rhomax
     return PhysicalDimension(
         value=np.exp(ln_z, dtype=complex), scale="lin", unit=r"$\Omega$"
     )
 
 
-def __phi(_a_coeff, _y_pos):
-    phi_r = quad(__phase_equation, 0, _y_pos, args=_a_coeff)
-    return phi_r[0]
-
-
-def __phase_equation(x, a):
-    a = np.abs(a)
-    return i1(a * np.sqrt(1 - x**2)) / (a * np.sqrt(1 - x**2))
+def __phi(_a_coeff, _y_pos, _rtol=1e-15, _max_term=200):
+    """
+    return the integral from 0 to _y_pos of I1(a.sqrt(1-x²))/(a.sqrt(1-x²)),
+    for all the positions of the _y_pos array at once.
+    Using the series of I1, the integral is the sum of a_k.b_k with
+    a_k = (a²/4)^k / (k!(k+1)!) and b_k the integral of (1-x²)^k / 2,
+    which follows b_k = (y(1-y²)^k / 2 + 2k.b_(k-1)) / (2k+1).
+    """
+    y_pos = np.asarray(_y_pos, dtype=float)
+    a_2 = np.abs(_a_coeff) ** 2 / 4
+    one_y2 = 1 - y_pos**2
+    pow_y = 0.5 * y_pos
+    a_k = 1.0
+    b_k = pow_y
+    phi_r = a_k * b_k
+    for k in range(1, _max_term):
+        a_k *= a_2 / (k * (k + 1))
+        pow_y = pow_y * one_y2
+        b_k = (pow_y + 2 * k * b_k) / (2 * k + 1)
+        term = a_k * b_k
+        phi_r = phi_r + term
+        if np.all(np.abs(term) <= _rtol * np.abs(phi_r)):
+            break
+    return phi_r
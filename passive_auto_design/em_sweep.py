@@ -0,0 +1,424 @@
+"""
+EM sweeps: layouts of a list of dimensions simulated by an external solver,
+concurrently and with retries, the results being kept in a database
+usable as the fine model of the space mapping
+"""
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import threading
+import zlib
+import numpy as np
+from .components.inductor import Inductor
+from .components.transformer import Transformer
+from .space_mapping import FineModelCache
+from .sweep_store import read_touchstone
+
+DONE, FAILED = "done", "failed"
+# event loop running the sweeps of each process, in its own thread
+_LOOPS = {}
+_LOOPS_LOCK = threading.Lock()
+
+
+def component(dim):
+    """
+    return the Inductor described by dim, or the Transformer if dim holds the
+    dimensions of its windings ("lp.d_i", "ls.width", ...), the other keys being
+    passed to the Transformer (e.g. h_mut). Without any "ls." key, the transformer
+    is symmetrical.
+    """
+    windings, other = {}, {}
+    for key, value in dim.items():
+        side, _, name = key.rpartition(".")
+        if side:
+            windings.setdefault(side, {})[name] = value
+        else:
+            other[key] = value
+    if not windings:
+        return Inductor(**dim)
+    primary = Inductor(**windings["lp"])
+    secondary = Inductor(**windings["ls"]) if "ls" in windings else None
+    return Transformer(primary, secondary, sym=secondary is None, **other)
+
+
+def draw_layout(dim, path):
+    """
+    write the layout of the component described by dim (see component) at path
+    """
+    component(dim).draw(path)
+
+
+def read_result(path):
+    """
+    return the result written by a solver at path: the dict of a JSON file,
+    or the frequencies "freq" and S-parameters "s" of a Touchstone file.
+    """
+    if str(path).endswith(".json"):
+        with open(path) as file:
+            return json.load(file)
+    chunks = list(read_touchstone(path))
+    return {
+        "freq": np.concatenate([c[0] for c in chunks]),
+        "s": np.concatenate([c[1] for c in chunks]),
+    }
+
+
+def stand_in(layout, dim, output, bias=0.05, noise=0.0, seed=0):
+    """
+    analytic stand-in of an EM solver, to run the EM sweeps offline.
+
+    Writes in the JSON file output the model of the component described by the JSON
+    file dim (see component), each value being scaled by 1 + bias and perturbed
+    by a relative gaussian noise of standard deviation noise. The noise only
+    depends on the dimensions and the seed, so that a job always gives the same result.
+    The layout is not read.
+    """
+    with open(dim) as file:
+        dim = json.load(file)
+    model = component(dim).model
+    key = json.dumps(dim, sort_keys=True) + str(seed)
+    rng = np.random.default_rng(zlib.crc32(key.encode()))
+    result = {
+        k: float(v) * (1 + bias) * (1 + noise * rng.standard_normal())
+        for k, v in sorted(model.items())
+    }
+    with open(output, "w") as file:
+        json.dump(result, file)
+
+
+class ResultsDB(FineModelCache):
+    """
+    Results of the EM jobs, in a SQLite database.
+    As a FineModelCache, it can be given as the cache of space_map.
+    The state of each job (done or failed, number of attempts, last error)
+    is also recorded, the results being pickled.
+    """
+
+    def __init__(self, path, digits=9):
+        super().__init__(path, digits)
+        with self.__connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, dim TEXT,"
+                " status TEXT, attempts INTEGER, result BLOB, error TEXT)"
+            )
+
+    def __connect(self):
+        return sqlite3.connect(self.path, timeout=60)
+
+    def __len__(self):
+        with self.__connect() as db:
+            return db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def load(self, dims):
+        """
+        return the result of each set of dimensions (None if not done)
+        """
+        keys = [self.key(dim) for dim in dims]
+        with self.__connect() as db:
+            rows = dict(
+                db.execute(
+                    "SELECT key, result FROM jobs WHERE status = ? AND key IN"
+                    f" ({','.join('?' * len(keys))})",
+                    (DONE, *keys),
+                )
+            )
+        return [pickle.loads(rows[k]) if k in rows else None for k in keys]
+
+    def store(self, dims, results):
+        """
+        save the results of the given dimensions
+        """
+        for dim, res in zip(dims, results):
+            self.record(dim, DONE, result=res)
+
+    def record(self, dim, status, attempts=1, result=None, error=None):
+        """
+        save the state of the job of dim: its status (DONE or FAILED),
+        its number of attempts, its result and its last error
+        """
+        dim = {k: float(v) for k, v in dim.items()}
+        with self.__connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.key(dim),
+                    json.dumps(dim),
+                    status,
+                    attempts,
+                    None if result is None else pickle.dumps(result),
+                    error,
+                ),
+            )
+
+    def status(self, dim):
+        """
+        return the status, number of attempts and last error of the job of dim
+        (None if it was never run)
+        """
+        with self.__connect() as db:
+            return db.execute(
+                "SELECT status, attempts, error FROM jobs WHERE key = ?",
+                (self.key(dim),),
+            ).fetchone()
+
+    def items(self):
+        """
+        return the list of the dimensions and results of the jobs done
+        """
+        with self.__connect() as db:
+            rows = db.execute(
+                "SELECT dim, result FROM jobs WHERE status = ? ORDER BY rowid", (DONE,)
+            ).fetchall()
+        return [(json.loads(dim), pickle.loads(res)) for dim, res in rows]
+
+
+class EMSweep:
+    """
+    Sweep of EM simulations.
+
+    Each set of dimensions is a job: its layout is drawn in its own directory
+    (with its dimensions in dim.json), then simulated by the solver. At most
+    max_jobs solvers run at once, a failed or timed-out job is retried up to
+    retries times, and the state and result of every job are saved in a ResultsDB:
+    jobs already done are never run again.
+
+    Parameters
+    ----------
+    directory : str
+        directory of the jobs and of the results database (results.db).
+    solver : list of str or callable
+        command of the solver, its arguments being formatted with the paths of
+        the job files {layout}, {dim} and {output} and the job {directory};
+        the solver writes its result at {output}. A callable solver (by default
+        the analytic stand_in) is called as solver(layout, dim, output) in a new
+        process, stopped on timeout; it must be picklable.
+    draw : callable
+        draw(dim, path) writes the layout of dim (default: draw_layout).
+    parse : callable
+        parse(path) returns the result written by the solver (default: read_result).
+    output : str
+        name of the file written by the solver in the job directory.
+    max_jobs : int, optional
+        maximum number of concurrent solvers (default: number of CPUs).
+    retries : int
+        number of new attempts of a failed job.
+    timeout : float, optional
+        maximum duration of a solver run, in second.
+
+    """
+
+    def __init__(
+        self,
+        directory,
+        solver=stand_in,
+        draw=draw_layout,
+        parse=read_result,
+        output="result.json",
+        max_jobs=None,
+        retries=2,
+        timeout=None,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.solver, self.draw, self.parse = solver, draw, parse
+        self.output = output
+        self.max_jobs = os.cpu_count() if max_jobs is None else max_jobs
+        self.retries, self.timeout = retries, timeout
+        self.db = ResultsDB(os.path.join(directory, "results.db"))
+
+    def run(self, dims):
+        """
+        run the jobs of dims and return their results, in the same order as dims
+        (None for the jobs failed after all their attempts).
+        The jobs run in an event loop of their own, shared by the calls, so that
+        run can also be called from a running event loop (e.g. a notebook).
+        """
+        future = asyncio.run_coroutine_threadsafe(self.run_async(dims), _event_loop())
+        try:
+            return future.result()
+        except BaseException:
+            # e.g. KeyboardInterrupt: stop the solvers
+            future.cancel()
+            raise
+
+    async def run_async(self, dims):
+        """
+        coroutine of run
+        """
+        results = self.db.load(dims)
+        todo = {}
+        for i, dim in enumerate(dims):
+            if results[i] is None:
+                # identical dimensions are only run once
+                todo.setdefault(self.db.key(dim), []).append(i)
+        if not todo:
+            return results
+        semaphore = asyncio.Semaphore(self.max_jobs)
+        new = await asyncio.gather(
+            *(self.__job(dims[index[0]], semaphore) for index in todo.values())
+        )
+        for index, res in zip(todo.values(), new):
+            for i in index:
+                results[i] = res
+        return results
+
+    async def __job(self, dim, semaphore):
+        key = self.db.key(dim)
+        directory = os.path.join(
+            self.directory, hashlib.sha1(key.encode()).hexdigest()[:16]
+        )
+        os.makedirs(directory, exist_ok=True)
+        paths = {
+            "layout": os.path.join(directory, "layout.gds"),
+            "dim": os.path.join(directory, "dim.json"),
+            "output": os.path.join(directory, self.output),
+            "directory": directory,
+        }
+        with open(paths["dim"], "w") as file:
+            json.dump({k: float(v) for k, v in dim.items()}, file)
+        # drawn in a thread, not to block the other jobs
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.draw, dim, paths["layout"]
+        )
+        error = None
+        for attempt in range(1, self.retries + 2):
+            if os.path.exists(paths["output"]):
+                os.remove(paths["output"])
+            async with semaphore:
+                error = await self.__solve(paths)
+            if error is None:
+                try:
+                    result = self.parse(paths["output"])
+                except Exception as exc:  # pylint: disable=broad-except
+                    error = f"unreadable result: {exc!r}"
+                else:
+                    self.db.record(dim, DONE, attempt, result)
+                    return result
+        self.db.record(dim, FAILED, attempt, error=error)
+        return None
+
+    async def __solve(self, paths):
+        """
+        run the solver on the job files and return the error (None on success)
+        """
+        if callable(self.solver):
+            return await self.__solve_callable(paths)
+        proc = await asyncio.create_subprocess_exec(
+            *(arg.format(**paths) for arg in self.solver),
+            cwd=paths["directory"],
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            return f"timeout after {self.timeout} s"
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        if proc.returncode:
+            return f"exit code {proc.returncode}: {stderr.decode()[-1000:]}"
+        return None
+
+    async def __solve_callable(self, paths):
+        """
+        run the callable solver in a new process, killed on timeout
+        (the workers of a process pool cannot be stopped)
+        """
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        args = [paths[name] for name in ("layout", "dim", "output")]
+        process = multiprocessing.Process(
+            target=_call_solver, args=(sender, self.solver, args)
+        )
+        process.start()
+        sender.close()
+        loop = asyncio.get_running_loop()
+        deadline = None if self.timeout is None else loop.time() + self.timeout
+        try:
+            while process.is_alive():
+                if deadline is not None and loop.time() > deadline:
+                    return f"timeout after {self.timeout} s"
+                await asyncio.sleep(0.02)
+            if receiver.poll():
+                return receiver.recv()
+            return f"exit code {process.exitcode}"
+        finally:
+            if process.is_alive():
+                process.kill()
+            process.join()
+            receiver.close()
+
+    def results(self):
+        """
+        return the list of the dimensions and results of the jobs done
+        """
+        return self.db.items()
+
+    def fine_model(self, perf=None):
+        """
+        return the fine model of the sweep, for space_map: each set of dimensions
+        is looked up in the results database, or run as a new job.
+        perf, if given, is the function returning the performances from a result
+        (by default, the result itself).
+        """
+        return EMModel(self, perf)
+
+
+class EMModel:
+    """
+    Fine model evaluated by the jobs of an EMSweep.
+    Its map method runs a list of dimensions as concurrent jobs of the sweep,
+    it is used by space_map for all the points of an iteration.
+    """
+
+    def __init__(self, sweep, perf=None):
+        self.sweep = sweep
+        self.perf = perf
+
+    def __call__(self, dim):
+        return self.map([dim])[0]
+
+    def map(self, dims):
+        """
+        return the fine model of each set of dimensions
+        """
+        results = self.sweep.run(dims)
+        for dim, result in zip(dims, results):
+            if result is None:
+                status, attempts, error = self.sweep.db.status(dim)
+                raise RuntimeError(
+                    f"EM job {status} after {attempts} attempts: {error}"
+                )
+        if self.perf is None:
+            return results
+        return [self.perf(result) for result in results]
+
+
+def _event_loop():
+    """
+    return the event loop running the sweeps of the process, started on first use
+    """
+    with _LOOPS_LOCK:
+        # a forked process does not inherit the thread of the loop of its parent
+        loop = _LOOPS.get(os.getpid())
+        if loop is None:
+            loop = _LOOPS[os.getpid()] = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+def _call_solver(sender, solver, args):
+    """
+    run a callable solver (in its own process), sending back its error or None
+    """
+    try:
+        solver(*args)
+    except BaseException as exc:  # pylint: disable=broad-except
+        sender.send(repr(exc)[-1000:])
+    else:
+        sender.send(None)
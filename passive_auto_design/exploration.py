@@ -0,0 +1,280 @@
+"""
+Design-space exploration of the transformer geometries with Pareto front extraction
+"""
+from collections import deque
+import numpy as np
+from scipy.stats import qmc
+from .components.inductor import Inductor, outer_diameter
+from .components.transformer import Transformer
+
+OBJECTIVES = ("ind_err", "area", "res", "k_err")
+INDUCTOR_DIM = {"d_i": 100e-6, "n_turn": 1, "width": 3e-6, "gap": 1e-6}
+TRANSFORMER_CONST = {"rho": 0.0, "eps_r": 0.0, "h_mut": 1e-6, "h_gnd": 1e-6}
+
+
+def sample(bounds, n, method="sobol", seed=None, n_axis=10):
+    """
+    return a generator of samples of the design space, by batches of at most n points.
+
+    Parameters
+    ----------
+    bounds : dict
+        (min, max) of each dimension. Dimensions with integer bounds are rounded.
+    n : int
+        number of points of each batch.
+    method : str
+        "grid" (regular grid of n_axis points per axis, generated by batches of n points),
+        "lhs" (each batch is a Latin hypercube) or "sobol" (scrambled Sobol sequence).
+    seed : int, optional
+        seed of the random generator.
+    n_axis : int
+        number of points per axis of the grid (integer dimensions take all their values).
+
+    Yields
+    ------
+    dims : dict
+        the dimensions of the batch, as arrays.
+
+    """
+    keys = tuple(bounds)
+    low = np.array([bounds[k][0] for k in keys], dtype=float)
+    high = np.array([bounds[k][1] for k in keys], dtype=float)
+    discrete = [all(isinstance(b, (int, np.integer)) for b in bounds[k]) for k in keys]
+    if method == "grid":
+        axes = [
+            np.arange(lo, hi + 1) if disc else np.linspace(lo, hi, n_axis)
+            for lo, hi, disc in zip(low, high, discrete)
+        ]
+        shape = tuple(len(a) for a in axes)
+        size = int(np.prod(shape))
+        for start in range(0, size, n):
+            index = np.unravel_index(np.arange(start, min(start + n, size)), shape)
+            yield {k: a[i] for k, a, i in zip(keys, axes, index)}
+        return
+    if method == "lhs":
+        sampler = qmc.LatinHypercube(len(keys), seed=seed)
+    elif method == "sobol":
+        sampler = qmc.Sobol(len(keys), seed=seed)
+    else:
+        raise ValueError(f"unknown sampling method: {method}")
+    while True:
+        unit = sampler.random(n)
+        points = low + unit * (high - low + np.array(discrete))
+        points = np.where(discrete, np.minimum(np.floor(points), high), points)
+        yield {k: points[:, i] for i, k in enumerate(keys)}
+
+
+def evaluate_transformer(dims, target, const=None):
+    """
+    return the objectives of the transformers described by the arrays of dims.
+
+    Parameters
+    ----------
+    dims : dict
+        dimensions of the transformers ("lp.d_i", "ls.width", ...), as arrays.
+        Missing dimensions take the Inductor default value, the secondary takes
+        the dimensions of the primary if none of its dimensions is given.
+    target : dict
+        targeted inductances "lp" and "ls" and coupling "k".
+    const : dict, optional
+        constants of the transformer (rho, eps_r, h_mut, h_gnd).
+
+    Returns
+    -------
+    costs : ndarray
+        objectives of each transformer (one row per transformer, columns as OBJECTIVES):
+        relative inductance error, area, series resistance and coupling error.
+
+    """
+    const = {**TRANSFORMER_CONST, **({} if const is None else const)}
+    sym = not any(k.startswith("ls.") for k in dims)
+    ind = [
+        Inductor(**{k: dims.get(f"{side}.{k}", INDUCTOR_DIM[k]) for k in INDUCTOR_DIM})
+        for side in (("lp",) if sym else ("lp", "ls"))
+    ]
+    transfo = Transformer(ind[0], None if sym else ind[1], sym=sym, **const)
+    model, dim = transfo.model, transfo.dim
+    ind_err = np.abs(model["lp"] / target["lp"] - 1) + np.abs(
+        model["ls"] / target["ls"] - 1
+    )
+    d_o = np.maximum(
+        outer_diameter(dim["lp.d_i"], dim["lp.n_turn"], dim["lp.width"], dim["lp.gap"]),
+        outer_diameter(dim["ls.d_i"], dim["ls.n_turn"], dim["ls.width"], dim["ls.gap"]),
+    )
+    costs = (
+        ind_err,
+        d_o**2,
+        model["rp"] + model["rs"],
+        np.abs(model["k"] - target["k"]),
+    )
+    return np.stack(np.broadcast_arrays(*costs), axis=-1)
+
+
+def non_dominated(costs, block=256):
+    """
+    return the indexes of the non-dominated rows of costs (all objectives minimized).
+    Among identical rows, only the first one is kept.
+    """
+    costs = np.asarray(costs, dtype=float)
+    # in lexicographic order, a row can only be dominated by the previous ones
+    order = np.lexsort(costs.T[::-1])
+    front = np.empty((0, costs.shape[1]))
+    index = []
+    for start in range(0, len(order), block):
+        rows = order[start : start + block]
+        chunk = costs[rows]
+        weak = __weakly_dominates(chunk, chunk)
+        keep = ~np.any(np.triu(weak, 1), axis=0)
+        keep[keep] = ~_weakly_dominated(chunk[keep], front)
+        front = np.concatenate((front, chunk[keep]))
+        index.append(rows[keep])
+    return np.sort(np.concatenate(index)) if index else np.empty(0, dtype=int)
+
+
+def _weakly_dominated(costs, others, chunk=2**20):
+    """
+    return the mask of the rows of costs worse than or equal to a row of others
+    on every objective.
+    """
+    mask = np.zeros(len(costs), dtype=bool)
+    step = max(chunk // max(len(costs), 1), 256)
+    for start in range(0, len(others), step):
+        # only the rows not yet dominated are compared to the next chunk
+        todo = np.flatnonzero(~mask)
+        if len(todo) == 0:
+            break
+        mask[todo] = np.any(
+            __weakly_dominates(others[start : start + step], costs[todo]), axis=0
+        )
+    return mask
+
+
+def __weakly_dominates(costs, others):
+    """
+    return the matrix of the rows of costs (first axis) better than or equal to
+    the rows of others (second axis) on every objective.
+    """
+    # one objective at a time: 2-d comparisons are much faster than a reduction
+    # over a short last axis
+    weak = costs[:, None, 0] <= others[None, :, 0]
+    for i in range(1, costs.shape[1]):
+        weak &= costs[:, None, i] <= others[None, :, i]
+    return weak
+
+
+class ParetoFront:
+    """
+    Pareto front of an exploration, updated incrementally by batches.
+    Only the non-dominated points are stored, so that the memory stays bounded
+    by the size of the front whatever the number of points evaluated.
+    """
+
+    def __init__(self, objectives=OBJECTIVES):
+        self.objectives = tuple(objectives)
+        self.costs = np.empty((0, len(self.objectives)))
+        self.dims = {}
+        self.n_evaluated = 0
+
+    def __len__(self):
+        return len(self.costs)
+
+    def update(self, costs, dims, n_evaluated=None):
+        """
+        merge a batch of points into the front.
+        n_evaluated is the number of points the batch was extracted from (default: its size).
+        """
+        self.n_evaluated += len(costs) if n_evaluated is None else n_evaluated
+        index = non_dominated(costs)
+        costs, dims = costs[index], {k: np.asarray(v)[index] for k, v in dims.items()}
+        if len(self.costs) == 0:
+            self.costs, self.dims = costs, dims
+            return
+        new = ~_weakly_dominated(costs, self.costs)
+        old = ~_weakly_dominated(self.costs, costs[new])
+        self.costs = np.concatenate((self.costs[old], costs[new]))
+        self.dims = {
+            k: np.concatenate((self.dims[k][old], dims[k][new])) for k in self.dims
+        }
+
+
+def __front_of_batch(dims, target, const):
+    costs = evaluate_transformer(dims, target, const)
+    index = non_dominated(costs)
+    return costs[index], {k: v[index] for k, v in dims.items()}, len(costs)
+
+
+def explore(
+    bounds,
+    target,
+    const=None,
+    n=2**17,
+    method="sobol",
+    batch_size=2**13,
+    seed=None,
+    executor=None,
+    front=None,
+):
+    """
+    explore the transformer geometries and return their Pareto front.
+
+    Parameters
+    ----------
+    bounds : dict
+        (min, max) of each explored dimension ("lp.d_i", "lp.n_turn", ...).
+    target : dict
+        targeted inductances "lp" and "ls" and coupling "k",
+        e.g. as returned by balun_target.
+    const : dict, optional
+        constants of the transformer (rho, eps_r, h_mut, h_gnd).
+    n : int
+        number of points to evaluate
+        (for "grid", the number of points per continuous axis is n ** (1 / n_dim)).
+    method : str
+        sampling method, "grid", "lhs" or "sobol" (see sample).
+    batch_size : int
+        number of points evaluated together (a power of 2 for "sobol").
+    seed : int, optional
+        seed of the random sampling.
+    executor : concurrent.futures.Executor, optional
+        if given, the batches are evaluated concurrently through this executor
+        (a ProcessPoolExecutor for CPU-bound runs).
+    front : ParetoFront, optional
+        front to be updated, to continue a previous exploration.
+
+    Returns
+    -------
+    front : ParetoFront
+        the non-dominated points found.
+
+    """
+    front = ParetoFront() if front is None else front
+    n_axis = max(int(n ** (1 / len(bounds)) + 1e-9), 2)
+    batches = sample(bounds, batch_size, method, seed, n_axis)
+    n_batch = -(-n // batch_size) if method != "grid" else None
+    if executor is None:
+        for i, dims in enumerate(batches):
+            if i == n_batch:
+                break
+            front.update(*__front_of_batch(dims, target, const))
+        return front
+    # bounded number of pending batches, to keep the memory bounded
+    pending = deque()
+    n_pending = 2 * getattr(executor, "_max_workers", 1)
+    for i, dims in enumerate(batches):
+        if i == n_batch:
+            break
+        pending.append(executor.submit(__front_of_batch, dims, target, const))
+        if len(pending) >= n_pending:
+            front.update(*pending.popleft().result())
+    while pending:
+        front.update(*pending.popleft().result())
+    return front
+
+
+def balun_target(balun, sol=0):
+    """
+    return the target of the exploration (inductances and coupling)
+    for the solution sol of the design of a Balun.
+    """
+    l_1, l_2 = balun.design()
+    return {"lp": float(l_1[sol]), "ls": float(l_2[sol]), "k": balun.k}
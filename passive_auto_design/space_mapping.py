@@ -1,11 +1,159 @@
 """
 Implementation of an aggressive space mapping algorithm for RF-design
 """
-import functools
-from scipy.optimize import minimize
+import shelve
+import numpy as np
+from scipy.optimize import minimize, differential_evolution
 
 
-def space_map(coarse_model, dim0, fine_model, par0, goal, maxiter=5):
+class GoalSpec:
+    """
+    Goals compiled into arrays of targets, interval bounds and weights,
+    to evaluate the cost of a whole population of performances in one call.
+
+    A goal given as a single value is a point, a goal given as a tuple (min, max)
+    is an interval: its error is null inside and grows linearly outside.
+    """
+
+    def __init__(self, goal, weight=None):
+        self.keys = tuple(goal)
+        bounds = [goal[k] if isinstance(goal[k], tuple) else (goal[k],) for k in goal]
+        self.low = np.array([b[0] for b in bounds], dtype=float)
+        self.high = np.array([b[-1] for b in bounds], dtype=float)
+        self.interval = np.array([len(b) == 2 for b in bounds])
+        self.norm_low = np.where(self.low != 0, np.abs(self.low), 1)
+        self.norm_high = np.where(self.high != 0, np.abs(self.high), 1)
+        if weight is None:
+            self.weight = np.ones(len(bounds))
+        elif isinstance(weight, dict):
+            self.weight = np.array([weight[k] for k in self.keys], dtype=float)
+        else:
+            self.weight = np.asarray(weight, dtype=float)
+        self.__goals = [goal[k] for k in self.keys]
+        self.__weights = self.weight.tolist()
+
+    def cost(self, perf):
+        """
+        return the normalized cost of the performances.
+
+        Parameters
+        ----------
+        perf : dict or array_like
+            performances achieved, as a dict of values (or of arrays for a population)
+            with the keys of the goal, or as an array with the goals on the last axis.
+
+        Returns
+        -------
+        cost : float or ndarray
+            cost value, one per individual of the population.
+
+        """
+        if isinstance(perf, dict):
+            values = [perf[k] for k in self.keys]
+            if not any(isinstance(v, np.ndarray) for v in values):
+                # single set of scalar performances: plain python is faster
+                return cost_calc(values, self.__goals, self.__weights)
+            perf = np.stack([np.asarray(v, dtype=float) for v in values], -1)
+        below = np.maximum((self.low - perf) / self.norm_low, 0)
+        above = np.maximum((perf - self.high) / self.norm_high, 0)
+        err = np.where(self.interval, below + above, (perf - self.low) / self.norm_low)
+        return np.sum(self.weight * err**2, axis=-1)
+
+
+class FineModelCache:
+    """
+    Persistent (on-disk) cache of the fine model evaluations.
+    Results are keyed by the dimensions rounded to a given number of significant digits,
+    so that re-runs and restarts of space_map never repeat a fine evaluation.
+    The results must be picklable.
+    """
+
+    def __init__(self, path, digits=9):
+        self.path = path
+        self.digits = digits
+
+    def key(self, dim):
+        """
+        return the key associated to a set of dimensions
+        """
+        return ";".join(f"{k}={float(dim[k]):.{self.digits - 1}e}" for k in sorted(dim))
+
+    def load(self, dims):
+        """
+        return the cached result of each set of dimensions (None if not cached)
+        """
+        with shelve.open(self.path) as db:
+            return [db.get(self.key(dim)) for dim in dims]
+
+    def store(self, dims, results):
+        """
+        save the results of the fine model for the given dimensions
+        """
+        with shelve.open(self.path) as db:
+            for dim, res in zip(dims, results):
+                db[self.key(dim)] = res
+
+
+def evaluate_fine(fine_model, dims, executor=None, cache=None):
+    """
+    Evaluate the fine model for a list of dimensions.
+
+    Parameters
+    ----------
+    fine_model : fun
+        function evaluating the fine model goals for a set of dimensions (dim).
+        If it has a map method (e.g. em_sweep.EMModel), fine_model.map(dims)
+        evaluates the whole list at once, instead of the executor.
+    dims : list of dict
+        dimensions to be evaluated
+    executor : concurrent.futures.Executor, optional
+        if given, the evaluations are run concurrently through this executor
+        (with a process pool, fine_model must be picklable).
+    cache : FineModelCache, optional
+        if given, dimensions already evaluated are read from the cache
+        and new results are saved into it.
+
+    Returns
+    -------
+    list of dict
+        the fine model results, in the same order as dims.
+
+    """
+    results = [None] * len(dims) if cache is None else cache.load(dims)
+    todo = {}
+    for i, dim in enumerate(dims):
+        if results[i] is None:
+            # identical dimensions are only evaluated once
+            key = tuple(sorted(dim.items()))
+            todo.setdefault(key, []).append(i)
+    new_dims = [dims[index[0]] for index in todo.values()]
+    if hasattr(fine_model, "map"):
+        new_res = list(fine_model.map(new_dims)) if new_dims else []
+    else:
+        mapper = map if executor is None else executor.map
+        new_res = list(mapper(fine_model, new_dims))
+    for index, res in zip(todo.values(), new_res):
+        for i in index:
+            results[i] = res
+    if cache is not None and new_dims:
+        cache.store(new_dims, new_res)
+    return results
+
+
+def space_map(
+    coarse_model,
+    dim0,
+    fine_model,
+    par0,
+    goal,
+    maxiter=5,
+    executor=None,
+    cache=None,
+    fd_step=None,
+    dim_bounds=None,
+    vectorized=False,
+    tol=None,
+):
     """
     Optimization function for space mapping algorithm.
 
@@ -18,13 +166,33 @@ def space_map(coarse_model, dim0, fine_model, par0, goal, maxiter=5):
         initial dimensions of the component
     fine_model : fun
         function evaluating the fine model goals
-        for a set of dimensions (dim)
+        for a set of dimensions (dim), or a list of them (see evaluate_fine)
     par0 : dict
         initial parameters of the component coarse model
     goal : dict
         set of goal targeted by the algorithm
     maxiter : int, optional
         maximal number of iteration. The default is 5.
+    executor : concurrent.futures.Executor, optional
+        executor used to run the fine model evaluations concurrently.
+    cache : FineModelCache or str, optional
+        cache (or path of the cache file) of the fine model evaluations.
+    fd_step : float, optional
+        if given, the fine model is also evaluated at finite-difference neighbours
+        of each point (relative step fd_step on each dimension), all the
+        evaluations being run concurrently. The coarse model parameters are then
+        fitted on all these points (multi-point parameter extraction).
+    dim_bounds : dict, optional
+        (min, max) of each dimension. If given, the coarse model optimization is done
+        by differential evolution within these bounds, instead of a local search.
+    vectorized : bool, optional
+        if True, coarse_model accepts dimensions given as arrays (one value per
+        candidate) and the whole population of the differential evolution
+        is evaluated in one call.
+    tol : float, optional
+        if given, stop as soon as the normalized error on the goals (square root
+        of the cost) is below tol, or when the relative change of the dimensions
+        is below tol.
 
     Returns
     -------
@@ -36,44 +204,210 @@ def space_map(coarse_model, dim0, fine_model, par0, goal, maxiter=5):
         achieved goal.
 
     """
+    if isinstance(cache, str):
+        cache = FineModelCache(cache)
+    goal_spec = GoalSpec(goal)
     dim = dim0
     par = par0
     achieved_goal = goal
     for i in range(maxiter):
         # evaluate exact value using fine model
-        achieved_goal = fine_model(dim)
+        dims = [dim] + __neighbours(dim, fd_step)
+        fine_mods = evaluate_fine(fine_model, dims, executor, cache)
+        achieved_goal = fine_mods[0]
+        if tol is not None and np.sqrt(goal_spec.cost(achieved_goal)) <= tol:
+            break
         # alter coarse model parameters to better match fine model results
         res = minimize(
             __refresh_coarse,
             __totuple(par),
             method="L-BFGS-B",
-            args=(par0.keys(), dim, coarse_model, achieved_goal),
+            args=(par0.keys(), dims, coarse_model, [GoalSpec(f) for f in fine_mods]),
         )
         par = __todict(par0.keys(), res.x)
         # find best solution according to coarse model
+        args = (dim0.keys(), par, coarse_model, goal_spec)
+        if dim_bounds is None:
+            res = minimize(__cost_coarse, __totuple(dim), method="Powell", args=args)
+        else:
+            bounds = np.array([dim_bounds[key] for key in dim0], dtype=float)
+            res = differential_evolution(
+                __cost_coarse,
+                bounds,
+                args=args,
+                x0=np.clip(__totuple(dim), bounds[:, 0], bounds[:, 1]),
+                seed=i,
+                vectorized=vectorized,
+                updating="deferred" if vectorized else "immediate",
+            )
+        x_0 = np.array(__totuple(dim), dtype=float)
+        dim = __todict(dim0.keys(), res.x)
+        if tol is not None:
+            # relative step, absolute for the null dimensions
+            scale = np.where(x_0 != 0, np.abs(x_0), 1)
+            if np.max(np.abs(res.x - x_0) / scale) <= tol:
+                break
+    return dim, par, achieved_goal
+
+
+def aggressive_space_map(
+    coarse_model,
+    dim0,
+    fine_model,
+    par,
+    goal,
+    maxiter=10,
+    tol=1e-6,
+    trust_radius=0.5,
+    executor=None,
+    cache=None,
+):
+    """
+    Aggressive space mapping: the coarse model is kept fixed, and the mapping between
+    the fine and coarse dimensions is updated with Broyden's formula.
+
+    Starting from the coarse model optimum x_c*, each iteration evaluates the fine
+    model at x_f, extracts the coarse dimensions x_c giving the same response
+    (warm-started from the previous extraction), and moves x_f by a quasi-Newton step
+    on f = x_c - x_c*, limited to a trust region. The trust region is enlarged when
+    the mapping error decreases and shrunk otherwise.
+
+    Parameters
+    ----------
+    coarse_model : fun
+        function evaluating the coarse model goals
+        for a set of dimensions (dim) and parameters (par)
+    dim0 : dict
+        initial dimensions of the component
+    fine_model : fun
+        function evaluating the fine model goals
+        for a set of dimensions (dim)
+    par : dict
+        parameters of the component coarse model
+    goal : dict
+        set of goal targeted by the algorithm
+    maxiter : int, optional
+        maximal number of fine model evaluations. The default is 10.
+    tol : float, optional
+        stop when the normalized error on the goals (square root of the cost),
+        the relative mapping error or the relative step is below tol.
+        The default is 1e-6.
+    trust_radius : float, optional
+        initial maximal relative step of the dimensions. The default is 0.5.
+    executor : concurrent.futures.Executor, optional
+        executor used to run the fine model evaluations.
+    cache : FineModelCache or str, optional
+        cache (or path of the cache file) of the fine model evaluations.
+
+    Returns
+    -------
+    dim : dict
+        best dimensions of the component found with the fine model.
+    par : dict
+        parameters of the component model (unchanged).
+    fine_mod : dict
+        goal achieved with these dimensions.
+
+    """
+    if isinstance(cache, str):
+        cache = FineModelCache(cache)
+    keys = dim0.keys()
+    goal_spec = GoalSpec(goal)
+    options = {"xtol": tol / 100, "ftol": (tol / 100) ** 2}
+    # the coarse optimizations are done on dimensions normalized by dim0
+    x_0 = np.asarray(__totuple(dim0), dtype=float)
+    scale_0 = np.where(x_0 != 0, np.abs(x_0), 1)
+    res = minimize(
+        __scaled_cost,
+        x_0 / scale_0,
+        method="Powell",
+        args=(scale_0, keys, par, coarse_model, goal_spec),
+        options=options,
+    )
+    x_star = res.x * scale_0
+    # the mapping is expressed on dimensions normalized by the coarse optimum
+    scale = np.where(x_star != 0, np.abs(x_star), 1)
+    x_f = x_star.copy()
+    x_c = x_star.copy()
+    jac = np.eye(x_star.size)
+    best = (np.inf, x_f, None)
+    f_prev = h = None
+    for _ in range(maxiter):
+        dim = __todict(keys, x_f)
+        fine_mod = evaluate_fine(fine_model, [dim], executor, cache)[0]
+        cost = goal_spec.cost(fine_mod)
+        if cost < best[0]:
+            best = (cost, x_f, fine_mod)
+        if np.sqrt(cost) <= tol:
+            break
+        # parameter extraction: coarse dimensions matching the fine response
         res = minimize(
-            __cost_coarse,
-            __totuple(dim),
+            __scaled_cost,
+            x_c / scale,
             method="Powell",
-            args=(dim0.keys(), par, coarse_model, goal),
+            args=(scale, keys, par, coarse_model, GoalSpec(fine_mod)),
+            options=options,
         )
-        dim = __todict(dim0.keys(), res.x)
-    return dim, par, achieved_goal
+        x_c = res.x * scale
+        if np.any(goal_spec.interval):
+            # with interval goals the coarse optimum is not unique:
+            # target the coarse optimum closest to the extracted dimensions
+            res = minimize(
+                __scaled_cost,
+                x_c / scale,
+                method="Powell",
+                args=(scale, keys, par, coarse_model, goal_spec),
+                options=options,
+            )
+            x_star = res.x * scale
+        f = (x_c - x_star) / scale
+        if np.linalg.norm(f, np.inf) <= tol:
+            break
+        if f_prev is not None:
+            # Broyden rank-one update of the mapping jacobian
+            jac += np.outer(f - f_prev - jac @ h, h) / (h @ h)
+            if np.linalg.norm(f) < np.linalg.norm(f_prev):
+                trust_radius *= 2
+            else:
+                trust_radius /= 2
+        h = np.linalg.lstsq(jac, -f, rcond=None)[0]
+        h_norm = np.linalg.norm(h, np.inf)
+        if h_norm > trust_radius:
+            h *= trust_radius / h_norm
+        if np.linalg.norm(h, np.inf) <= tol:
+            break
+        f_prev = f
+        x_f = x_f + h * scale
+    return __todict(keys, best[1]), par, best[2]
+
+
+def __neighbours(dim, fd_step):
+    """
+    return the finite-difference neighbours of dim (one per dimension)
+    """
+    if fd_step is None:
+        return []
+    return [{**dim, key: dim[key] * (1 + fd_step)} for key in dim]
 
 
-def __cost_coarse(dim_values, dim_keys, par, coarse_model, goal):
+def __cost_coarse(dim_values, dim_keys, par, coarse_model, goal_spec):
+    # dim_values may be a (n_dim x n_candidate) population
     _dim = __todict(dim_keys, dim_values)
-    coarse_mod = coarse_model(_dim, par)
-    return cost_calc(__totuple(coarse_mod), __totuple(goal))
+    return goal_spec.cost(coarse_model(_dim, par))
 
 
-def __refresh_coarse(par_values, par_keys, dim, coarse_model, fine_mod):
+def __scaled_cost(x_norm, scale, *args):
+    return __cost_coarse(x_norm * scale, *args)
+
+
+def __refresh_coarse(par_values, par_keys, dims, coarse_model, fine_specs):
     _par = __todict(par_keys, par_values)
-    coarse_mod = coarse_model(dim, _par)
-    return cost_calc(__totuple(coarse_mod), __totuple(fine_mod))
+    cost = 0
+    for dim, fine_spec in zip(dims, fine_specs):
+        cost += fine_spec.cost(coarse_model(dim, _par))
+    return cost
 
 
-@functools.lru_cache()
 def cost_calc(perf_list, goal_list, weight_list=None):
     """
     return the normalize standard deviation between the perf_list and the goal_list
@@ -98,10 +432,9 @@ def cost_calc(perf_list, goal_list, weight_list=None):
     cost = 0
     for itern, goal in enumerate(goal_list):
         perf = perf_list[itern]
-        goal = goal_list[itern]
         if isinstance(goal, tuple):
-            err_min = max((perf - goal[0]) / (goal[0] if goal[0] != 0 else 1), 0)
-            err_max = max((goal[1] - perf) / (goal[1] if goal[1] != 0 else 1), 0)
+            err_min = max((goal[0] - perf) / (abs(goal[0]) if goal[0] != 0 else 1), 0)
+            err_max = max((perf - goal[1]) / (abs(goal[1]) if goal[1] != 0 else 1), 0)
             err = err_min + err_max
         else:
             err = (perf - goal) / (goal if goal != 0 else 1)
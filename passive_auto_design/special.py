@@ -6,57 +6,166 @@ from .units.physical_dimension import PhysicalDimension
 
 
 # Other functions
-def gamma(_z_load: PhysicalDimension, _z0: PhysicalDimension = 50):
+def gamma(_z_load: PhysicalDimension, _z0: PhysicalDimension = 50, raw=False, out=None):
     """
     return the reflexion coefficient of an interface between two impedances.
+    The impedances may be arrays (broadcast together) or PhysicalDimension.
+    If raw, the coefficient is returned as a ndarray instead of a PhysicalDimension.
+    out, if given, is the (complex) array where the coefficient is written.
     """
-    v = np.array((_z0 - _z_load) / (_z0 + _z_load))
-    return PhysicalDimension(value=v, scale="lin", unit="")
+    z_load = _z_load.value if isinstance(_z_load, PhysicalDimension) else _z_load
+    z_0 = _z0.value if isinstance(_z0, PhysicalDimension) else _z0
+    if out is None:
+        v = (z_0 - z_load) / (z_0 + z_load)
+    else:
+        v = np.divide(np.subtract(z_0, z_load, out=out), np.add(z_0, z_load), out=out)
+    if raw:
+        return v
+    return PhysicalDimension._trusted(np.asarray(v), "lin", "")
 
 
 def std_dev(measured, targeted):
     """
     return the standard deviation between an array_like of results and their references.
     """
-    tmp = np.array(np.abs(gamma(measured, targeted).value) ** 2)
+    tmp = np.abs(gamma(measured, targeted, raw=True)) ** 2
     return np.sqrt(np.sum(tmp))
 
 
-def ihsr(_s31, _s21):
+def ihsr(_s31, _s21, out=None):
     """
-    Return the IHSR (Ideal Hybrid Splitting Ratio) for the given gains
+    Return the IHSR (Ideal Hybrid Splitting Ratio) for the given gains, in dB
+    (infinite for gains of equal magnitudes in quadrature).
+    The gains may be arrays (broadcast together), e.g. sweeps of shape (n_design, n_freq).
+    out, if given, is the (float) array where the IHSR is written.
     """
-    if _s21 == 1j * _s31 or _s21 == -1j * _s31:
-        return np.inf
-    ihsr_log = 10 * np.log10(np.abs((_s21 - 1j * _s31) / (_s21 + 1j * _s31)))
-    return -np.minimum(ihsr_log, -ihsr_log)
+    s31, s21 = np.asarray(_s31), np.asarray(_s21)
+    if out is None:
+        out = np.empty(np.broadcast_shapes(s31.shape, s21.shape))
+    # |s21 - j s31|**2 and |s21 + j s31|**2 in real arithmetic
+    x, y, u, v = s21.real, s21.imag, s31.real, s31.imag
+    ratio = np.add(x, v, out=out)
+    np.square(ratio, out=ratio)
+    tmp = np.subtract(y, u, out=np.empty_like(ratio))
+    ratio += np.square(tmp, out=tmp)
+    den = np.subtract(x, v, out=np.empty_like(ratio))
+    np.square(den, out=den)
+    np.add(y, u, out=tmp)
+    den += np.square(tmp, out=tmp)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(ratio, den, out=ratio)
+        np.log10(ratio, out=ratio)
+    np.abs(ratio, out=ratio)
+    ratio *= 5
+    np.copyto(ratio, np.inf, where=den == 0)
+    return ratio if ratio.ndim else ratio[()]
 
 
-def quality_f(_z):
+def quality_f(_z, out=None):
     """
     return the quality factor of a components
+    out, if given, is the (float) array where the quality factor is written.
     """
-    return np.imag(_z) / np.real(_z)
+    return np.divide(np.imag(_z), np.real(_z), out=out)
 
 
-def reflexion_coef(_z_steps: PhysicalDimension, _phi_step: float):
+def abcd_cascade(_z_steps, _phi_step, _alpha_step=0.0):
     """
-    return the coefficient reflexion of a given sequence of transmission lines
-    with the given_z_steps profile and equal length of _phi_steps degrees
+    return the ABCD matrix of a sequence of transmission lines with the _z_steps
+    impedance profile (last axis), each line having an electrical length of
+    _phi_step radians and a loss of _alpha_step nepers.
+    _phi_step and _alpha_step may be arrays (e.g. one phase per frequency point),
+    they are broadcast against the leading axes of _z_steps.
+    The result has the broadcast shape followed by (2, 2).
     """
-    n_step = _z_steps.shape[0]
+    z_steps = np.asarray(
+        _z_steps.value if isinstance(_z_steps, PhysicalDimension) else _z_steps
+    )
+    gamma_l = np.asarray(_alpha_step) + 1j * np.asarray(_phi_step)
+    cosh_l = np.cosh(gamma_l)
+    sinh_l = np.sinh(gamma_l)
+    shape = np.broadcast_shapes(z_steps.shape[:-1], gamma_l.shape)
+    a_t = np.ones(shape, dtype=complex)
+    b_t = np.zeros(shape, dtype=complex)
+    c_t = np.zeros(shape, dtype=complex)
+    d_t = np.ones(shape, dtype=complex)
+    for i in range(z_steps.shape[-1]):
+        z_0 = z_steps[..., i]
+        b_s = z_0 * sinh_l
+        c_s = sinh_l / z_0
+        a_t, b_t = a_t * cosh_l + b_t * c_s, a_t * b_s + b_t * cosh_l
+        c_t, d_t = c_t * cosh_l + d_t * c_s, c_t * b_s + d_t * cosh_l
+    return np.stack((np.stack((a_t, b_t), -1), np.stack((c_t, d_t), -1)), -2)
+
 
-    z_tot = _z_steps[-1:]
-    for i in range(n_step):
-        z_0 = _z_steps[n_step - i - 1]
-        z_tot = (
-            z_0
-            * (z_tot + 1j * z_0 * np.tan(_phi_step))
-            / (z_0 + 1j * z_tot * np.tan(_phi_step))
-        )
-    return gamma(_z_steps[0], z_tot)
+def abcd_ladder(_y_shunt, _z_series, _omega=None):
+    """
+    return the ABCD matrix of a ladder of lumped elements, the i-th shunt admittance
+    _y_shunt[..., i] being followed by the i-th series impedance _z_series[..., i]
+    (last axis). Null elements are transparent, so that ladders of different
+    lengths are computed at once by padding them with zeros.
+    The result has the broadcast shape of the leading axes followed by (2, 2).
+    If _omega is given, the elements are lossless, given by their susceptance and
+    reactance at the unit frequency and scaled by the (normalized) frequencies _omega,
+    an array with one more trailing axis than the leading axes of the elements
+    (e.g. one row of frequencies per ladder). The ladders are then computed in real
+    arithmetic, the result having the shape of _omega followed by (2, 2).
+    """
+    if _omega is not None:
+        omega = np.asarray(_omega)
+        y_shunt, z_series = np.broadcast_arrays(_y_shunt, _z_series)
+        y_shunt, z_series = y_shunt[..., None, :], z_series[..., None, :]
+        shape = np.broadcast_shapes(y_shunt.shape[:-1], omega.shape)
+        # lossless: A and D are real, B and C imaginary
+        a_t, d_t = np.ones(shape), np.ones(shape)
+        b_t, c_t = np.zeros(shape), np.zeros(shape)
+        for i in range(y_shunt.shape[-1]):
+            y_i = y_shunt[..., i] * omega
+            a_t -= b_t * y_i
+            c_t += d_t * y_i
+            z_i = z_series[..., i] * omega
+            b_t += a_t * z_i
+            d_t -= c_t * z_i
+        abcd = np.zeros(shape + (2, 2), dtype=complex)
+        abcd[..., 0, 0], abcd[..., 1, 1] = a_t, d_t
+        abcd[..., 0, 1].imag, abcd[..., 1, 0].imag = b_t, c_t
+        return abcd
+    y_shunt, z_series = np.broadcast_arrays(_y_shunt, _z_series)
+    shape = y_shunt.shape[:-1]
+    a_t = np.ones(shape, dtype=complex)
+    b_t = np.zeros(shape, dtype=complex)
+    c_t = np.zeros(shape, dtype=complex)
+    d_t = np.ones(shape, dtype=complex)
+    for i in range(y_shunt.shape[-1]):
+        a_t = a_t + b_t * y_shunt[..., i]
+        c_t = c_t + d_t * y_shunt[..., i]
+        b_t = b_t + a_t * z_series[..., i]
+        d_t = d_t + c_t * z_series[..., i]
+    return np.stack((np.stack((a_t, b_t), -1), np.stack((c_t, d_t), -1)), -2)
 
 
-def transmission_coef(_z_steps, _phi_step):
-    ref_c = reflexion_coef(_z_steps, _phi_step)
+def reflexion_coef(_z_steps: PhysicalDimension, _phi_step, _alpha_step=0.0):
+    """
+    return the coefficient reflexion of a given sequence of transmission lines
+    with the given_z_steps profile and equal length of _phi_steps radians.
+    _phi_step may be an array of phases (one per frequency point), in which case
+    all points are computed at once (see abcd_cascade).
+    """
+    z_steps = np.asarray(
+        _z_steps.value if isinstance(_z_steps, PhysicalDimension) else _z_steps
+    )
+    abcd = abcd_cascade(z_steps, _phi_step, _alpha_step)
+    z_load = z_steps[..., -1]
+    z_tot = (abcd[..., 0, 0] * z_load + abcd[..., 0, 1]) / (
+        abcd[..., 1, 0] * z_load + abcd[..., 1, 1]
+    )
+    return gamma(z_steps[..., 0], np.atleast_1d(z_tot))
+
+
+def transmission_coef(_z_steps, _phi_step, _alpha_step=0.0):
+    """
+    return the transmission coefficient of a given sequence of transmission lines
+    (see reflexion_coef).
+    """
+    ref_c = reflexion_coef(_z_steps, _phi_step, _alpha_step)
     return PhysicalDimension(value=np.sqrt(1 - ref_c**2), scale="lin", unit="")
@@ -1,8 +1,39 @@
 """
 Define all the object use to describe the substrate in which the structures are created.
 """
+import hashlib
+import marshal
+import math
 import os
+import weakref
+import numpy as np
 import yaml
+from .units.constants import u0
+
+# C (libyaml) parser and emitter when available
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "passive_auto_design",
+)
+# version of the cache files, to be increased when the schema changes
+CACHE_VERSION = 1
+# schema of a layer: type of each field, optional fields take the default of the class
+LAYER_SCHEMA = {
+    "name": str,
+    "height": float,
+    "metal": {"rho": float, "roughness": (float, 0.0)},
+    "dielectric": {
+        "epsilon": float,
+        "tan_d": (float, 0.0),
+        "roughness": (float, 0.0),
+    },
+    "width": ({"min": float, "max": float}, {"min": 1e-3, "max": 1e-3}),
+    "gap": (float, 1e-3),
+}
+# parsed files of the process, keyed by path, modification time and size
+_LOADED = {}
 
 
 class Metal:
@@ -14,6 +45,12 @@ class Metal:
         self.rho = _rho
         self.roughness = _roughness
 
+    def to_dict(self):
+        """
+        return the metal as a dict of the layer schema
+        """
+        return {"rho": self.rho, "roughness": self.roughness}
+
 
 class Dielectric:
     """
@@ -25,6 +62,16 @@ class Dielectric:
         self.tan_d = _tan_d
         self.roughness = _roughness
 
+    def to_dict(self):
+        """
+        return the dielectric as a dict of the layer schema
+        """
+        return {
+            "epsilon": self.epsilon,
+            "tan_d": self.tan_d,
+            "roughness": self.roughness,
+        }
+
 
 class Layer:
     """
@@ -32,6 +79,8 @@ class Layer:
     """
 
     def __init__(self, _name, _height, _metal, _dielectric):
+        # substrates indexing the layer by its name, to be told of its renaming
+        self._owners = weakref.WeakSet()
         self.name = _name
         self.metal = _metal
         self.width = {"min": 1e-3, "max": 1e-3}
@@ -39,6 +88,28 @@ class Layer:
         self.dielectric = _dielectric
         self.height = _height
 
+    @property
+    def name(self):
+        """
+        name of the layer
+        """
+        return self.__name
+
+    @name.setter
+    def name(self, _name):
+        self.__name = _name
+        for owner in self._owners:
+            owner._index = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_owners"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._owners = weakref.WeakSet()
+
     def set_rules(self, _metal_w_min, _metal_w_max, _metal_gap_min):
         """
         Set the technological rules of the layer
@@ -47,17 +118,52 @@ class Layer:
         self.width = {"min": _metal_w_min, "max": _metal_w_max}
         self.gap = _metal_gap_min
 
+    def to_dict(self):
+        """
+        return the layer as a dict of the layer schema
+        """
+        return {
+            "name": self.name,
+            "height": self.height,
+            "metal": self.metal.to_dict(),
+            "dielectric": self.dielectric.to_dict(),
+            "width": dict(self.width),
+            "gap": self.gap,
+        }
+
+    @classmethod
+    def from_dict(cls, _data):
+        """
+        return the layer described by a dict of the layer schema (see validate_layer)
+        """
+        metal, diel = _data["metal"], _data["dielectric"]
+        layer = cls(
+            _data["name"],
+            _data["height"],
+            Metal(metal["rho"], metal["roughness"]),
+            Dielectric(diel["epsilon"], diel["tan_d"], diel["roughness"]),
+        )
+        layer.set_rules(_data["width"]["min"], _data["width"]["max"], _data["gap"])
+        return layer
+
 
 class Substrate:
     """
     contain all informations about a substrate
     """
 
-    def __init__(self, _path=""):
+    def __init__(self, _path="", _cache=True):
+        self.sub = list()
+        # index of the names of the layers, None when a layer was renamed
+        self._index, self.__size = None, 0
+        self.__stack = (None, None)
         if _path != "":
-            self.load(_path)
-        else:
-            self.sub = list()
+            self.load(_path, _cache)
+
+    def __setstate__(self, state):
+        # the unpickled layers do not know their substrate
+        self.__dict__.update(state)
+        self._index = None
 
     def add_layer(self, _layer):
         """
@@ -69,12 +175,26 @@ class Substrate:
         """
         return the index of the first layer with the _layer_name name
         """
-        index = -1
-        for layer in self.sub:
-            index = index + 1
-            if layer.name == _layer_name:
-                return index
-        raise ValueError(f"No layer find with name: {_layer_name}")
+        index = None
+        if self._index is not None and self.__size == len(self.sub):
+            index = self._index.get(_layer_name)
+        if index is None or self.sub[index].name != _layer_name:
+            # unknown name, or layers added, removed or renamed since the last lookup
+            self._index = {}
+            for i, layer in enumerate(self.sub):
+                self._index.setdefault(layer.name, i)
+                layer._owners.add(self)
+            self.__size = len(self.sub)
+            index = self._index.get(_layer_name)
+            if index is None:
+                raise ValueError(f"No layer find with name: {_layer_name}")
+        return index
+
+    def dumps(self):
+        """
+        return the substrate as a yaml string
+        """
+        return yaml.dump([layer.to_dict() for layer in self.sub], Dumper=_Dumper)
 
     def dump(self, _path):
         """
@@ -86,16 +206,248 @@ class Substrate:
         if len(save_dir) == 2:
             os.makedirs(save_dir[0], exist_ok=True)
         with open(_path, "w+") as file:
-            yaml.dump(self.sub, file)
+            file.write(self.dumps())
+
+    def load(self, _path, _cache=True):
+        """
+        load a yaml file to configure the substrate.
+        The parsed files are cached, in the process and in CACHE_DIR
+        (unless _cache is False), until they are modified.
+        """
+        self.sub = [Layer.from_dict(data) for data in load_layers(_path, _cache)]
+        self._index = None
+
+    def analyze(self, _freq=None):
+        """
+        return the StackUp of the substrate (see StackUp),
+        recomputed only if the layers or _freq changed since the last call
+        """
+        key = repr([layer.to_dict() for layer in self.sub])
+        if _freq is not None:
+            key += np.asarray(_freq, dtype=float).tobytes().hex()
+        if self.__stack[0] != key:
+            self.__stack = (key, StackUp(self, _freq))
+        return self.__stack[1]
+
+
+class StackUp:
+    """
+    Electrical quantities of the layers and of the pairs of layers of a substrate,
+    precomputed as arrays to be queried by the component models.
+
+    Layers are stacked from the first (bottom) to the last (top) one. Between two
+    layers, the separation is the total height of the layers in between and the
+    effective permittivity is the one of these layers in series (as in a
+    multi-layer parallel plate capacitor). The metal of each layer has a thickness
+    equal to the height of the layer, its conductivity being given by Metal.rho.
+    If freq is given, the skin depth and sheet resistance of each layer
+    are tabulated at these frequencies.
+    """
+
+    def __init__(self, substrate, freq=None):
+        layers = substrate.sub
+        self.names = [layer.name for layer in layers]
+        self.__index = {}
+        for i, name in enumerate(self.names):
+            self.__index.setdefault(name, i)
+        self.height = np.array([layer.height for layer in layers], dtype=float)
+        self.epsilon = np.array([l.dielectric.epsilon for l in layers], dtype=float)
+        self.tan_d = np.array([l.dielectric.tan_d for l in layers], dtype=float)
+        self.sigma = np.array([layer.metal.rho for layer in layers], dtype=float)
+        # heights and heights / permittivities accumulated from the bottom
+        height = np.r_[0, np.cumsum(self.height)]
+        inv_eps = np.r_[0, np.cumsum(self.height / self.epsilon)]
+        low = np.minimum.outer(np.arange(len(layers)), np.arange(len(layers)))
+        high = np.maximum.outer(np.arange(len(layers)), np.arange(len(layers)))
+        # layers strictly between the two layers of each pair
+        self.separation = np.maximum(height[high] - height[low + 1], 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            eps_eff = self.separation / (inv_eps[high] - inv_eps[low + 1])
+        self.eps_eff = np.where(self.separation > 0, eps_eff, np.nan)
+        self.sheet_res_dc = 1 / (self.sigma * self.height)
+        # skin depth of each layer at 1 Hz
+        self.__skin_1hz = 1 / np.sqrt(np.pi * u0 * self.sigma)
+        self.__scalar = list(
+            zip(
+                self.height.tolist(),
+                self.__skin_1hz.tolist(),
+                self.sheet_res_dc.tolist(),
+            )
+        )
+        self.freq = None if freq is None else np.asarray(freq, dtype=float)
+        if freq is not None:
+            index = np.arange(len(layers))[:, None]
+            self.skin_depth_table = self.skin_depth(index, self.freq)
+            self.sheet_res_table = self.sheet_resistance(index, self.freq)
 
-    def load(self, _path):
+    def index(self, layer):
         """
-        load a yaml file to configure the substrate
+        return the index of the layer(s), given by name or index (or arrays of them)
         """
-        with open(_path) as file:
-            self.sub = yaml.full_load(file)
+        if isinstance(layer, str):
+            return self.__index[layer]
+        if isinstance(layer, (int, np.integer)):
+            return layer
+        layer = np.asarray(layer)
+        if layer.dtype.kind in "iu":
+            return layer
+        return np.reshape([self.__index[name] for name in layer.ravel()], layer.shape)
+
+    def pair(self, lower, upper):
+        """
+        return the separation and the effective permittivity between the layers
+        lower and upper (names or indexes, or arrays of them).
+        The permittivity is NaN for adjacent layers (no layer in between).
+        """
+        i, j = self.index(lower), self.index(upper)
+        return self.separation[i, j], self.eps_eff[i, j]
+
+    def skin_depth(self, layer, freq):
+        """
+        return the skin depth in the metal of the layer(s) at the frequencies freq
+        """
+        return self.__skin_1hz[self.index(layer)] / np.sqrt(freq)
+
+    def sheet_resistance(self, layer, freq=None):
+        """
+        return the sheet resistance (ohm/square) of the metal of the layer(s),
+        at DC if freq is None, else accounting for the skin effect
+        (current decaying exponentially from one side of the metal).
+        """
+        index = self.index(layer)
+        if freq is None:
+            return self.sheet_res_dc[index]
+        if isinstance(index, int) and isinstance(freq, (int, float)):
+            # single query: plain python is much faster than numpy on scalars
+            height, skin_1hz, sheet_res = self.__scalar[index]
+            ratio = height * math.sqrt(freq) / skin_1hz
+            return sheet_res * ratio / -math.expm1(-ratio) if ratio > 0 else sheet_res
+        ratio = self.height[index] * np.sqrt(freq) / self.__skin_1hz[index]
+        # thickness over effective thickness: 1 at DC, t / delta for a thick metal
+        factor = np.divide(
+            ratio, -np.expm1(-ratio), out=np.ones_like(ratio), where=ratio > 0
+        )
+        return self.sheet_res_dc[index] * factor
+
+
+def load_layers(path, cache=True):
+    """
+    return the layers of a substrate file, as dicts of the layer schema
+    (shared by all the loads of the file: they must not be modified).
+
+    The file is parsed with the safe yaml loader (libyaml if available): only the
+    substrate classes are accepted among the python tags of the legacy files.
+    The result is kept in the process and, if cache is True, in a binary file of
+    CACHE_DIR, both keyed on the path, modification time and size of the file.
+    """
+    stat = os.stat(path)
+    path = os.path.abspath(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    layers = _LOADED.get(key)
+    if layers is not None:
+        return layers
+    cache_file = os.path.join(
+        CACHE_DIR, hashlib.sha1(path.encode()).hexdigest() + ".marshal"
+    )
+    if cache:
+        layers = __read_cache(cache_file, key)
+    if layers is None:
+        with open(path) as file:
+            data = yaml.load(file, Loader=_LegacyLoader)
+        if not isinstance(data, list):
+            raise ValueError(f"{path}: a substrate is a list of layers")
+        layers = [
+            validate_layer(layer, f"{path}, layer {i}") for i, layer in enumerate(data)
+        ]
+        if cache:
+            __write_cache(cache_file, key, layers)
+    _LOADED[key] = layers
+    return layers
+
+
+def validate_layer(layer, where="layer", schema=None):
+    """
+    return the layer (dict) checked against the layer schema, with the default
+    values of the missing optional fields and the numbers converted to float.
+    Raise a ValueError describing the first error found.
+    """
+    schema = LAYER_SCHEMA if schema is None else schema
+    if not isinstance(layer, dict):
+        raise ValueError(f"{where}: expected a mapping, got {layer!r}")
+    unknown = set(layer) - set(schema)
+    if unknown:
+        raise ValueError(f"{where}: unknown fields {sorted(unknown)}")
+    out = {}
+    for key, kind in schema.items():
+        if key not in layer:
+            if not isinstance(kind, tuple):
+                raise ValueError(f"{where}: missing field {key}")
+            out[key] = kind[1]
+            continue
+        kind = kind[0] if isinstance(kind, tuple) else kind
+        value = layer[key]
+        if isinstance(kind, dict):
+            out[key] = validate_layer(value, f"{where}.{key}", kind)
+        elif kind is float:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{where}.{key}: expected a number, got {value!r}")
+            out[key] = float(value)
+        else:
+            if not isinstance(value, kind):
+                raise ValueError(f"{where}.{key}: expected a {kind.__name__}")
+            out[key] = value
+    return out
+
+
+def __read_cache(cache_file, key):
+    """
+    return the layers saved in the cache file, or None if missing or outdated
+    """
+    try:
+        with open(cache_file, "rb") as file:
+            version, cached_key, layers = marshal.loads(file.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != CACHE_VERSION or tuple(cached_key) != key:
+        return None
+    return layers
+
+
+def __write_cache(cache_file, key, layers):
+    """
+    save the layers in the cache file (atomically, for concurrent workers)
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}"
+        with open(tmp_file, "wb") as file:
+            marshal.dump((CACHE_VERSION, key, layers), file)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        # read-only cache directory: the file will be parsed again next time
+        pass
+
+
+class _LegacyLoader(_Loader):
+    """
+    safe yaml loader accepting the python tags of the substrate classes
+    (files saved by the previous versions), as plain mappings
+    """
+
+
+# misspelled fields of some legacy files
+_LEGACY_FIELDS = {"rougthness": "roughness", "tand": "tan_d"}
+
+
+def __construct_legacy(loader, node):
+    mapping = loader.construct_mapping(node, deep=True)
+    return {_LEGACY_FIELDS.get(k, k): v for k, v in mapping.items()}
 
 
+for _name in ("Layer", "Metal", "Dielectric"):
+    _LegacyLoader.add_constructor(
+        f"tag:yaml.org,2002:python/object:{__name__}.{_name}", __construct_legacy
+    )
 # Definition of classical metals
 
 
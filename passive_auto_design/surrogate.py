@@ -0,0 +1,238 @@
+"""
+Lookup tables (surrogates) of the component models, for the inner loops of optimizations
+"""
+import bisect
+import itertools
+import json
+import numpy as np
+
+
+class LookupTable:
+    """
+    Model tabulated on a rectilinear grid, interpolated multilinearly.
+
+    The model is any function taking a dict of arrays (broadcast together)
+    and returning a dict of arrays of the same shape, as the vectorized
+    component models. A table can be called as the model it replaces,
+    with one or several dicts (e.g. table(dim, par) as a space mapping coarse model).
+    Outside of the grid, the values are linearly extrapolated from the border cells.
+    """
+
+    def __init__(self, axes, values):
+        self.axes = {k: np.asarray(v, dtype=float) for k, v in axes.items()}
+        self.keys = tuple(values)
+        shape = tuple(len(a) for a in self.axes.values())
+        self.values = np.stack([np.broadcast_to(values[k], shape) for k in self.keys])
+
+    @property
+    def shape(self):
+        """
+        return the shape of the grid
+        """
+        return self.values.shape[1:]
+
+    @classmethod
+    def tabulate(cls, model, bounds, n_points=9, executor=None):
+        """
+        return the table of the model over the box given by bounds.
+
+        Parameters
+        ----------
+        model : callable
+            vectorized model, taking and returning a dict of arrays.
+        bounds : dict
+            (min, max) of each parameter, or the array of its grid points.
+        n_points : int
+            number of points per axis for the parameters given by their bounds.
+        executor : concurrent.futures.Executor, optional
+            if given, slices of the grid are evaluated concurrently through this executor
+            (the model must be picklable for a ProcessPoolExecutor).
+
+        """
+        axes = {
+            k: np.linspace(*b, n_points) if len(b) == 2 else np.asarray(b)
+            for k, b in bounds.items()
+        }
+        return cls(axes, _evaluate_grid(model, axes, executor))
+
+    def __call__(self, *dims, **kwargs):
+        """
+        return the interpolated model at the given parameters
+        """
+        dim = {}
+        for d in dims:
+            dim.update(d)
+        dim.update(kwargs)
+        if not any(isinstance(dim[k], np.ndarray) for k in self.axes):
+            return self.__scalar_call(dim)
+        points = np.broadcast_arrays(*(np.asarray(dim[k], float) for k in self.axes))
+        shape = points[0].shape
+        strides = np.cumprod((1,) + self.shape[:0:-1])[::-1]
+        base, weight = 0, []
+        for axis, stride, x in zip(self.axes.values(), strides, points):
+            x = x.ravel()
+            i = np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2)
+            base = base + i * stride
+            weight.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+        offsets = [
+            np.dot(corner, strides)
+            for corner in itertools.product((0, 1), repeat=len(strides))
+        ]
+        flat = self.values.reshape(len(self.keys), -1)
+        values = flat[:, base + np.reshape(offsets, (-1, 1))]
+        # the last axis varies the fastest among the corners: reduce it first
+        for w in reversed(weight):
+            values = values[:, 0::2] + w * (values[:, 1::2] - values[:, 0::2])
+        return {k: r.reshape(shape) for k, r in zip(self.keys, values[:, 0])}
+
+    def __scalar_call(self, dim):
+        # single point: bisection and interpolation on python lists
+        if "_corners" not in self.__dict__:
+            strides = np.cumprod((1,) + self.shape[:0:-1])[::-1].tolist()
+            self._grid = [a.tolist() for a in self.axes.values()]
+            self._corners = [
+                sum(c * s for c, s in zip(corner, strides))
+                for corner in itertools.product((0, 1), repeat=len(strides))
+            ]
+            self._strides = strides
+            small = self.values.size <= 2**20
+            self._flat = (
+                self.values.reshape(len(self.keys), -1).tolist() if small else None
+            )
+        base, weight = 0, []
+        for key, grid, stride in zip(self.axes, self._grid, self._strides):
+            x = float(dim[key])
+            i = min(max(bisect.bisect_right(grid, x) - 1, 0), len(grid) - 2)
+            base += i * stride
+            weight.append((x - grid[i]) / (grid[i + 1] - grid[i]))
+        index = [base + offset for offset in self._corners]
+        if self._flat is None:
+            # large (e.g. memory-mapped) tables: gather the corners with numpy
+            corners = self.values.reshape(len(self.keys), -1)[:, index].tolist()
+        else:
+            corners = [[values[i] for i in index] for values in self._flat]
+        result = []
+        for values in corners:
+            # the last axis varies the fastest among the corners: reduce it first
+            for w in reversed(weight):
+                values = [a + w * (b - a) for a, b in zip(values[0::2], values[1::2])]
+            result.append(values[0])
+        return dict(zip(self.keys, result))
+
+    def error(self):
+        """
+        return the estimated interpolation error of each interval of each axis,
+        relative to the range of each output (maximum over the outputs and the other axes).
+        NaN outputs (e.g. invalid geometries) are ignored.
+        The error of the linear interpolation over an interval of length h is bounded
+        by h**2 / 8 * |f''|, the second derivative being estimated by finite differences.
+        """
+        flat = self.values.reshape(len(self.keys), -1)
+        # outputs constant up to rounding errors are not refined
+        # NaN (e.g. invalid geometries) are ignored
+        high, low = np.fmax.reduce(flat, axis=1), np.fmin.reduce(flat, axis=1)
+        scale = np.fmax(high - low, 1e-9 * np.fmax(np.abs(high), np.abs(low)))
+        scale = np.where(scale > 0, scale, 1).reshape((-1,) + (1,) * len(self.shape))
+        values = self.values / scale
+        err = {}
+        for n, (key, axis) in enumerate(self.axes.items()):
+            if len(axis) < 3:
+                err[key] = np.full(len(axis) - 1, np.inf)
+                continue
+            step = np.diff(axis)
+            slope = np.diff(values, axis=n + 1) / _along(step, n + 1, values.ndim)
+            second = np.abs(
+                2
+                * np.diff(slope, axis=n + 1)
+                / _along(step[1:] + step[:-1], n + 1, values.ndim)
+            )
+            other = tuple(i for i in range(values.ndim) if i != n + 1)
+            second = np.fmax.reduce(second, axis=other)
+            # each interval takes the largest of its two nearest estimates
+            second = np.fmax(np.r_[second[0], second], np.r_[second, second[-1]])
+            err[key] = step**2 / 8 * second
+        return err
+
+    def error_bound(self):
+        """
+        return the estimated maximum relative interpolation error of the table.
+        """
+        return float(sum(np.fmax.reduce(e) for e in self.error().values()))
+
+    def refine(self, model, rtol=1e-3, max_size=10**7, max_iter=10, executor=None):
+        """
+        return a table where the intervals with an estimated error above rtol are split
+        until the error bound is below rtol (or the grid would exceed max_size points).
+        """
+        table = self
+        for _ in range(max_iter):
+            axes = {}
+            for key, err in table.error().items():
+                axis = table.axes[key]
+                split = err > rtol / len(table.axes)
+                axes[key] = np.sort(
+                    np.r_[axis, (axis[1:][split] + axis[:-1][split]) / 2]
+                )
+            size = np.prod([len(a) for a in axes.values()])
+            if size == table.values[0].size or size > max_size:
+                break
+            table = LookupTable(axes, _evaluate_grid(model, axes, executor))
+        return table
+
+    def save(self, path, dtype=float):
+        """
+        save the table as path.npy (values, memory-mappable) and path.json (axes).
+        """
+        values = np.lib.format.open_memmap(
+            f"{path}.npy", mode="w+", dtype=dtype, shape=self.values.shape
+        )
+        values[:] = self.values
+        values.flush()
+        with open(f"{path}.json", "w") as file:
+            json.dump(
+                {
+                    "keys": self.keys,
+                    "axes": {k: a.tolist() for k, a in self.axes.items()},
+                },
+                file,
+            )
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """
+        return the table saved at path, its values being memory-mapped.
+        """
+        with open(f"{path}.json") as file:
+            meta = json.load(file)
+        table = cls.__new__(cls)
+        table.axes = {k: np.asarray(a) for k, a in meta["axes"].items()}
+        table.keys = tuple(meta["keys"])
+        table.values = np.load(f"{path}.npy", mmap_mode=mmap_mode)
+        return table
+
+
+def _along(_x, _axis, _ndim):
+    """
+    return the 1-d array _x shaped to broadcast along _axis of a _ndim array
+    """
+    shape = [1] * _ndim
+    shape[_axis] = -1
+    return np.reshape(_x, shape)
+
+
+def _evaluate_grid(model, axes, executor=None):
+    """
+    return the outputs of the model on the grid defined by axes.
+    The grid is sliced along its first axis to be evaluated through the executor.
+    """
+    grid = np.meshgrid(*axes.values(), indexing="ij")
+    dims = dict(zip(axes, grid))
+    if executor is None:
+        return model(dims)
+    n_slice = min(len(grid[0]), 4 * getattr(executor, "_max_workers", 1))
+    slices = [
+        {k: v[s] for k, v in dims.items()}
+        for s in np.array_split(np.arange(len(grid[0])), n_slice)
+    ]
+    results = list(executor.map(model, slices))
+    return {k: np.concatenate([r[k] for r in results]) for k in results[0]}
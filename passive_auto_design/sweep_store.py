@@ -0,0 +1,443 @@
+"""
+Streaming import of S-parameter sweeps (Touchstone and CSV files) into a memory-mapped
+store, usable as the fine model of the space mapping
+"""
+import itertools
+import json
+import os
+import re
+import numpy as np
+
+FREQ_UNITS = {"hz": 1.0, "khz": 1e3, "mhz": 1e6, "ghz": 1e9, "thz": 1e12}
+FORMATS = ("RI", "MA", "DB")
+_STOP = re.compile(r"^\s*\[(noise data|end)\]", re.IGNORECASE | re.MULTILINE)
+
+
+def to_complex(first, second, fmt="RI"):
+    """
+    return the complex values of pairs given in the Touchstone format fmt:
+    real and imaginary parts ("RI"), magnitude and angle in degree ("MA")
+    or magnitude in dB and angle in degree ("DB").
+    """
+    fmt = fmt.upper()
+    if fmt == "RI":
+        return first + 1j * second
+    if fmt == "MA":
+        return first * np.exp(1j * np.deg2rad(second))
+    if fmt == "DB":
+        return 10 ** (first / 20) * np.exp(1j * np.deg2rad(second))
+    raise ValueError(f"unknown format: {fmt}, expected one of {FORMATS}")
+
+
+def read_touchstone(path, chunk_size=2**16):
+    """
+    read a Touchstone file (version 1 or 2) by chunks of frequency points.
+
+    Parameters
+    ----------
+    path : str
+        path of the .sNp file, N being the number of ports
+        (given by [Number of Ports] for version 2 files).
+    chunk_size : int
+        number of lines read at once.
+
+    Yields
+    ------
+    freq : ndarray
+        frequencies of the chunk, in Hz.
+    s : ndarray
+        complex S-parameters of the chunk, of shape (n_freq, n_port, n_port).
+
+    """
+    match = re.search(r"\.s(\d+)p$", str(path), re.IGNORECASE)
+    n_port = int(match.group(1)) if match else None
+    options = {"unit": "ghz", "param": "S", "fmt": "MA", "z0": 50.0}
+    order_21, version_2 = True, False
+    with open(path) as file:
+        # header: option line and version 2 keywords, up to the first data line
+        for line in file:
+            line = line.split("!", 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith("#"):
+                options.update(__options(line))
+            elif line.startswith("["):
+                keyword, _, value = line[1:].partition("]")
+                keyword = keyword.strip().lower()
+                if keyword == "number of ports":
+                    n_port, version_2 = int(value), True
+                elif keyword == "two-port data order":
+                    order_21 = value.strip() == "21_12"
+                elif keyword == "matrix format" and value.strip().lower() != "full":
+                    raise ValueError(f"{value.strip()} matrices are not supported")
+                elif keyword == "network data":
+                    break
+            else:
+                file = itertools.chain([line + "\n"], file)
+                break
+        if n_port is None:
+            raise ValueError(f"unknown number of ports of {path}")
+        if options["param"] != "S":
+            raise ValueError(f"{options['param']}-parameters are not supported")
+        unit, fmt = FREQ_UNITS[options["unit"]], options["fmt"]
+        size = 1 + 2 * n_port**2
+        # the noise parameters of version 1 two-port files follow the S-parameters
+        # without keyword, from the first frequency not above the previous one
+        noise = n_port == 2 and not version_2
+        rest, last = np.empty(0), -np.inf
+        while True:
+            lines = list(itertools.islice(file, chunk_size))
+            if not lines:
+                break
+            text = "".join(lines)
+            stop = _STOP.search(text)
+            if stop is not None:
+                text = text[: stop.start()]
+            if "!" in text:
+                text = "\n".join(line.split("!", 1)[0] for line in text.split("\n"))
+            try:
+                values = np.array(text.split(), dtype=float)
+            except ValueError as exc:
+                raise ValueError(f"invalid data in {path}: {exc}") from None
+            values = np.concatenate((rest, values))
+            if noise:
+                freq = values[::size]
+                start = np.flatnonzero(freq <= np.r_[last, freq[:-1]])
+                if start.size:
+                    values = values[: start[0] * size]
+                    stop = True
+            n_freq = len(values) // size
+            # a record may span several lines: keep the incomplete one for the next chunk
+            rest = values[n_freq * size :]
+            if n_freq:
+                records = values[: n_freq * size].reshape(n_freq, size)
+                last = records[-1, 0]
+                yield records[:, 0] * unit, __records_to_s(
+                    records[:, 1:], n_port, fmt, order_21
+                )
+            if stop is not None:
+                break
+        if rest.size:
+            raise ValueError(f"incomplete data at the end of {path}")
+
+
+def __options(line):
+    """
+    return the options given by a Touchstone option line
+    """
+    options = {}
+    tokens = line[1:].split()
+    for i, token in enumerate(tokens):
+        if token.lower() in FREQ_UNITS:
+            options["unit"] = token.lower()
+        elif token.upper() in ("S", "Y", "Z", "H", "G"):
+            options["param"] = token.upper()
+        elif token.upper() in FORMATS:
+            options["fmt"] = token.upper()
+        elif token.upper() == "R" and i + 1 < len(tokens):
+            options["z0"] = float(tokens[i + 1])
+    return options
+
+
+def __records_to_s(records, n_port, fmt, order_21):
+    """
+    return the S matrices of the data records (pairs of values, Touchstone order)
+    """
+    s = to_complex(records[:, 0::2], records[:, 1::2], fmt)
+    s = s.reshape(-1, n_port, n_port)
+    if n_port == 2 and order_21:
+        # 2-port files are ordered S11 S21 S12 S22
+        s = s.transpose(0, 2, 1)
+    return s
+
+
+def read_csv(path, freq="freq", geometry=(), fmt="RI", unit=1.0, chunk_size=2**16):
+    """
+    read a CSV sweep file by chunks of rows.
+
+    The first line gives the name of the columns. Each row is one frequency point,
+    with its frequency, the values of the geometry parameters and the pairs of
+    values of the S-parameters (S11, S12, ..., row by row), in the order of the columns.
+
+    Parameters
+    ----------
+    path : str
+        path of the CSV file.
+    freq : str
+        name of the frequency column.
+    geometry : tuple of str
+        names of the geometry columns, in a parametric sweep file.
+    fmt : str
+        format of the pairs of values ("RI", "MA" or "DB", see to_complex).
+    unit : float
+        unit of the frequency column, in Hz.
+    chunk_size : int
+        number of rows read at once.
+
+    Yields
+    ------
+    geometry : ndarray
+        geometry of each row, of shape (n_row, len(geometry)).
+    freq : ndarray
+        frequency of each row, in Hz.
+    s : ndarray
+        complex S-parameters of the chunk, of shape (n_row, n_port, n_port).
+
+    """
+    with open(path) as file:
+        header = [name.strip().strip('"') for name in file.readline().split(",")]
+        i_freq = header.index(freq)
+        i_geo = [header.index(name) for name in geometry]
+        i_s = [i for i in range(len(header)) if i != i_freq and i not in i_geo]
+        n_port = int(round(np.sqrt(len(i_s) / 2)))
+        if 2 * n_port**2 != len(i_s):
+            raise ValueError(f"{len(i_s)} columns do not form a S matrix in {path}")
+        while True:
+            lines = list(itertools.islice(file, chunk_size))
+            if not lines:
+                break
+            rows = np.loadtxt(lines, delimiter=",", ndmin=2)
+            s = to_complex(rows[:, i_s[0::2]], rows[:, i_s[1::2]], fmt)
+            yield rows[:, i_geo], rows[:, i_freq] * unit, s.reshape(-1, n_port, n_port)
+
+
+class SweepStore:
+    """
+    Columnar store of S-parameter sweeps on disk, read through memory maps.
+
+    The frequency points of all the sweeps are stored end to end in two raw files
+    (frequency and S matrices), the sweeps (geometry and range of points)
+    in an index. Files are imported by chunks, so that neither the import nor the
+    queries need to load the data into memory, whatever the size of the store.
+    """
+
+    def __init__(self, path, n_port=None, keys=()):
+        self.path = path
+        meta = os.path.join(path, "index.json")
+        if os.path.exists(meta):
+            with open(meta) as file:
+                index = json.load(file)
+            self.n_port, self.keys = index["n_port"], tuple(index["keys"])
+            self.sweeps = index["sweeps"]
+            if n_port not in (None, self.n_port) or (keys and tuple(keys) != self.keys):
+                raise ValueError(
+                    f"{path} stores {self.n_port}-port sweeps of {self.keys},"
+                    f" requested n_port={n_port}, keys={tuple(keys)}"
+                )
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.n_port, self.keys, self.sweeps = n_port, tuple(keys), []
+        self.__maps = None
+        self.__grid = None
+
+    def __reduce__(self):
+        # memory maps are reopened rather than pickled (e.g. for process pools)
+        return type(self), (self.path,)
+
+    def __len__(self):
+        return len(self.sweeps)
+
+    @property
+    def size(self):
+        """
+        return the number of frequency points in the store
+        """
+        return self.sweeps[-1][1] if self.sweeps else 0
+
+    def add_touchstone(self, path, geometry=None, chunk_size=2**16):
+        """
+        import a Touchstone file as the sweep of the given geometry (dict of values).
+        """
+        geometry = {} if geometry is None else geometry
+        self.__check_keys(geometry)
+        row = [float(geometry[k]) for k in self.keys]
+        self.__append(
+            (row, freq, s) for freq, s in read_touchstone(path, chunk_size=chunk_size)
+        )
+
+    def add_csv(self, path, freq="freq", fmt="RI", unit=1.0, chunk_size=2**16):
+        """
+        import a CSV sweep file (see read_csv), the geometry columns being the keys
+        of the store. A new sweep starts at each change of geometry.
+        """
+        self.__append(read_csv(path, freq, self.keys, fmt, unit, chunk_size=chunk_size))
+
+    def __check_keys(self, geometry):
+        if not self.sweeps and not self.keys:
+            self.keys = tuple(geometry)
+        if set(geometry) != set(self.keys):
+            raise ValueError(f"geometry {tuple(geometry)} instead of {self.keys}")
+
+    def __append(self, chunks):
+        """
+        append chunks of (geometry, freq, s) to the store, and save the index
+        """
+        files = [open(self.__file(name), "ab") for name in ("freq", "s")]
+        new = True
+        try:
+            for geometry, freq, s in chunks:
+                if self.n_port is None:
+                    self.n_port = s.shape[1]
+                if s.shape[1] != self.n_port:
+                    raise ValueError(f"{s.shape[1]} ports instead of {self.n_port}")
+                files[0].write(np.ascontiguousarray(freq, dtype="<f8").tobytes())
+                files[1].write(np.ascontiguousarray(s, dtype="<c16").tobytes())
+                geometry = np.broadcast_to(geometry, (len(freq), len(self.keys)))
+                self.__index(geometry, new)
+                new = False
+        finally:
+            for file in files:
+                file.close()
+            self.__maps = self.__grid = None
+            with open(os.path.join(self.path, "index.json"), "w") as file:
+                json.dump(
+                    {"n_port": self.n_port, "keys": self.keys, "sweeps": self.sweeps},
+                    file,
+                )
+
+    def __index(self, geometry, new):
+        """
+        update the sweeps with the geometry of each new point.
+        Unless new, the first points continue the last sweep if they share its geometry.
+        """
+        start = self.size
+        change = np.any(geometry[1:] != geometry[:-1], axis=1)
+        bounds = np.r_[0, np.flatnonzero(change) + 1, len(geometry)].tolist()
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            row = geometry[first].tolist()
+            if first == 0 and not new and self.sweeps[-1][2:] == row:
+                self.sweeps[-1][1] = start + last
+            else:
+                self.sweeps.append([start + first, start + last, *row])
+
+    def __file(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def __map(self):
+        if self.__maps is None:
+            n = self.size
+            shape = (n, self.n_port, self.n_port)
+            self.__maps = (
+                np.memmap(self.__file("freq"), "<f8", "r", shape=(n,)) if n else None,
+                np.memmap(self.__file("s"), "<c16", "r", shape=shape) if n else None,
+            )
+        return self.__maps
+
+    def geometry(self):
+        """
+        return the geometry of each sweep, as a dict of arrays
+        """
+        rows = np.array([sweep[2:] for sweep in self.sweeps], dtype=float)
+        return {k: rows[:, i] for i, k in enumerate(self.keys)}
+
+    def sweep(self, index):
+        """
+        return the frequency and the S-parameters of a sweep (memory-mapped)
+        """
+        freq, s = self.__map()
+        start, stop = self.sweeps[index][:2]
+        return freq[start:stop], s[start:stop]
+
+    def at_frequency(self, index, freq):
+        """
+        return the S-parameters of a sweep linearly interpolated at the frequencies freq.
+        Only the points around freq are read from the disk.
+        """
+        f_sweep, s_sweep = self.sweep(index)
+        freq = np.asarray(freq, dtype=float)
+        i = np.clip(
+            np.searchsorted(f_sweep, freq, side="right") - 1, 0, len(f_sweep) - 2
+        )
+        low, high = s_sweep[i], s_sweep[i + 1]
+        weight = ((freq - f_sweep[i]) / (f_sweep[i + 1] - f_sweep[i]))[..., None, None]
+        return low + weight * (high - low)
+
+    def interpolate(self, dim, freq):
+        """
+        return the S-parameters at the frequencies freq for the geometry dim,
+        interpolated multilinearly between the sweeps of the neighbouring geometries
+        (the geometries of the sweeps must form a rectilinear grid,
+        parameters taking a single value in the store are ignored).
+        Outside of the grid, the S-parameters are linearly extrapolated.
+        """
+        axes, grid = self.__geometry_grid()
+        base, weight = [], []
+        for key, axis in axes.items():
+            x = float(dim[key])
+            i = min(max(np.searchsorted(axis, x, side="right") - 1, 0), len(axis) - 2)
+            base.append(i)
+            weight.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+        values = [
+            self.at_frequency(grid[tuple(b + c for b, c in zip(base, corner))], freq)
+            for corner in itertools.product((0, 1), repeat=len(axes))
+        ]
+        # the last axis varies the fastest among the corners: reduce it first
+        for w in reversed(weight):
+            values = [a + w * (b - a) for a, b in zip(values[0::2], values[1::2])]
+        return values[0]
+
+    def __geometry_grid(self):
+        """
+        return the axes of the grid of the geometries and the sweep at each node
+        """
+        if self.__grid is None:
+            if not self.sweeps:
+                raise ValueError(f"no sweep in {self.path}")
+            axes, nodes = {}, []
+            for key, values in self.geometry().items():
+                axis, node = np.unique(values, return_inverse=True)
+                if len(axis) > 1:
+                    axes[key] = axis
+                    nodes.append(node)
+            grid = np.full([len(a) for a in axes.values()], -1)
+            if grid.size != len(self.sweeps):
+                raise ValueError("the geometries of the sweeps do not form a grid")
+            grid[tuple(nodes)] = np.arange(len(self.sweeps)) if nodes else 0
+            if np.any(grid < 0):
+                raise ValueError("the geometries of the sweeps do not form a grid")
+            self.__grid = (axes, grid)
+        return self.__grid
+
+    def fine_model(self, freq, perf=None):
+        """
+        return the fine model of the stored sweeps, for space_map.
+
+        Parameters
+        ----------
+        freq : float or array_like
+            frequencies at which the performances are evaluated.
+        perf : dict, optional
+            function of each performance, taking the S-parameters at freq
+            (complex array of shape (*freq.shape, n_port, n_port)).
+            By default, the magnitude in dB of each S-parameter ("S11", "S21", ...).
+
+        Returns
+        -------
+        SweepModel
+            picklable callable returning the performances for a dict of dimensions.
+
+        """
+        return SweepModel(self, freq, perf)
+
+
+class SweepModel:
+    """
+    Fine model interpolated in a SweepStore, at fixed frequencies.
+    """
+
+    def __init__(self, store, freq, perf=None):
+        self.store = store
+        self.freq = freq
+        self.perf = perf
+
+    def __call__(self, dim):
+        s = self.store.interpolate(dim, self.freq)
+        if self.perf is not None:
+            return {k: fun(s) for k, fun in self.perf.items()}
+        mag = 20 * np.log10(np.abs(s))
+        ports = list(itertools.product(range(self.store.n_port), repeat=2))
+        if mag.ndim == 2:
+            # single frequency: performances as floats
+            mag = mag.tolist()
+            return {f"S{i + 1}{j + 1}": mag[i][j] for i, j in ports}
+        return {f"S{i + 1}{j + 1}": mag[..., i, j] for i, j in ports}
@@ -36,21 +36,32 @@ class RFLineUp(BaseModel):
         """
         return the noise figure of the global line-up.
         """
-        NF = NoiseFigure(value=list(l.noise.value for l in self.chain))
-        gain = PhysicalDimension(
-            value=list(l.gain.dB().value for l in self.chain)[:-1], scale="dB"
-        )
-        return friis(NF, gain)
+        gain, nf = self.stack()
+        return friis(nf, gain[:-1])
 
     def gain(self):
         """
-        return the gain of the global line-up.
+        return the gain of the global line-up (in dB).
         """
-        gain = np.zeros(self.chain[0].gain.shape)
-        for l in self.chain:
-            gain += l.gain.dB().value
-        print(gain)
-        return sum(gain)
+        gain, _ = self.stack()
+        return np.sum(gain.value, axis=0)
+
+    def stack(self):
+        """
+        return the gain and the noise figure of all the blocks (in dB)
+        as (n_stage x n_freq) arrays.
+        """
+        gain = np.stack([b.gain.dB().value for b in self.chain])
+        nf = np.stack([b.noise.dB().value for b in self.chain])
+        return PhysicalDimension._trusted(gain, "dB"), NoiseFigure(nf)
+
+    def cascade(self):
+        """
+        return the cumulative gain, noise figure and noise contribution
+        of each stage of the line-up (see cascade).
+        """
+        gain, nf = self.stack()
+        return cascade(nf, gain)
 
 
 def friis(nf: NoiseFigure, gain: PhysicalDimension):
@@ -60,13 +71,14 @@ def friis(nf: NoiseFigure, gain: PhysicalDimension):
     ----------
     nf : NoiseFigure
         List of the noise figure (in dB) of each block.
+        Stages are along the first axis, other axes are broadcast.
     gain : PhysicalDimension
-        List of the gain of each block (in dB).
+        List of the gain of each block (in dB), except the last one.
 
 
     Returns
     -------
-    float
+    NoiseFigure
         Total noise figure of the system
 
     """
@@ -75,10 +87,70 @@ def friis(nf: NoiseFigure, gain: PhysicalDimension):
     n = nf.shape[0]
     if m != n - 1:
         raise ValueError("gain should have 1 item less than noise factor f")
-    g_tot = 1.0
-    f_lin = nf.lin()
-    res = f_lin[0]
-    for i in range(m):
-        g_tot *= gain[i].lin()
-        res += (f_lin[i + 1] - 1) / g_tot
-    return res.dB()
+    f_lin = nf.lin().value
+    g_tot = np.cumprod(gain.lin().value, axis=0)
+    res = f_lin[0] + np.sum((f_lin[1:] - 1) / g_tot, axis=0)
+    return nf._trusted(np.atleast_1d(10 * np.log10(res)), "dB", nf.unit)
+
+
+def cascade(nf: NoiseFigure, gain: PhysicalDimension):
+    """
+    Cascade analysis of one or many line-ups in a single pass.
+
+    Parameters
+    ----------
+    nf : NoiseFigure
+        noise figure (in dB) of each block, stages along the first axis.
+        The other axes (frequency, line-up candidates...) are broadcast.
+    gain : PhysicalDimension
+        gain (in dB) of each block, stages along the first axis.
+
+    Returns
+    -------
+    gain_cum : PhysicalDimension
+        gain from the input to the output of each stage (in dB).
+    nf_cum : NoiseFigure
+        noise figure from the input to the output of each stage (in dB).
+    contrib : PhysicalDimension
+        part of the total noise factor due to each stage (linear, sums to one).
+
+    """
+    if gain.shape[0] != nf.shape[0]:
+        raise ValueError("gain and noise figure should have the same number of stage")
+    g_cum = np.cumsum(gain.dB().value, axis=0)
+    f_lin = nf.lin().value
+    g_in = np.ones_like(g_cum[:1])
+    g_in = np.concatenate((g_in, 10 ** (g_cum[:-1] / 10)), axis=0)
+    noise = np.concatenate((f_lin[:1], f_lin[1:] - 1), axis=0) / g_in
+    f_cum = np.cumsum(noise, axis=0)
+    return (
+        PhysicalDimension._trusted(g_cum, "dB"),
+        NoiseFigure._trusted(10 * np.log10(f_cum), "dB", nf.unit),
+        PhysicalDimension._trusted(noise / f_cum[-1], "lin"),
+    )
+
+
+def cascade_catalog(nf: NoiseFigure, gain: PhysicalDimension, choices):
+    """
+    Cascade analysis of all the line-ups built from a catalog of parts.
+
+    Parameters
+    ----------
+    nf : NoiseFigure
+        noise figure (in dB) of each part of the catalog, parts along the first axis.
+    gain : PhysicalDimension
+        gain (in dB) of each part of the catalog, parts along the first axis.
+    choices : array_like of int
+        (n_lineup x n_stage) indexes of the part used at each stage of each line-up.
+
+    Returns
+    -------
+    tuple
+        same as cascade, with arrays of shape (n_stage, n_lineup, ...).
+
+    """
+    index = np.asarray(choices).T
+    return cascade(
+        NoiseFigure._trusted(nf.dB().value[index], "dB", nf.unit),
+        PhysicalDimension._trusted(gain.dB().value[index], "dB"),
+    )
@@ -16,7 +16,7 @@ def int_phase_noise(
     Parameters
     ----------
     pn_db : PhaseNoise
-        List of the phase noise in dBc/Hz
+        List of the phase noise in dBc/Hz. A 2-D array integrates one curve per row.
     freq : Frequency
         List of the corresponding frequency (in Hz)
     f_min : Frequency
@@ -27,46 +27,49 @@ def int_phase_noise(
 
     Returns
     -------
-    float
-        integrated phase noise of the piece wise phase noise curve (in radian)
+    PhysicalDimension
+        integrated phase noise of the piece wise phase noise curve (in radian),
+        one value per curve.
 
     """
-    pn_shape = len(pn_db.value)
-    f_shape = len(freq.value)
+    pn_shape = pn_db.shape[-1]
+    f_shape = freq.shape[-1]
     if pn_shape != f_shape:
         raise ValueError(f"Expected identical shape, got {pn_shape} and {f_shape}")
-    ipn = PhysicalDimension(value=(0.0,), scale="lin", unit="")
-    for i in range(pn_shape - 1):
-        if f_min is not None and f_min.value > freq[i + 1].value:
-            # skipping all part bellow f_min
-            continue
-        if f_min is not None and f_min > freq[i]:
-            f1 = f_min if type(f_min) is Frequency else Frequency(value=f_min)
-            pn1_db = __pn_interpol(pn_db[i : i + 2], freq[i : i + 2], f_min)
-        else:
-            f1 = freq[i]
-            pn1_db = pn_db[i]
-
-        if f_max is not None and freq[i] > f_max:
-            continue
-        if f_max is not None and freq[i + 1] < f_max:
-            f2 = f_max if type(f_max) is Frequency else Frequency(value=f_max)
-            pn2_db = __pn_interpol(pn_db[i : i + 2], freq[i : i + 2], f_max)
-        else:
-            f2 = freq[i + 1]
-            pn2_db = pn_db[i + 1]
-        A = (pn1_db - pn2_db) / (f1.dB() - f2.dB())
-        ipn += (f2 * pn2_db.lin() - f1 * pn1_db.lin()) / (A + 1)
-    return ipn
+    pn = pn_db.dB().value
+    f_lin = freq.lin().value
+    f_db = 10 * np.log10(f_lin)
+    # slope of each segment, in dB per dB(Hz)
+    slope = np.diff(pn, axis=-1) / np.diff(f_db, axis=-1)
+    f1 = f_lin[..., :-1]
+    f2 = f_lin[..., 1:]
+    inside = np.ones(np.broadcast_shapes(slope.shape, f1.shape), dtype=bool)
+    if f_min is not None:
+        f_lo = __bound(f_min)
+        inside = inside & (f_lo <= f2)
+        f1 = np.maximum(f1, f_lo)
+    if f_max is not None:
+        f_hi = __bound(f_max)
+        inside = inside & (f1 <= f_hi)
+        f2 = np.minimum(f2, f_hi)
+    pn1 = pn[..., :-1] + slope * (10 * np.log10(f1) - f_db[..., :-1])
+    pn2 = pn[..., :-1] + slope * (10 * np.log10(f2) - f_db[..., :-1])
+    l1 = f1 * 10 ** (pn1 / 10)
+    l2 = f2 * 10 ** (pn2 / 10)
+    # closed-form integral of a power law, 1/f segments integrate to a logarithm
+    with np.errstate(divide="ignore", invalid="ignore"):
+        seg = np.where(slope == -1, l1 * np.log(f2 / f1), (l2 - l1) / (slope + 1))
+    ipn = np.sum(np.where(inside, seg, 0.0), axis=-1)
+    return PhysicalDimension._trusted(np.atleast_1d(ipn), "lin", "")
 
 
-def __pn_interpol(pn_db: PhaseNoise, freq: Frequency, f_int: Frequency):
+def __bound(f_lim):
     """
-    Interpolator for phase noise.
+    return the limit frequency (in Hz) as an array broadcastable against the segments.
     """
-    a = (pn_db[1] - pn_db[0]) / (freq[1].dB() - freq[0].dB())
-    b = pn_db[1] - a * freq[1].dB()
-    return b + a * f_int.dB()
+    if isinstance(f_lim, PhysicalDimension):
+        f_lim = f_lim.lin().value
+    return np.asarray(f_lim, dtype=float)[..., None]
 
 
 def to_jitter(ipn: IntegratedPhaseNoise, f0: Frequency):
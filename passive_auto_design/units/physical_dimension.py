@@ -1,3 +1,4 @@
+import operator
 from typing import Literal, List, Tuple, Any
 from pydantic import BaseModel
 from typing_extensions import Annotated
@@ -31,6 +32,21 @@ def validate(v: Any) -> np.ndarray:
 
 NDArray = Annotated[np.ndarray, BeforeValidator(validate)]
 
+_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "/": operator.truediv,
+    "*": operator.mul,
+    "**": operator.pow,
+}
+_INPLACE_OPERATORS = {
+    "+": np.add,
+    "-": np.subtract,
+    "/": np.true_divide,
+    "*": np.multiply,
+}
+_set_attr = object.__setattr__
+
 
 class PhysicalDimension(BaseModel):
     """
@@ -44,29 +60,43 @@ class PhysicalDimension(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
+    @classmethod
+    def _trusted(cls, value, scale="lin", unit=""):
+        """
+        Build an instance without running pydantic validation.
+        Only to be used with values coming from an already validated instance
+        (or from numpy), as no type check is performed on scale and unit.
+        """
+        out = cls.__new__(cls)
+        if not isinstance(value, np.ndarray):
+            # same coercion as validate: python and numpy scalars become 1-D arrays
+            value = np.asarray(value)
+            if value.ndim == 0:
+                value = value.reshape(1)
+        _set_attr(out, "__dict__", {"value": value, "unit": unit, "scale": scale})
+        _set_attr(out, "__pydantic_fields_set__", {"value", "unit", "scale"})
+        _set_attr(out, "__pydantic_extra__", None)
+        _set_attr(out, "__pydantic_private__", None)
+        return out
+
     def dB(self):
         """
         Convert the Physical dimension to decibel.
         """
         v = self.value
-        v_db = v if self.scale == "dB" else 10 * np.log10(np.abs(v))
-        out = self.__class__(value=v_db, scale="dB", unit=self.unit)
-        return out
+        v_db = v.copy() if self.scale == "dB" else 10 * np.log10(np.abs(v))
+        return self._trusted(v_db, "dB", self.unit)
 
     def lin(self):
         """
         Convert the Physical dimension to linear magnitude.
         """
         v = self.value
-        v_lin = 10 ** (v / 10) if self.scale == "dB" else v
-        return self.__class__(value=v_lin, scale="lin", unit=self.unit)
+        v_lin = 10 ** (v / 10) if self.scale == "dB" else v.copy()
+        return self._trusted(v_lin, "lin", self.unit)
 
     def __getitem__(self, item):
-        return self.__class__(
-            value=self.value[item],
-            scale=self.scale,
-            unit=self.unit,
-        )
+        return self._trusted(self.value[item], self.scale, self.unit)
 
     def __setitem__(self, key, value):
         self.value[key] = value
@@ -99,6 +129,18 @@ class PhysicalDimension(BaseModel):
     def __pow__(self, other):
         return self.__operator(other, "**")
 
+    def __iadd__(self, other):
+        return self.__inplace_operator(other, "+")
+
+    def __isub__(self, other):
+        return self.__inplace_operator(other, "-")
+
+    def __imul__(self, other):
+        return self.__inplace_operator(other, "*")
+
+    def __itruediv__(self, other):
+        return self.__inplace_operator(other, "/")
+
     def __eq__(self, other):
         if isinstance(other, PhysicalDimension):
             return (
@@ -113,14 +155,10 @@ class PhysicalDimension(BaseModel):
         return np.all(self.value < other.value)
 
     def __round__(self, x):
-        return self.__class__(
-            value=np.round(self.value, x), scale=self.scale, unit=self.unit
-        )
+        return self._trusted(np.round(self.value, x), self.scale, self.unit)
 
     def __ceil__(self):
-        return self.__class__(
-            value=np.ceil(self.value), scale=self.scale, unit=self.unit
-        )
+        return self._trusted(np.ceil(self.value), self.scale, self.unit)
 
     def rint(self):
         return np.rint(self.value)
@@ -130,14 +168,19 @@ class PhysicalDimension(BaseModel):
 
     def __operator(self, l_b, op):
         b = l_b.value if isinstance(l_b, PhysicalDimension) else l_b
-        if op == "+":
-            res = self.value + b
-        if op == "-":
-            res = self.value - b
-        if op == "/":
-            res = self.value / b
-        if op == "*":
-            res = self.value * b
-        if op == "**":
-            res = self.value**b
-        return self.__class__(value=np.array(res), scale=self.scale, unit=self.unit)
+        res = _OPERATORS[op](self.value, b)
+        return self._trusted(np.asarray(res), self.scale, self.unit)
+
+    def __inplace_operator(self, l_b, op):
+        """
+        Update the value in place (as numpy does, views of the value are updated too).
+        Fall back to a new array when the result does not fit in the current one
+        (dtype promotion or broadcasting to a larger shape).
+        """
+        b = l_b.value if isinstance(l_b, PhysicalDimension) else l_b
+        v = self.value
+        try:
+            _INPLACE_OPERATORS[op](v, b, out=v)
+        except (TypeError, ValueError):
+            self.__dict__["value"] = np.asarray(_OPERATORS[op](v, b))
+        return self
@@ -0,0 +1,75 @@
+"""
+Benchmark of the construction of lumped elements: validated constructor,
+trusted construction and pure model functions, in objects (or models) per second.
+Every object has different dimensions, so that the model cache never hits.
+
+usage: python script/bench_lumped_element.py [n_objects]
+"""
+import sys
+import timeit
+import numpy as np
+import passive_auto_design.components.lumped_element as lmp
+from passive_auto_design.components.inductor import Inductor, inductor_model
+from passive_auto_design.components.transformer import Transformer
+
+size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+values = (1 + np.random.default_rng(0).uniform(size=size)).tolist()
+
+
+def per_second(fun):
+    return size / min(timeit.repeat(fun, number=1, repeat=3))
+
+
+def transformer_dim(d_i):
+    dim = {"h_mut": 1e-6, "h_gnd": 1e-6}
+    for side in ("lp.", "ls."):
+        dim.update({side + "d_i": d_i, side + "n_turn": 2, side + "width": 5e-6})
+        dim[side + "gap"] = 2e-6
+    return dim
+
+
+cases = {
+    "Resistor": (
+        lambda: [lmp.Resistor(1e-6, v, 1.7e-8) for v in values],
+        lambda: [
+            lmp.Resistor.trusted({"section": 1e-6, "length": v}, {"rho": 1.7e-8})
+            for v in values
+        ],
+        lambda: [lmp.resistor_model(1e-6, v, 1.7e-8) for v in values],
+    ),
+    "Capacitor": (
+        lambda: [lmp.Capacitor(v * 1e-9, 1e-6, 4) for v in values],
+        lambda: [
+            lmp.Capacitor.trusted({"area": v * 1e-9, "dist": 1e-6}, {"eps_r": 4})
+            for v in values
+        ],
+        lambda: [lmp.capacitor_model(v * 1e-9, 1e-6, 4) for v in values],
+    ),
+    "Inductor": (
+        lambda: [Inductor(v * 1e-4, 2, 5e-6, 2e-6) for v in values],
+        lambda: [
+            Inductor.trusted(
+                {"d_i": v * 1e-4, "n_turn": 2, "width": 5e-6, "gap": 2e-6},
+                {"k_1": 2.25, "k_2": 3.55},
+            )
+            for v in values
+        ],
+        lambda: [inductor_model(v * 1e-4, 2, 5e-6, 2e-6) for v in values],
+    ),
+    "Transformer": (
+        lambda: [
+            Transformer(Inductor(v * 1e-4, 2, 5e-6, 2e-6), sym=True) for v in values
+        ],
+        lambda: [
+            Transformer.trusted(
+                transformer_dim(v * 1e-4), {"eps_r": 0.0, "rho": 0.0}, sym=True
+            )
+            for v in values
+        ],
+        None,
+    ),
+}
+print(f"{'objects/s':<12}{'validated':>12}{'trusted':>12}{'function':>12}")
+for name, (validated, trusted, function) in cases.items():
+    rates = [per_second(f) if f is not None else float("nan") for f in cases[name]]
+    print(f"{name:<12}" + "".join(f"{r:>12.0f}" for r in rates))
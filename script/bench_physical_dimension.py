@@ -0,0 +1,45 @@
+"""
+Micro-benchmark of the per-operation overhead of PhysicalDimension
+compared to raw numpy arrays.
+
+usage: python script/bench_physical_dimension.py [n_elements]
+"""
+import sys
+import timeit
+import numpy as np
+from passive_auto_design.units.physical_dimension import PhysicalDimension
+
+N_LOOP = 20000
+
+size = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+raw = np.linspace(1, 2, size)
+phys = PhysicalDimension(value=raw, unit="Hz")
+phys_db = phys.dB()
+
+cases = {
+    "a + b": (lambda: phys + phys, lambda: raw + raw),
+    "a * 2": (lambda: phys * 2, lambda: raw * 2),
+    "a / b": (lambda: phys / phys, lambda: raw / raw),
+    "a[0]": (lambda: phys[0], lambda: raw[0]),
+    "a.dB()": (lambda: phys.dB(), lambda: 10 * np.log10(np.abs(raw))),
+    "a.lin()": (lambda: phys_db.lin(), lambda: 10 ** (raw / 10)),
+}
+
+
+def __iadd():
+    tmp = phys
+    tmp += 1.0
+
+
+def __iadd_raw():
+    tmp = raw
+    tmp += 1.0
+
+
+cases["a += 1"] = (__iadd, __iadd_raw)
+
+print(f"{'operation':<10}{'physical (us)':>15}{'numpy (us)':>12}{'overhead (us)':>15}")
+for name, (f_phys, f_raw) in cases.items():
+    t_phys = min(timeit.repeat(f_phys, number=N_LOOP, repeat=5)) / N_LOOP * 1e6
+    t_raw = min(timeit.repeat(f_raw, number=N_LOOP, repeat=5)) / N_LOOP * 1e6
+    print(f"{name:<10}{t_phys:>15.2f}{t_raw:>12.2f}{t_phys - t_raw:>15.2f}")
@@ -0,0 +1,63 @@
+"""
+Benchmark of the coarse model cost evaluation of space_map,
+on the problem of tests/test_space_mapping.py.
+
+usage: python script/bench_space_mapping.py [n_candidates]
+"""
+import sys
+import timeit
+import numpy as np
+from passive_auto_design.space_mapping import GoalSpec, cost_calc
+from passive_auto_design.units.constants import eps0
+import passive_auto_design.components.lumped_element as lp
+
+goal = {"C": 800e-12, "R": (0, 1)}
+par = {"rho/h": 0.2, "eps/d": 5}
+
+
+def coarse_model(dim, par):
+    cap = lp.Capacitor(area=dim["w"] * dim["l"], dist=1, eps_r=par["eps/d"])
+    res = lp.Resistor(section=dim["w"], length=dim["l"], rho=par["rho/h"])
+    return {"C": cap.model["cap"], "R": res.model["res"]}
+
+
+def vectorized_coarse_model(dim, par):
+    return {
+        "C": eps0 * par["eps/d"] * dim["w"] * dim["l"],
+        "R": par["rho/h"] * dim["l"] / dim["w"],
+    }
+
+
+size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+population = np.random.default_rng(0).uniform(1e-3, 10, (2, size))
+goal_spec = GoalSpec(goal)
+
+
+def loop(model):
+    # one call per candidate, as done by the local (Powell) coarse optimization
+    for l_i, w_i in population.T:
+        goal_spec.cost(model({"l": l_i, "w": w_i}, par))
+
+
+def loop_cost_calc(model):
+    for l_i, w_i in population.T:
+        perf = model({"l": l_i, "w": w_i}, par)
+        cost_calc(tuple(perf.values()), tuple(goal.values()))
+
+
+def vectorized():
+    goal_spec.cost(
+        vectorized_coarse_model({"l": population[0], "w": population[1]}, par)
+    )
+
+
+cases = {
+    "loop, objects, cost_calc": lambda: loop_cost_calc(coarse_model),
+    "loop, objects, GoalSpec": lambda: loop(coarse_model),
+    "loop, numpy model, GoalSpec": lambda: loop(vectorized_coarse_model),
+    "population, GoalSpec": vectorized,
+}
+print(f"{size} candidates")
+for name, fun in cases.items():
+    t = min(timeit.repeat(fun, number=3, repeat=3)) / 3
+    print(f"{name:<32}{t * 1e3:>10.2f} ms{size / t:>14.0f} candidates/s")
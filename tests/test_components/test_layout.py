@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+import klayout.db as db
+from passive_auto_design.components.inductor import Inductor
+from passive_auto_design.components.transformer import Transformer
+from passive_auto_design.components.layout import LayoutLibrary, spiral
+
+
+def test_spiral():
+    """
+    unity test of the centerline of the spirals
+    """
+    points = spiral(100e-6, 2, 10e-6, 3e-6)
+    assert len(points) == 2 * 8 + 2
+    np.testing.assert_allclose(points[0], (55e-6, 0))
+    np.testing.assert_allclose(points[-1], (55e-6 + 2 * 13e-6, 0), atol=1e-12)
+    # consecutive turns are parallel, one pitch apart
+    side = np.linalg.norm(points[2:-1] - points[1:-2], axis=1)
+    assert np.all(np.diff(side) > 0)
+    square = spiral(100e-6, 1.5, 10e-6, 3e-6, sides=4)
+    assert len(square) == 6 + 2
+    np.testing.assert_allclose(square[1], (55e-6, 55e-6 + 13e-6 / 4))
+
+
+def test_layout_library(tmp_path):
+    """
+    unity test of the layout library: shared cells, windings and files
+    """
+    lib = LayoutLibrary()
+    for n_turn in (1, 2, 2, 3):
+        lib.add_inductor(Inductor(d_i=100e-6, n_turn=n_turn, width=10e-6, gap=3e-6))
+    assert len(lib) == 4
+    # the spirals are shared by the identical inductors
+    spirals = [c for c in lib.layout.each_cell() if c.name.startswith("spiral")]
+    assert len(spirals) == 3
+    with pytest.raises(ValueError):
+        lib.add_inductor(Inductor(), "inductor_0")
+
+    ind = Inductor(d_i=100e-6, n_turn=3, width=10e-6, gap=1e-6)
+    for style in ("stacked", "interleaved"):
+        top = lib.add_transformer(Transformer(ind, sym=True), style=style)
+        windings = [[], []]
+        for metal in lib.metals:
+            for winding, inst in zip(windings, top.each_inst()):
+                cell = lib.layout.cell(inst.cell_index)
+                region = db.Region(cell.begin_shapes_rec(metal))
+                winding.append(region.transformed(inst.cplx_trans).merged())
+        for primary, secondary in zip(*windings):
+            assert (primary & secondary).is_empty()
+        # the gap between the windings is kept (up to the rounding of the diagonals)
+        merged = (windings[0][0] + windings[1][0]).merged()
+        assert merged.space_check(round(0.99 / lib.layout.dbu)).is_empty()
+    with pytest.raises(ValueError):
+        lib.add_transformer(Transformer(ind, sym=True), style="planar")
+
+    for ext in ("gds", "oas"):
+        lib.write(tmp_path / f"lib.{ext}")
+        layout = db.Layout()
+        layout.read(str(tmp_path / f"lib.{ext}"))
+        assert len(layout.top_cells()) == 6
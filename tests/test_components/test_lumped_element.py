@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 import passive_auto_design.components.lumped_element as lmp
 from passive_auto_design.components.inductor import Inductor
 
@@ -45,3 +46,85 @@ def test_inductor():
     assert str(ind) == "1.96 nH"
 
     ind.draw("./tests/ind.gds")
+
+
+def test_model_cache():
+    """
+    unity test for the model cache of the lumped elements
+    """
+    Inductor.cache_clear()
+    ind = Inductor(d_i=210e-6, n_turn=1, width=10e-6, gap=3e-6)
+    assert Inductor.cache_info().misses == 1
+    ind_2 = Inductor(d_i=210e-6, n_turn=1, width=10e-6, gap=3e-6)
+    assert Inductor.cache_info().hits == 1
+    assert ind_2.model == ind.model
+    assert ind_2.dim["d_o"] == ind.dim["d_o"]
+    # models are copies: modifying one does not alter the cache
+    ind_2.model["ind"] = 0
+    assert Inductor(d_i=210e-6, n_turn=1, width=10e-6, gap=3e-6).model == ind.model
+
+    # assigning a dimension changes the key
+    ind.dim["width"] = 5e-6
+    assert ind.evaluate() != ind_2.model
+    assert ind.evaluate()["ind"] == Inductor(210e-6, 1, 5e-6, 3e-6).model["ind"]
+    # values equal up to the quantization share their model
+    hits = Inductor.cache_info().hits
+    Inductor(d_i=210e-6 * (1 + 1e-14), n_turn=1, width=10e-6, gap=3e-6)
+    assert Inductor.cache_info().hits == hits + 1
+
+    # bounded size, least recently used evicted first
+    Inductor.cache_size = 2
+    try:
+        for d_i in (1e-6, 2e-6, 3e-6):
+            Inductor(d_i=d_i)
+        assert Inductor.cache_info().currsize == 2
+        misses = Inductor.cache_info().misses
+        Inductor(d_i=3e-6)
+        Inductor(d_i=1e-6)
+        assert Inductor.cache_info().misses == misses + 1
+    finally:
+        del Inductor.cache_size
+    assert Inductor.cache_info().maxsize == 1024
+    # the caches are per class
+    lmp.Capacitor.cache_clear()
+    assert lmp.Capacitor.cache_info().currsize == 0
+    assert Inductor.cache_info().currsize == 2
+
+
+def test_trusted():
+    """
+    unity test for the construction of lumped elements without validation
+    """
+    ind = Inductor(d_i=183e-6, n_turn=2, width=10e-6, gap=3e-6)
+    fast = Inductor.trusted(
+        {"d_i": 183e-6, "n_turn": 2, "width": 10e-6, "gap": 3e-6},
+        {"k_1": 2.25, "k_2": 3.55},
+    )
+    assert fast.model == ind.model
+    assert fast.dim["d_o"] == ind.dim["d_o"]
+    assert str(fast) == str(ind)
+    fast.set_model_with_dim({"ind": 1.96e-9}, "k_1")
+    assert round(fast.model["ind"] * 1e9, 6) == 1.96
+
+    res = lmp.Resistor.trusted({"section": 1e-6, "length": 2.0}, {"rho": 1e-6})
+    assert res.model == lmp.Resistor(1e-6, 2.0, 1e-6).model
+
+
+def test_model_cache_threads():
+    """
+    the model cache is shared by threads evicting each other's keys
+    """
+    Inductor.cache_clear()
+    Inductor.cache_size = 2
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            models = list(
+                executor.map(
+                    lambda i: Inductor(d_i=(1 + i % 3) * 1e-6).model, range(800)
+                )
+            )
+    finally:
+        del Inductor.cache_size
+    assert models[:3] * 266 == models[:798]
+    info = Inductor.cache_info()
+    assert (info.hits + info.misses, info.currsize) == (800, 2)
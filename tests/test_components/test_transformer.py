@@ -1,5 +1,7 @@
+import numpy as np
 import passive_auto_design.components.transformer as tf
 from passive_auto_design.components.inductor import Inductor
+from passive_auto_design.substrate import COPPER, SILICON_OXYDE, Layer, Substrate
 
 
 def test_transformer():
@@ -10,5 +12,67 @@ def test_transformer():
 
     transfo.set_model_with_dim({"lp": 0.5e-9}, "lp.d_i")
     assert round(transfo.model["lp"] * 1e9, 6) == 0.5
-    assert round(transfo.dim["lp.d_i"] * 1e6, 6) == 197.145007
+    assert round(transfo.dim["lp.d_i"] * 1e6, 6) == 197.14502
     assert round(transfo.model["k"], 6) == 0.869882
+
+
+def test_transformer_multi_dim():
+    ind1 = Inductor(d_i=210e-6, n_turn=1, width=10e-6, gap=3e-6)
+    transfo = tf.Transformer(ind1, eps_r=4, h_mut=1.5e-6, sym=True)
+    dim_0 = dict(transfo.dim)
+
+    target = {"lp": 1e-9, "cm": 2e-12}
+    res = transfo.set_model_with_dim(
+        target, ["lp.d_i", "lp.width"], bounds={"lp.width": (3e-6, 100e-6)}
+    )
+    assert set(res.keys()) == {"lp.d_i", "lp.width"}
+    assert 3e-6 <= res["lp.width"] <= 100e-6
+    assert transfo.dim["lp.width"] == res["lp.width"]
+    assert transfo.dim["ls.width"] == res["lp.width"]
+    for key in target:
+        assert abs(transfo.model[key] / target[key] - 1) < 1e-4
+
+    # out of reach target: the width stops at its bound
+    transfo = tf.Transformer(ind1, eps_r=4, h_mut=1.5e-6, sym=True)
+    transfo.set_model_with_dim(
+        {"cm": 1e-9}, "lp.width", bounds={"lp.width": (3e-6, 20e-6)}
+    )
+    assert abs(transfo.dim["lp.width"] - 20e-6) < 1e-9
+    assert transfo.dim["lp.d_i"] == dim_0["lp.d_i"]
+
+
+def test_transformer_grid():
+    d_i, n_turn = np.meshgrid(np.linspace(100e-6, 300e-6, 5), np.arange(1, 4))
+    transfo = tf.Transformer(
+        Inductor(d_i=d_i, n_turn=n_turn, width=10e-6, gap=3e-6),
+        rho=1.7e-8,
+        eps_r=4,
+        sym=True,
+    )
+    for key in ("lp", "ls", "rp", "rs", "cm", "cg", "k"):
+        assert transfo.model[key].shape == (3, 5)
+    for i, j in ((0, 0), (1, 3), (2, 4)):
+        ind = Inductor(d_i=d_i[i, j], n_turn=n_turn[i, j], width=10e-6, gap=3e-6)
+        single = tf.Transformer(ind, rho=1.7e-8, eps_r=4, sym=True)
+        for key, value in single.model.items():
+            assert np.isclose(transfo.model[key][i, j], value, rtol=1e-12)
+
+
+def test_transformer_from_stack():
+    sub = Substrate()
+    for name, height in (
+        ("gnd", 1e-6),
+        ("ox_1", 5e-6),
+        ("m_1", 1e-6),
+        ("ox_2", 1e-6),
+        ("m_2", 3e-6),
+    ):
+        sub.add_layer(Layer(name, height, COPPER, SILICON_OXYDE))
+    stack = sub.analyze()
+    ind = Inductor(d_i=210e-6, n_turn=1, width=10e-6, gap=3e-6)
+    transfo = tf.Transformer.from_stack(ind, stack, ("m_2", "m_1", "gnd"), sym=True)
+    ref = tf.Transformer(
+        ind, rho=1 / (COPPER.rho * 3e-6), eps_r=4.2, h_mut=1e-6, h_gnd=5e-6, sym=True
+    )
+    for key, value in ref.model.items():
+        assert np.isclose(transfo.model[key], value, rtol=1e-12)
@@ -1,7 +1,7 @@
 import pytest
-from numpy import round
+from numpy import round, array, isclose
 import passive_auto_design.components.waveguide as wg
-from passive_auto_design.substrate import COPPER, D5880
+from passive_auto_design.substrate import COPPER, D5880, Dielectric
 
 
 def test_waveguide():
@@ -49,3 +49,56 @@ def test_af_siw():
     af1.print_info()
     with pytest.raises(ValueError):
         af1.f_cut_off(0, 1)
+
+
+def test_waveguide_sweep():
+    """
+    array geometries and substrates give the same results as one object per point
+    """
+    eps = array([2.2, 2.94, 4.2])
+    freq = array([20e9, 25e9, 30e9, 35e9])
+    grid = wg.Waveguide(COPPER, Dielectric(eps[:, None], 0.0009, 0.4e-3), 0.5e-3)
+    widths = array([6e-3, 7.1e-3])
+    grid.width = widths
+    shape = (4, 3, 2)
+    a_c = grid.calc_a_c(freq[:, None, None])
+    a_d = grid.calc_a_d(freq[:, None, None])
+    s21 = grid.get_sparam(freq[:, None, None], 10e-3)
+    assert a_c.shape == a_d.shape == s21.shape == shape
+    assert grid.first_cut_off.shape == (3, 2)
+    for i, f in enumerate(freq):
+        for j, e in enumerate(eps):
+            for k, w in enumerate(widths):
+                ref = wg.Waveguide(COPPER, Dielectric(e, 0.0009, 0.4e-3), 0.5e-3)
+                ref.width = w
+                assert isclose(ref.calc_a_c(f), a_c[i, j, k])
+                assert isclose(ref.calc_a_d(f), a_d[i, j, k])
+                assert isclose(ref.get_sparam(f, 10e-3), s21[i, j, k])
+    grid.first_cut_off = array([14e9, 17e9])
+    assert grid.width.shape == (3, 2)
+    assert grid.calc_pphc(freq[:, None, None], 35e5).shape == shape
+    assert grid.calc_aphc(freq[:, None, None], 533.15).shape == shape
+
+
+def test_af_siw_cut_off():
+    """
+    batched cut-off solver of AF-SIW
+    """
+    slabs = array([0.2e-3, 0.5e-3])[:, None]
+    widths = array([5e-3, 6.94e-3, 1e-3])
+    f_c, conv = wg.af_siw_cut_off(slabs, widths, D5880.epsilon)
+    assert f_c.shape == conv.shape == (2, 3)
+    assert conv.tolist() == [[True, True, True], [True, True, False]]
+    assert round(f_c[0, 1] * 1e-9, 1) == 14.6
+    af1 = wg.AF_SIW(COPPER, D5880, 2.4e-3, 0.2e-3)
+    af1.width = 6.94e-3
+    assert round(af1.f_cut_off(2) * 1e-9, 2) == 29.13
+    assert af1.f_cut_off(1) < af1.f_cut_off(2) < af1.f_cut_off(3)
+    # a geometry solved once is served from the cache
+    hits = wg._cached_cut_off.cache_info().hits
+    af1.print_info()
+    af1.print_info()
+    assert wg._cached_cut_off.cache_info().hits > hits
+    af1.slab = slabs
+    af1.width = widths
+    assert af1.f_cut_off().shape == (2, 3)
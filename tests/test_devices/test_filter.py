@@ -1,4 +1,5 @@
-from passive_auto_design.devices.filter import Filter
+import numpy as np
+from passive_auto_design.devices.filter import Filter, prototype
 from passive_auto_design.units.time import Frequency
 from passive_auto_design.units.physical_dimension import PhysicalDimension
 
@@ -11,3 +12,69 @@ def test_filter():
 
     filter = Filter(f_pass=f_pass, f_stop=f_stop, ripple=ripple, atten=atten)
     assert filter.Order == 4
+
+
+def test_prototype():
+    g, g_load = prototype(np.array([3, 4]), "chebyshev", 0.5)
+    assert np.allclose(
+        g, [[1.5963, 1.0967, 1.5963, 0], [1.6703, 1.1926, 2.3661, 0.8419]], atol=1e-4
+    )
+    assert np.allclose(g_load, [1, 1.9841], atol=1e-4)
+    g, g_load = prototype(np.array([2]))
+    assert np.allclose(g, np.sqrt(2)) and g_load == 1
+
+
+def test_filter_synthesis():
+    ripple = PhysicalDimension(value=0.5, scale="dB")
+    atten = PhysicalDimension(value=40, scale="dB")
+    f_pass = Frequency(np.array([1e9, 2e9, 3e9]))
+    f_stop = Frequency(np.array([2e9, 3e9, 4e9]))
+    for kind in ("butterworth", "chebyshev"):
+        bank = Filter(f_pass, f_stop, ripple, atten, kind=kind)
+        assert bank.shape == (3,) and len(set(bank.Order)) == 3
+        freq = np.array([[1e9], [2e9], [3e9]])
+        s21, s11 = bank.response(np.r_[f_pass.value, f_stop.value])
+        assert s21.shape == (3, 6)
+        loss = -20 * np.log10(np.abs(s21))
+        assert np.allclose(np.diag(loss[:, :3]), 0.5)
+        assert np.all(np.diag(loss[:, 3:]) >= 40)
+        assert np.allclose(np.abs(s21) ** 2 + np.abs(s11) ** 2, 1)
+        # the padded filters of the bank are the filters designed alone
+        alone = Filter(Frequency(2e9), Frequency(3e9), ripple, atten, kind=kind)
+        order = alone.Order
+        assert np.allclose(alone.elements()["L"], bank.elements()["L"][1, :order])
+        assert np.allclose(alone.response(freq[1])[0], s21[1, 1])
+
+    center = Frequency(np.array([1e9, 1.2e9]))
+    width = (Frequency(np.array([50e6, 50e6])), Frequency(np.array([150e6, 150e6])))
+    bank = Filter(*width, ripple, atten, kind="chebyshev", f_center=center)
+    s21, _ = bank.response(center.value)
+    # within the ripple at its center, rejected at the center of the other filter
+    assert np.all(np.diag(np.abs(s21)) >= 10 ** (-0.5 / 20) - 1e-9)
+    assert np.all(np.abs(s21[[0, 1], [1, 0]]) < 1e-2)
+    components = bank.components()
+    values = bank.elements()
+    assert np.allclose(components["L"].model["ind"], values["L"])
+    assert np.allclose(components["C"].model["cap"], values["C"])
+
+
+def test_filter_broadcast():
+    """
+    banks of scalar and array masks broadcast together
+    """
+    atten = PhysicalDimension(value=40, scale="dB")
+    ripples = PhysicalDimension(value=np.array([0.5, 1.0]), scale="dB")
+    bank = Filter(Frequency(1e9), Frequency(2e9), ripples, atten, kind="chebyshev")
+    assert bank.shape == (2,)
+    s21, _ = bank.response([1e9])
+    assert np.allclose(-20 * np.log10(np.abs(s21[:, 0])), [0.5, 1.0])
+
+    ripple = PhysicalDimension(value=0.5, scale="dB")
+    center = Frequency(np.array([1e9, 2e9]))
+    width = (Frequency(50e6), Frequency(150e6))
+    bank = Filter(*width, ripple, atten, kind="chebyshev", f_center=center)
+    assert bank.shape == (2,) and bank.f_center.shape == bank.f_pass.shape == (2,)
+    s21, _ = bank.response(center.value)
+    assert s21.shape == (2, 2)
+    alone = Filter(*width, ripple, atten, kind="chebyshev", f_center=Frequency(2e9))
+    assert np.allclose(alone.response(center.value)[0], s21[1])
@@ -4,6 +4,8 @@ Created on Fri Jul 12 15:07:03 2019
 @author: Patarimi
 """
 import numpy as np
+from scipy.special import i1
+from scipy.integrate import quad
 import passive_auto_design.devices.coupler as cpl
 import passive_auto_design.devices.balun as bln
 import passive_auto_design.devices.taper as tpr
@@ -21,6 +23,32 @@ def test_coupler():
     assert str(coupler) == "L: 11.2523 nH\tC: 4.5009 pF"
 
 
+def test_coupler_batch():
+    """
+    test function for the coupler class with arrays of targets
+    """
+    f_c = np.array([[1e9], [2e9]])
+    k = np.array([0.3, 0.5, 0.707])
+    coupler = cpl.Coupler(f_c, 50, k)
+    assert coupler.shape == (2, 3)
+    freq = np.linspace(0.5e9, 2.5e9, 5)
+    s = coupler.s_param(freq)
+    assert s.shape == (2, 3, 5, 4, 4)
+    # lossless and reciprocal
+    assert np.allclose(np.swapaxes(s.conj(), -1, -2) @ s, np.eye(4))
+    assert np.allclose(s, np.swapaxes(s, -1, -2))
+    # at the center frequency: matched, isolated, coupling k in quadrature
+    at_fc = s[[0, 1], :, [1, 3]]
+    assert np.allclose(at_fc[..., 0, 0], 0) and np.allclose(at_fc[..., 3, 0], 0)
+    assert np.allclose(np.abs(at_fc[..., 2, 0]), k)
+    assert np.allclose(np.angle(at_fc[..., 1, 0] / at_fc[..., 2, 0]), -np.pi / 2)
+    res = coupler.response(freq)
+    assert np.allclose(res["s31"][[0, 1], :, [1, 3]], 20 * np.log10(k))
+    alone = cpl.Coupler(2e9, 50, 0.5)
+    assert np.allclose(alone.s_param(freq), s[1, 1])
+    assert np.allclose(alone.response(freq)["ihsr"], res["ihsr"][1, 1])
+
+
 def test_balun():
     """
     test function for the balun class
@@ -40,7 +68,8 @@ def test_balun():
     assert round(delta_X[1]) == 190
 
     delta_X = balun.enforce_symmetrical(side="source", _verbose=True)
-    assert round(delta_X[0]) == 122
+    # no positive inductances make the first solution symmetrical
+    assert np.isnan(delta_X[0])
     assert round(delta_X[1]) == -128
 
     assert (
@@ -49,6 +78,32 @@ def test_balun():
     )
 
 
+def test_balun_batch():
+    """
+    test function for the balun class with arrays of targets
+    """
+    z_src = np.array([50 - 100j, 75 + 10j, 30 - 50j])
+    z_ld = np.array([[100 - 300j], [60 - 80j]])
+    balun = bln.Balun(60e9, z_src, z_ld, 0.8)
+    assert balun.shape == (2, 3)
+    L1, L2 = balun.design()
+    assert L1.shape == L2.shape == (2, 2, 3)
+    L1_ref, L2_ref = bln.Balun(60e9, z_src[2], z_ld[1, 0], 0.8).design()
+    assert np.allclose(L1[:, 1, 2], L1_ref) and np.allclose(L2[:, 1, 2], L2_ref)
+
+    for side in ("load", "source"):
+        delta_X = balun.enforce_symmetrical(side)
+        assert delta_X.shape == (2, 2, 3)
+        if side == "load":
+            L1, L2 = balun.design(XL_add=delta_X)
+        else:
+            L1, L2 = balun.design(XS_add=delta_X)
+        found = np.isfinite(delta_X)
+        assert np.any(found)
+        assert np.allclose(L1[found], L2[found], rtol=1e-9)
+        assert np.all(L1[found] > 0)
+
+
 def test_taper():
     """
     test function for the taper class
@@ -69,3 +124,19 @@ def test_taper():
     z_res = tpr.linear_taper(25, 50, 3)
     z_ref = [25, 37.5, 50]
     assert round(z_res, 2) == z_ref
+
+
+def __phase_equation(x, a_coeff):
+    return i1(a_coeff * np.sqrt(1 - x**2)) / (a_coeff * np.sqrt(1 - x**2))
+
+
+def test_klopfenstein_phi():
+    """
+    the series used for the klopfenstein taper must match the integral definition
+    """
+    a_coeff = 3.2
+    y_pos = np.array([0.0, 0.3, 0.5, 1.0])
+    phi = getattr(tpr, "__phi")(a_coeff, y_pos)
+    for y, phi_y in zip(y_pos, phi):
+        ref = quad(__phase_equation, 0, y, args=a_coeff)[0]
+        assert round(phi_y, 10) == round(ref, 10)
@@ -0,0 +1,119 @@
+import asyncio
+import sys
+import time
+from pytest import raises
+from numpy import isclose
+from passive_auto_design.components.inductor import Inductor, inductor_model
+from passive_auto_design.em_sweep import EMSweep, FAILED
+from passive_auto_design.space_mapping import evaluate_fine, space_map
+
+dims = [
+    {"d_i": 100e-6, "n_turn": 2, "width": 3e-6, "gap": 1e-6},
+    {"d_i": 150e-6, "n_turn": 3, "width": 5e-6, "gap": 2e-6},
+    {"d_i": 100e-6, "n_turn": 2, "width": 3e-6, "gap": 1e-6},
+]
+# fails on its first run in a job directory, then copies the dimensions as result
+FLAKY = """
+import os, shutil, sys
+if not os.path.exists("tried"):
+    open("tried", "w").close()
+    sys.exit("first attempt")
+shutil.copy(sys.argv[1], sys.argv[2])
+"""
+
+
+def hang(layout, dim, output):
+    """
+    solver never ending in time
+    """
+    time.sleep(60)
+
+
+def test_em_sweep(tmp_path):
+    """
+    unity test of the EM sweeps with the analytic stand-in solver
+    """
+    sweep = EMSweep(tmp_path, max_jobs=2)
+    results = sweep.run(dims)
+    assert len(sweep.db) == 2
+    assert results[0] == results[2]
+    assert isclose(results[1]["ind"], 1.05 * Inductor(**dims[1]).model["ind"])
+    assert len(list(tmp_path.glob("*/layout.gds"))) == 2
+    # jobs already done are read from the database
+    failing = EMSweep(tmp_path, solver=[sys.executable, "-c", "exit(1)"])
+    assert failing.run(dims[:2]) == results[:2]
+    # in the order of the dimensions, whatever the order of completion of the jobs
+    done = sorted(failing.results(), key=lambda item: item[0]["d_i"])
+    assert [dim for dim, _ in done] == dims[:2]
+
+    transformer = {"lp.d_i": 100e-6, "lp.n_turn": 2, "h_mut": 2e-6}
+    assert set(sweep.run([transformer])[0]) == {"lp", "ls", "rp", "rs", "cm", "cg", "k"}
+
+
+def test_em_sweep_retries(tmp_path):
+    """
+    unity test of the retries and failures of the solver commands
+    """
+    flaky = [sys.executable, "-c", FLAKY, "{dim}", "{output}"]
+    sweep = EMSweep(tmp_path / "flaky", solver=flaky)
+    assert sweep.run(dims[:1]) == [{k: float(v) for k, v in dims[0].items()}]
+    assert sweep.db.status(dims[0])[:2] == ("done", 2)
+
+    sweep = EMSweep(tmp_path / "failing", solver=flaky, retries=0)
+    assert sweep.run(dims[:1]) == [None]
+    status, attempts, error = sweep.db.status(dims[0])
+    assert (status, attempts) == (FAILED, 1) and "first attempt" in error
+    failing = EMSweep(tmp_path / "failing", solver=[sys.executable, "-c", "exit(1)"])
+    with raises(RuntimeError):
+        failing.fine_model()(dims[1])
+
+
+def test_em_sweep_timeout(tmp_path):
+    """
+    the solvers are stopped on timeout, callable ones included
+    """
+    start = time.perf_counter()
+    sweep = EMSweep(tmp_path / "hang", solver=hang, timeout=0.5, retries=1)
+    assert sweep.run(dims[:2]) == [None, None]
+    assert time.perf_counter() - start < 5
+    assert sweep.db.status(dims[0]) == (FAILED, 2, "timeout after 0.5 s")
+    command = [sys.executable, "-c", "import time; time.sleep(60)"]
+    sweep = EMSweep(tmp_path / "command", solver=command, timeout=0.5, retries=0)
+    assert sweep.run(dims[:1]) == [None]
+    assert time.perf_counter() - start < 10
+
+
+def test_em_model(tmp_path):
+    """
+    the fine model runs lists of dimensions as concurrent jobs,
+    also when called from a running event loop
+    """
+    sweep = EMSweep(tmp_path)
+    model = sweep.fine_model(perf=lambda result: result["ind"])
+    assert evaluate_fine(model, dims) == model.map(dims)
+    assert len(sweep.db) == 2
+
+    async def caller():
+        return model(dims[1])
+
+    assert asyncio.run(caller()) == model.map(dims)[1]
+
+
+def test_em_space_map(tmp_path):
+    """
+    space mapping of an inductor on the stand-in solver
+    """
+    sweep = EMSweep(tmp_path)
+
+    def coarse_model(dim, par):
+        ind = inductor_model(dim["d_i"], 2, 3e-6, 1e-6)
+        return {"ind": par["scale"] * ind}
+
+    def fine_model(dim):
+        return sweep.fine_model()({"d_i": dim["d_i"], "n_turn": 2})
+
+    dim, par, perf = space_map(
+        coarse_model, {"d_i": 100e-6}, fine_model, {"scale": 1.0}, {"ind": 2e-9}
+    )
+    assert isclose(par["scale"], 1.05)
+    assert isclose(perf["ind"], 2e-9, rtol=1e-3)
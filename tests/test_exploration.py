@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import passive_auto_design.devices.balun as bln
+from passive_auto_design.exploration import (
+    sample,
+    non_dominated,
+    evaluate_transformer,
+    explore,
+    balun_target,
+    ParetoFront,
+)
+
+bounds = {
+    "lp.d_i": (10e-6, 200e-6),
+    "lp.n_turn": (1, 3),
+    "lp.width": (2e-6, 20e-6),
+    "ls.d_i": (10e-6, 200e-6),
+    "ls.width": (2e-6, 20e-6),
+}
+const = {"rho": 5e-3, "eps_r": 4, "h_mut": 0.15e-6, "h_gnd": 0.15e-6}
+
+
+def brute_force_front(costs):
+    return {
+        i
+        for i, c in enumerate(costs)
+        if not np.any(np.all(costs <= c, axis=1) & np.any(costs < c, axis=1))
+    }
+
+
+def test_sample():
+    grid = list(sample(bounds, 100, "grid", n_axis=4))
+    assert sum(len(g["lp.d_i"]) for g in grid) == 4**4 * 3
+    assert set(np.concatenate([g["lp.n_turn"] for g in grid])) == {1, 2, 3}
+    for method in ("lhs", "sobol"):
+        dims = next(sample(bounds, 64, method, seed=0))
+        for key, (low, high) in bounds.items():
+            assert np.all(dims[key] >= low) and np.all(dims[key] <= high)
+        assert set(dims["lp.n_turn"]) == {1, 2, 3}
+
+
+def test_non_dominated():
+    rng = np.random.default_rng(0)
+    costs = rng.uniform(size=(2000, 3))
+    costs[1000:1010] = costs[:10]
+    index = non_dominated(costs, block=64)
+    assert set(index) == brute_force_front(costs)
+    # duplicates only kept once
+    assert len(index) == len(np.unique(costs[index], axis=0))
+
+
+def test_explore():
+    target = balun_target(bln.Balun(60e9, 100 - 300j, 50 - 100j, 0.8))
+    costs = evaluate_transformer(next(sample(bounds, 2**10, seed=1)), target, const)
+    assert costs.shape == (2**10, 4)
+
+    front = ParetoFront()
+    front.update(costs, {"i": np.arange(len(costs))})
+    assert set(front.dims["i"]) == brute_force_front(costs)
+
+    # streaming by small batches, concurrently or not, gives the front of the whole set
+    front = explore(bounds, target, const, n=2**10, batch_size=2**7, seed=1)
+    assert front.n_evaluated == 2**10
+    assert np.array_equal(
+        np.sort(front.costs, axis=0),
+        np.sort(costs[list(brute_force_front(costs))], axis=0),
+    )
+    with ThreadPoolExecutor(2) as executor:
+        threaded = explore(
+            bounds,
+            target,
+            const,
+            n=2**10,
+            batch_size=2**7,
+            seed=1,
+            executor=executor,
+        )
+    assert np.array_equal(np.sort(front.costs, axis=0), np.sort(threaded.costs, axis=0))
+    assert set(front.dims) == set(bounds)
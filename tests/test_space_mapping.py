@@ -1,7 +1,14 @@
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pytest import raises
 from numpy import inf, array, round
 import skrf as rf
-from passive_auto_design.space_mapping import space_map
+from passive_auto_design.space_mapping import (
+    space_map,
+    aggressive_space_map,
+    GoalSpec,
+    cost_calc,
+)
 from passive_auto_design.units.constants import eps0
 import passive_auto_design.components.lumped_element as lp
 
@@ -55,3 +62,125 @@ def test_std_dev():
     assert round(par_f["eps/d"], 3) == 5
     assert round(goal_f["C"] * 1e12, 3) == 800
     assert goal_f["R"] < 1
+
+
+def test_space_map_cache(tmp_path):
+    calls = []
+
+    def counted_fine_model(dim):
+        calls.append(dim)
+        return fine_model(dim)
+
+    cache = str(tmp_path / "fine_model")
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        dim_f, par_f, goal_f = space_map(
+            coarse_model,
+            dim0,
+            counted_fine_model,
+            par0,
+            goal,
+            maxiter=2,
+            executor=pool,
+            cache=cache,
+            fd_step=1e-3,
+        )
+    assert len(calls) == 6
+    assert round(par_f["eps/d"], 3) == 5
+    # a re-run is only served by the cache
+    dim_c, par_c, goal_c = space_map(
+        coarse_model,
+        dim0,
+        counted_fine_model,
+        par0,
+        goal,
+        maxiter=2,
+        cache=cache,
+        fd_step=1e-3,
+    )
+    assert len(calls) == 6
+    assert goal_c == goal_f
+
+
+def vectorized_coarse_model(dim, par):
+    """
+    Coarse model accepting arrays of dimensions (one per candidate).
+    """
+    return {
+        "C": eps0 * par["eps/d"] * dim["w"] * dim["l"],
+        "R": par["rho/h"] * dim["l"] / dim["w"],
+    }
+
+
+def test_goal_spec():
+    goal_spec = GoalSpec(goal)
+    assert goal_spec.cost({"C": 800e-12, "R": 0.5}) == 0
+    assert round(goal_spec.cost({"C": 400e-12, "R": 2}), 6) == 1.25
+    population = {"C": array([800e-12, 400e-12]), "R": array([0.5, 2])}
+    assert round(goal_spec.cost(population), 6).tolist() == [0, 1.25]
+    assert cost_calc((400e-12, 2), (800e-12, (0, 1))) == goal_spec.cost(
+        {"C": 400e-12, "R": 2}
+    )
+
+
+def test_space_map_vectorized():
+    dim_f, par_f, goal_f = space_map(
+        vectorized_coarse_model,
+        {"l": 1.0, "w": 1.0},
+        fine_model,
+        par0,
+        goal,
+        maxiter=3,
+        dim_bounds={"l": (1e-3, 100), "w": (1e-3, 100)},
+        vectorized=True,
+    )
+    assert round(par_f["eps/d"], 3) == 5
+    assert round(goal_f["C"] * 1e12, 3) == 800
+    assert 0 < goal_f["R"] < 1
+
+
+def test_aggressive_space_map():
+    calls = []
+
+    def counted_fine_model(dim):
+        calls.append(dim)
+        return fine_model(dim)
+
+    dim_f, par_f, goal_f = aggressive_space_map(
+        coarse_model, dim0, counted_fine_model, par0, goal, tol=1e-6
+    )
+    assert len(calls) <= 5
+    assert par_f == par0
+    assert round(goal_f["C"] * 1e12, 3) == 800
+    assert 0 < goal_f["R"] < 1
+    assert goal_f == fine_model(dim_f)
+
+
+def test_space_map_tol():
+    calls = []
+
+    def counted_fine_model(dim):
+        calls.append(dim)
+        return fine_model(dim)
+
+    dim_f, par_f, goal_f = space_map(
+        coarse_model, dim0, counted_fine_model, par0, goal, maxiter=10, tol=1e-6
+    )
+    assert len(calls) < 10
+    assert round(goal_f["C"] * 1e12, 3) == 800
+
+
+def test_space_map_null_dim():
+    """
+    dimensions equal to 0 do not give a nan step
+    """
+
+    def coarse_offset(dim, par):
+        return coarse_model({"l": dim["l"] + dim["offset"], "w": dim["w"]}, par)
+
+    for tol in (None, 1e-6):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            dim_f, _, goal_f = space_map(
+                coarse_offset, {**dim0, "offset": 0.0}, fine_model, par0, goal, tol=tol
+            )
+        assert round(goal_f["C"] * 1e12, 3) == 800
@@ -1,4 +1,4 @@
-from numpy import inf, array
+from numpy import inf, array, linspace, isclose, zeros, log10
 import passive_auto_design.special as sp
 from passive_auto_design.units.physical_dimension import PhysicalDimension
 
@@ -17,10 +17,51 @@ def test_ihsr():
     assert sp.ihsr(3 + 0 * 1j, 3 * 1j) == inf
     assert sp.ihsr(3, 3) == 0
     assert round(10 ** (-3 / 10), 1) == 0.5
+    s31 = array([3, 3, 1, 0, 1]) + 0j
+    s21 = array([3j, 3, 2j, 0, 1j + 1e-9])
+    out = zeros((2, 5))
+    res = sp.ihsr(s31, array([s21, -s21]), out=out)
+    assert res is out
+    assert (res[0] == res[1]).all()
+    assert isclose(res[0], [inf, 0, 10 * log10(3), inf, 10 * log10(2e9)]).all()
 
 
 def test_sp_calculation():
     assert sp.gamma(1j * 25, 1j * 50) == 1 / 3
+    z_load = array([[25, 50, 100]])
+    out = zeros((2, 3), dtype=complex)
+    res = sp.gamma(z_load, array([[50], [100]]), raw=True, out=out)
+    assert res is out
+    assert isclose(res, [[1 / 3, 0, -1 / 3], [0.6, 1 / 3, 0]]).all()
+    assert isclose(sp.quality_f(array([1 + 2j, 2 - 1j])), [2, -0.5]).all()
     z_profile = array([50, 75, 100], dtype=complex)
     assert round(sp.reflexion_coef(z_profile, 10), 3) == -0.006 - 0.286 * 1j
     assert round(sp.transmission_coef(z_profile, 10), 3) == 1.04 - 0.002 * 1j
+
+
+def test_sp_sweep():
+    z_profile = array([50, 75, 100], dtype=complex)
+    phases = linspace(0, 3, 7)
+    gammas = sp.reflexion_coef(z_profile, phases)
+    assert gammas.shape == phases.shape
+    for phase, g in zip(phases, gammas.value):
+        assert isclose(sp.reflexion_coef(z_profile, phase).value, g).all()
+    profiles = array([z_profile, z_profile[::-1]])
+    assert sp.reflexion_coef(profiles[:, None, :], phases).shape == (2, 7)
+    # a very lossy first section hides the rest of the profile
+    assert isclose(sp.reflexion_coef(z_profile, phases, 20).value, 0).all()
+    assert sp.abcd_cascade(z_profile, phases).shape == (7, 2, 2)
+
+
+def test_abcd_ladder():
+    abcd = sp.abcd_ladder(array([0.02j, 0.0]), array([50j, 0.0]))
+    assert isclose(abcd, [[1, 50j], [0.02j, 0]]).all()
+    padded = sp.abcd_ladder(array([[0.02j, 0.0], [0.02j, 0.01j]]), array([50j, 0.0]))
+    assert isclose(padded[0], abcd).all()
+    assert padded.shape == (2, 2, 2)
+    omega = linspace(0.5, 2, 4)
+    lossless = sp.abcd_ladder(array([0.02, 0.01]), array([50, 0.0]), omega)
+    for w, mat in zip(omega, lossless):
+        assert isclose(
+            sp.abcd_ladder(1j * w * array([0.02, 0.01]), array([50j * w, 0])), mat
+        ).all()
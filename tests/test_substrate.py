@@ -3,11 +3,22 @@ Created on Fri Jul 12 09:30:00 2019
 
 @author: Patarimi
 """
+import pickle
+import numpy as np
 import pytest
+import yaml
 import passive_auto_design.substrate as sb
 
 
-def test_substrate():
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """
+    binary cache of the substrate files in the test directory
+    """
+    monkeypatch.setattr(sb, "CACHE_DIR", str(tmp_path / "cache"))
+
+
+def test_substrate(tmp_path):
     sub = sb.Substrate()
     with pytest.raises(FileNotFoundError):
         sub = sb.Substrate("wrong_path.yml")
@@ -20,10 +31,97 @@ def test_substrate():
     sub.add_layer(m_layer)
     with pytest.raises(ValueError):
         sub.dump("tests")
-    sub.dump("tests/tech.yml")
-    # remove for now
-    # TODO : Find why it work on local and not on server
-    # sub.load('tests/tech.yml')
+    sub.dump(f"{tmp_path}/tech.yml")
+    layers = [l.to_dict() for l in sub.sub]
+    sub.load(f"{tmp_path}/tech.yml")
+    assert [l.to_dict() for l in sub.sub] == layers
     assert sub.get_index_of("m_bott") == 0
+    tech = sb.Substrate("tests/tech.yml")
+    assert [l.name for l in tech.sub] == ["m_bott", "core", "m_bott"]
     with pytest.raises(ValueError):
         sub.get_index_of("foo")
+
+
+def test_substrate_load(tmp_path, monkeypatch):
+    sub = sb.Substrate()
+    for i in range(300):
+        layer = sb.Layer(f"m_{i}", 1e-6 * i, sb.COPPER, sb.SILICON_OXYDE)
+        layer.set_rules(1e-6, 1e-5, 2e-6)
+        sub.add_layer(layer)
+    sub.dump(f"{tmp_path}/tech.yml")
+    loaded = sb.Substrate(f"{tmp_path}/tech.yml")
+    assert [l.to_dict() for l in loaded.sub] == [l.to_dict() for l in sub.sub]
+    assert loaded.get_index_of("m_250") == 250
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    # the binary cache gives the same substrate, without parsing the file
+    sb._LOADED.clear()
+    with monkeypatch.context() as patch:
+        patch.setattr(sb, "_LegacyLoader", None)
+        cached = sb.Substrate(f"{tmp_path}/tech.yml")
+    assert [l.to_dict() for l in cached.sub] == [l.to_dict() for l in sub.sub]
+    # the index follows the changes of the layers
+    loaded.sub[0].name = "m_250"
+    assert loaded.get_index_of("m_250") == 0
+    loaded.add_layer(sb.Layer("top", 1e-6, sb.COPPER, sb.AIR))
+    assert loaded.get_index_of("top") == 300
+    # renaming a layer only invalidates the index of its substrates
+    shared = sb.Substrate()
+    shared.add_layer(loaded.sub[1])
+    assert shared.get_index_of("m_1") == 0
+    index = loaded._index
+    cached.sub[1].name = "m_2"
+    assert loaded._index is index
+    loaded.sub[1].name = "m_2"
+    assert loaded._index is None and shared._index is None
+    assert loaded.get_index_of("m_2") == 1 and shared.get_index_of("m_2") == 0
+    copy = pickle.loads(pickle.dumps(loaded))
+    copy.sub[2].name = "m_1"
+    assert copy.get_index_of("m_1") == 2
+
+    # legacy files with python tags, only the substrate classes are accepted
+    legacy = sb.Substrate("apps/tech.yml", False)
+    assert legacy.sub[legacy.get_index_of("Via")].metal.roughness == 0.0004
+    with open(f"{tmp_path}/unsafe.yml", "w") as file:
+        file.write("- !!python/object/apply:os.system ['echo unsafe']\n")
+    with pytest.raises(yaml.constructor.ConstructorError):
+        sb.Substrate(f"{tmp_path}/unsafe.yml")
+    with open(f"{tmp_path}/invalid.yml", "w") as file:
+        file.write("- name: m_1\n  height: thick\n")
+    with pytest.raises(ValueError, match="height"):
+        sb.Substrate(f"{tmp_path}/invalid.yml")
+
+
+def test_stack_up():
+    sub = sb.Substrate()
+    for name, height, diel in (
+        ("gnd", 1e-6, sb.SILICON_OXYDE),
+        ("ox_1", 4e-6, sb.SILICON_OXYDE),
+        ("m_1", 1e-6, sb.SILICON_OXYDE),
+        ("ox_2", 2e-6, sb.D5880),
+        ("m_2", 3e-6, sb.D5880),
+    ):
+        sub.add_layer(sb.Layer(name, height, sb.COPPER, diel))
+    stack = sub.analyze([1e9, 1e10])
+    assert sub.analyze([1e9, 1e10]) is stack
+    h_mut, eps_r = stack.pair("m_1", "m_2")
+    assert np.allclose((h_mut, eps_r), (2e-6, 2.2))
+    h_gnd, eps_r = stack.pair("m_2", "gnd")
+    assert round(h_gnd * 1e6, 9) == 7
+    # permittivity of the layers in series
+    assert round(eps_r, 9) == round(7 / (5 / 4.2 + 2 / 2.2), 9)
+    assert np.all(np.isnan(stack.pair(["m_1", "m_1"], ["ox_2", "m_1"])[1]))
+    h, _ = stack.pair(np.array([0, 2]), np.array([[4], [2]]))
+    assert h.shape == (2, 2)
+
+    sheet_dc = 1 / (sb.COPPER.rho * 3e-6)
+    assert stack.sheet_resistance("m_2") == sheet_dc
+    assert stack.sheet_resistance("m_2", 0.0) == sheet_dc
+    # thick metal: the current flows in a skin depth
+    skin = stack.skin_depth("m_2", 1e10)
+    assert np.isclose(stack.sheet_resistance("m_2", 1e10), 1 / (sb.COPPER.rho * skin))
+    assert stack.sheet_res_table.shape == (5, 2)
+    assert np.isclose(stack.sheet_res_table[4, 1], stack.sheet_resistance("m_2", 1e10))
+
+    # a change of technology gives a new analysis
+    sub.sub[3].height = 3e-6
+    assert np.isclose(sub.analyze([1e9, 1e10]).pair("m_1", "m_2")[0], 3e-6)
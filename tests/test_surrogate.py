@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from passive_auto_design.surrogate import LookupTable
+from passive_auto_design.components.inductor import Inductor
+
+bounds = {"d_i": (50e-6, 300e-6), "width": (2e-6, 20e-6), "n_turn": [1, 2, 3]}
+
+
+def inductor_model(dim):
+    return Inductor(**dim).model
+
+
+def test_lookup_table(tmp_path):
+    table = LookupTable.tabulate(inductor_model, bounds, 9)
+    assert table.shape == (9, 9, 3)
+
+    # grid points are exact, in scalar or array mode
+    dim = {"d_i": 50e-6, "width": 2e-6 + 2 * 18e-6 / 8, "n_turn": 2}
+    assert np.isclose(table(dim)["ind"], inductor_model(dim)["ind"], rtol=1e-12)
+    rng = np.random.default_rng(0)
+    dims = {
+        "d_i": rng.uniform(50e-6, 300e-6, 100),
+        "width": rng.uniform(2e-6, 20e-6, 100),
+        "n_turn": rng.integers(1, 4, 100).astype(float),
+    }
+    ref = inductor_model(dict(dims))["ind"]
+    ind = table({"d_i": dims["d_i"]}, width=dims["width"], n_turn=dims["n_turn"])["ind"]
+    assert ind.shape == (100,)
+    assert np.isclose(table({k: v[7] for k, v in dims.items()})["ind"], ind[7])
+    err = np.max(np.abs(ind - ref)) / np.ptp(ref)
+    assert err < 5 * table.error_bound()
+
+    # refinement down to the tolerance, evaluated concurrently
+    with ThreadPoolExecutor(2) as executor:
+        fine = table.refine(inductor_model, rtol=1e-4, executor=executor)
+    assert fine.error_bound() < 1e-4
+    assert np.max(np.abs(fine(dims)["ind"] - ref)) / np.ptp(ref) < 1e-4
+
+    fine.save(tmp_path / "ind")
+    loaded = LookupTable.load(tmp_path / "ind")
+    assert isinstance(loaded.values, np.memmap)
+    assert np.array_equal(loaded(dims)["ind"], fine(dims)["ind"])
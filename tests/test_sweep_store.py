@@ -0,0 +1,83 @@
+import pickle
+import numpy as np
+import skrf as rf
+from pytest import raises
+from passive_auto_design.sweep_store import SweepStore, read_touchstone
+
+
+def test_read_touchstone(tmp_path):
+    rng = np.random.default_rng(0)
+    for n_port in (1, 2, 3):
+        s = rng.normal(size=(51, n_port, n_port, 2)) @ (1, 1j)
+        net = rf.Network(frequency=rf.Frequency(1, 10, 51, "GHz"), s=s)
+        for form in ("ri", "ma", "db"):
+            net.write_touchstone(str(tmp_path / f"net_{form}"), form=form)
+            chunks = list(
+                read_touchstone(tmp_path / f"net_{form}.s{n_port}p", chunk_size=7)
+            )
+            assert len(chunks) > 1
+            freq = np.concatenate([c[0] for c in chunks])
+            s_read = np.concatenate([c[1] for c in chunks])
+            assert np.allclose(freq, net.f)
+            assert np.allclose(s_read, s)
+    version_2 = tmp_path / "version_2.ts"
+    version_2.write_text(
+        "[Version] 2.0\n# MHz S RI R 50\n[Number of Ports] 2\n"
+        "[Two-Port Data Order] 12_21\n[Network Data]\n"
+        "100 1 0 2 0 3 0 4 0 ! comment\n200 5 0 6 0\n7 0 8 0\n[End]\n"
+    )
+    ((freq, s),) = read_touchstone(version_2)
+    assert np.all(freq == (100e6, 200e6))
+    assert np.all(s.real == np.reshape(range(1, 9), (2, 2, 2)))
+
+    # version 1 two-port: the noise parameters follow the S-parameters
+    for chunk_size in (2, 100):
+        chunks = list(read_touchstone("tests/noise.s2p", chunk_size=chunk_size))
+        freq = np.concatenate([c[0] for c in chunks])
+        s = np.concatenate([c[1] for c in chunks])
+        assert np.all(freq == (1e9, 2e9, 3e9)) and s.shape == (3, 2, 2)
+        assert np.isclose(s[2, 1, 0], 1.8 * np.exp(1j * np.pi / 3))
+    # 9 noise points, as many values as 5 S-parameter records
+    lines = open("tests/noise.s2p").read().split("\n")
+    noisy = tmp_path / "noisy.s2p"
+    noisy.write_text("\n".join(lines + [f"{f} 0.5 0.6 20 0.3" for f in range(3, 10)]))
+    assert len(np.concatenate([c[0] for c in read_touchstone(noisy)])) == 3
+    noisy.write_text("# GHz S RI\n1 0 0 0 0 0 0 0 0\n2 0 0 0 O 0 0 0 0\n")
+    with raises(ValueError, match="invalid data"):
+        list(read_touchstone(noisy))
+
+
+def test_sweep_store(tmp_path):
+    freq = np.linspace(1, 2, 11)
+    with open(tmp_path / "sweep.csv", "w") as file:
+        file.write("w,l,freq,re11,im11,re12,im12,re21,im21,re22,im22\n")
+        for w in (1, 2, 3):
+            for l in (10, 20):
+                for f in freq:
+                    file.write(f"{w},{l},{f},{w * l * f},0,0.1,0,{w + l},0,0,0.5\n")
+    store = SweepStore(str(tmp_path / "store"), keys=("w", "l"))
+    store.add_csv(tmp_path / "sweep.csv", unit=1e9, chunk_size=5)
+    assert len(store) == 6 and store.size == 66
+    assert store.geometry()["l"].tolist() == [10, 20] * 3
+    s = store.interpolate({"w": 1.5, "l": 15}, [1.05e9, 1.5e9])
+    assert np.allclose(s[:, 0, 0], 1.5 * 15 * np.array([1.05, 1.5]))
+    assert np.allclose(s[:, 1, 1], 0.5j)
+
+    fine_model = store.fine_model(1.5e9)
+    perf = fine_model({"w": 2.5, "l": 12})
+    assert round(perf["S21"], 6) == round(20 * np.log10(14.5), 6)
+    # reopened from the disk, e.g. by a process pool
+    assert pickle.loads(pickle.dumps(fine_model))({"w": 2.5, "l": 12}) == perf
+
+    with raises(
+        ValueError, match=r"of \('w', 'l'\), requested n_port=None, keys=\('w',\)"
+    ):
+        SweepStore(str(tmp_path / "store"), keys=("w",))
+
+    net = rf.Network(frequency=rf.Frequency(1, 2, 11, "GHz"), s=np.ones((11, 2, 2)))
+    net.write_touchstone(str(tmp_path / "net"))
+    store.add_touchstone(tmp_path / "net.s2p", {"w": 1, "l": 10})
+    assert len(store) == 7
+    # two sweeps of the same geometry
+    with raises(ValueError):
+        store.interpolate({"w": 1.5, "l": 15}, 1.5e9)
@@ -44,3 +44,25 @@ def test_rf_lin_up():
     RF_LU = lu.RFLineUp(chain=(b1, b2))
     assert round(RF_LU.NF(), 1) == NoiseFigure(3.2)
     assert RF_LU.gain() == 24
+
+
+def test_cascade():
+    nf = NoiseFigure([[3, 3.5], [6, 6], [10, 12]])
+    gain = PhysicalDimension(value=[[15, 14], [9, 10], [-3, -3]], scale="dB")
+    g_cum, nf_cum, contrib = lu.cascade(nf, gain)
+    assert g_cum.shape == nf_cum.shape == contrib.shape == (3, 2)
+    assert round(g_cum[-1], 1) == PhysicalDimension(value=[21, 21], scale="dB")
+    assert round(nf_cum[-1], 6) == round(lu.friis(nf, gain[:-1]), 6)
+    assert (abs(contrib.value.sum(axis=0) - 1) < 1e-12).all()
+    with raises(ValueError):
+        lu.cascade(nf, gain[:-1])
+
+
+def test_cascade_catalog():
+    nf = NoiseFigure([3, 6, 1])
+    gain = PhysicalDimension(value=[15, 9, 20], scale="dB")
+    choices = [[0, 1], [2, 0]]
+    g_cum, nf_cum, _ = lu.cascade_catalog(nf, gain, choices)
+    assert g_cum.shape == (2, 2)
+    assert round(nf_cum[-1, 0], 1) == NoiseFigure(3.2)
+    assert round(g_cum[-1, 1], 1) == PhysicalDimension(value=35, scale="dB")
@@ -17,3 +17,17 @@ def test_physical_dimension():
     phys[2] = 4
     with raises(ValueError):
         phy.PhysicalDimension(value="ab", unit="Hz", scale="lin")
+
+
+def test_inplace_operators():
+    phys = phy.PhysicalDimension(value=[1.0, 2.0], unit="Hz", scale="lin")
+    value = phys.value
+    phys += 1
+    phys *= phy.PhysicalDimension(value=[2.0, 3.0])
+    assert phys.value is value
+    assert phys == phy.PhysicalDimension(value=[4.0, 9.0], unit="Hz", scale="lin")
+    # dtype promotion falls back to a new array
+    phys += 1j
+    assert phys == phy.PhysicalDimension(value=[4 + 1j, 9 + 1j], unit="Hz")
+    assert phys[0].shape == (1,)
+    assert isinstance(phys.lin(), phy.PhysicalDimension)